@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+import voz
+from cache_tts import obtener_cache
+from numeros_es import monto_a_palabras, vocabulario_montos
+
+# --- 🪙 ANUNCIADOR DE DEPÓSITOS (sin red) ---
+# Los clips de cada palabra se sintetizan UNA vez (quedan en el cache TTS en disco)
+# y en tiempo real solo se pegan arrays PCM con un crossfade corto.
+
+FRASE_INICIO = "¡Oink! Acaban de llegar"
+FRASE_FIN = "para ti."
+
+CROSSFADE_MS = 15     # Solape entre palabras (evita clics al pegar)
+PAUSA_FRASE_MS = 80   # Respiro entre la frase fija y el monto
+MARGEN_MS = 10        # Lo que dejamos antes/después de la voz al recortar el clip
+UMBRAL_RECORTE = 0.02 # Fracción del pico que consideramos "voz" al recortar
+
+
+def _recortar(pcm, fs):
+    """Quita el silencio que el TTS deja al inicio y al final de cada clip."""
+    x = pcm.astype(np.float32) / 32768.0
+    if not x.size:
+        return x
+    voz_idx = np.flatnonzero(np.abs(x) > UMBRAL_RECORTE * np.abs(x).max())
+    if not voz_idx.size:
+        return x[:0]
+    margen = fs * MARGEN_MS // 1000
+    return x[max(voz_idx[0] - margen, 0):voz_idx[-1] + margen]
+
+
+def unir_con_crossfade(clips, fs, crossfade_ms=CROSSFADE_MS):
+    """Concatena arrays float32 solapando `crossfade_ms` con rampas de igual potencia."""
+    clips = [c for c in clips if c.size]
+    if not clips:
+        return np.zeros(0, dtype=np.float32)
+    xf = fs * crossfade_ms // 1000
+    # El solape no puede ser mayor que el clip más corto
+    xf = min([xf] + [c.size // 2 for c in clips])
+    rampa = np.linspace(0.0, np.pi / 2, xf, dtype=np.float32)
+    entrada, salida = np.sin(rampa), np.cos(rampa)
+
+    largo = sum(c.size for c in clips) - xf * (len(clips) - 1)
+    salida_pcm = np.zeros(largo, dtype=np.float32)
+    pos = 0
+    for i, clip in enumerate(clips):
+        tramo = clip.copy()
+        if xf and i > 0:
+            tramo[:xf] *= entrada
+        if xf and i < len(clips) - 1:
+            tramo[-xf:] *= salida
+        salida_pcm[pos:pos + tramo.size] += tramo
+        pos += tramo.size - xf
+    return salida_pcm
+
+
+class AnunciadorMontos:
+    """
+    Convierte un monto en audio pegando clips pregrabados:
+    "¡Oink! Acaban de llegar" + "treinta y cinco soles con cincuenta céntimos" + "para ti."
+    """
+
+    def __init__(self):
+        self.clips = {}
+        self.fs = voz.TASA_PCM
+        self.listo = threading.Event()
+
+    @staticmethod
+    def vocabulario():
+        return [FRASE_INICIO, FRASE_FIN] + vocabulario_montos()
+
+    def preparar(self, client):
+        """Sintetiza lo que falte (solo la primera vez) y carga todos los clips en RAM."""
+        voz.precalentar(client, self.vocabulario())
+        cache = obtener_cache()
+        faltan = []
+        for texto in self.vocabulario():
+            guardado = cache.obtener(cache.clave(texto, voz.TTS_MODELO, voz.TTS_VOZ))
+            if guardado is None:
+                faltan.append(texto)
+                continue
+            pcm, fs = guardado
+            self.clips[texto] = _recortar(pcm, fs)
+        if faltan:
+            print(f"⚠️ Anunciador incompleto, faltan clips: {faltan}")
+        else:
+            self.listo.set()
+            print(f"🪙 Anunciador de montos listo ({len(self.clips)} clips)")
+        return not faltan
+
+    def preparar_en_segundo_plano(self, client):
+        hilo = threading.Thread(target=self.preparar, args=(client,), daemon=True)
+        hilo.start()
+        return hilo
+
+    def componer(self, monto):
+        """Devuelve el anuncio como PCM int16, o None si no se puede armar offline."""
+        if not self.listo.is_set():
+            return None
+        try:
+            palabras = monto_a_palabras(monto)
+        except ValueError:
+            # Fuera de rango o monto raro: que lo diga el TTS normal
+            return None
+
+        pausa = np.zeros(self.fs * PAUSA_FRASE_MS // 1000, dtype=np.float32)
+        partes = [
+            self.clips[FRASE_INICIO], pausa,
+            unir_con_crossfade([self.clips[p] for p in palabras], self.fs),
+            pausa, self.clips[FRASE_FIN],
+        ]
+        audio = np.concatenate(partes)
+        return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
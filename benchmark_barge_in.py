@@ -0,0 +1,101 @@
+import sys
+import time
+import asyncio
+import numpy as np
+import httpx
+import voz
+from boton import Boton, BackendSimulado
+from planificador_audio import PlanificadorAudio
+from salida_audio import obtener_salida
+from turnos import GestorTurnos, LIMITE_CORTE_MS
+
+# --- 📊 BENCHMARK: barge-in (pulsación a mitad de turno -> todo cortado) ---
+# Uso:  python benchmark_barge_in.py [cortes]
+# Necesita la tarjeta de sonido (suena un tono bajito). Cada turno simula el
+# peor caso: una respuesta larga sonando y, a la vez, una petición HTTP
+# colgada (un servidor local que nunca contesta, como gpt-4o o Supabase
+# lentos). El botón es simulado, con rebotes. Desde el primer flanco mide:
+# - audio: hasta que la salida sacó la pista (el bloque siguiente ya no la lleva)
+# - http:  hasta que el servidor vio cerrarse la conexión
+# - turno: hasta que correr() volvió (ahí ya se puede grabar)
+# Antes no se podía cortar: el niño escuchaba la respuesta entera.
+
+CORTES = 20
+PIN = 25
+PULSAR_A_LOS_S = 0.4      # Dentro del turno: el audio ya suena y la petición ya salió
+TASA_TONO = 24000
+TONO = (1500 * np.sin(2 * np.pi * 330 * np.arange(10 * TASA_TONO) / TASA_TONO)).astype(np.int16)
+
+
+async def servidor_colgado(cierres):
+    """Acepta, lee el pedido y nunca contesta; anota cuándo el cliente cortó."""
+    async def atender(lector, escritor):
+        while await lector.read(4096):
+            pass
+        cierres.put_nowait(time.monotonic())
+        escritor.close()
+
+    servidor = await asyncio.start_server(atender, "127.0.0.1", 0)
+    puerto = servidor.sockets[0].getsockname()[1]
+    return servidor, f"http://127.0.0.1:{puerto}/functions/v1/account-resume"
+
+
+async def turno_colgado(cliente, url, planificador, fines_audio):
+    def sonar(control):
+        voz.reproducir_pcm(TONO, TASA_TONO, control)
+        fines_audio.append(time.monotonic())  # La salida ya sacó la pista
+
+    reproduccion = planificador.encolar_async(sonar, etiqueta="respuesta")
+    await asyncio.gather(reproduccion, cliente.post(url, timeout=30))
+
+
+def fila(nombre, ms):
+    ms = np.array(ms)
+    return f"{nombre:<10}{np.median(ms):>9.1f}ms{np.percentile(ms, 95):>9.1f}ms{ms.max():>9.1f}ms"
+
+
+async def main():
+    cortes = int(sys.argv[1]) if len(sys.argv) > 1 else CORTES
+    salida = obtener_salida()
+    planificador = PlanificadorAudio().iniciar()
+    turnos = GestorTurnos(al_cortar=planificador.cortar_conversacion)
+    cierres = asyncio.Queue()
+    servidor, url = await servidor_colgado(cierres)
+    medidas = {"audio": [], "http": [], "turno": []}
+
+    async with httpx.AsyncClient() as cliente:
+        for _ in range(cortes):
+            fines_audio = []
+            backend = BackendSimulado(BackendSimulado.pulsacion(PULSAR_A_LOS_S, 0.1))
+            boton = Boton(PIN, backend)
+            boton.al_cambiar(lambda presionado, t: presionado and turnos.interrumpir(t))
+            backend.iniciar()
+            cortado = await turnos.correr(turno_colgado(cliente, url, planificador, fines_audio))
+            t_turno = time.monotonic()
+            t_http = await asyncio.wait_for(cierres.get(), 2.0)
+            while not fines_audio:
+                await asyncio.sleep(0.005)
+            backend.esperar()
+            boton.cerrar()
+            if not cortado:
+                print("⚠️ El turno terminó sin cortarse; se descarta la medida.")
+                continue
+            t_pulsacion = backend.t_flancos[0]
+            medidas["audio"].append((fines_audio[0] - t_pulsacion) * 1000)
+            medidas["http"].append((t_http - t_pulsacion) * 1000)
+            medidas["turno"].append((t_turno - t_pulsacion) * 1000)
+            await asyncio.sleep(0.1)
+
+    servidor.close()
+    latencia = salida.latencia
+    salida.cerrar()
+    print(f"\n{len(medidas['turno'])} cortes, pulsación -> ... (límite {LIMITE_CORTE_MS:.0f} ms)")
+    print(f"{'hasta':<10}{'mediana':>11}{'p95':>11}{'máx':>11}")
+    for nombre, ms in medidas.items():
+        print(fila(nombre, ms))
+    print(f"(al audio súmale la latencia de la salida: {latencia * 1000:.1f} ms)")
+    print(turnos.resumen())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
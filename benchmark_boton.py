@@ -0,0 +1,72 @@
+import sys
+import asyncio
+import numpy as np
+from boton import Boton, BackendSimulado, BAJO
+
+# --- 📊 BENCHMARK: botón por sondeo (antes) vs por interrupción ---
+# Uso:  python benchmark_boton.py [pulsaciones]
+# Corre en cualquier Linux: el botón es simulado, con rebotes. Mide desde el
+# primer flanco de cada pulsación hasta que la grabación arrancaría (el
+# hilo del executor donde corre grabar_audio empieza a ejecutarse).
+
+PULSACIONES = 20
+PIN = 25
+DURACION = 0.2
+
+
+def linea_de_tiempo(pulsaciones, semilla=0):
+    """Pulsaciones de 200 ms en fases al azar respecto al sondeo de 100 ms."""
+    rng = np.random.default_rng(semilla)
+    inicios = 0.3 + np.cumsum(0.45 + rng.uniform(0, 0.1, pulsaciones))
+    linea = []
+    for inicio in inicios:
+        linea += BackendSimulado.pulsacion(float(inicio), DURACION)
+    return linea, inicios
+
+
+async def sondeo(backend):
+    """Lo que hacía esperar_activacion: leer cada 100 ms y confirmar tras 50 ms."""
+    while True:
+        if backend.leer(PIN) == BAJO:
+            await asyncio.sleep(0.05)
+            if backend.leer(PIN) == BAJO:
+                return
+        await asyncio.sleep(0.1)
+
+
+async def medir(nombre, esperar, backend, inicios):
+    loop = asyncio.get_running_loop()
+    latencias = []
+    backend.iniciar()
+    for inicio in inicios:
+        await esperar()
+        t_grabando = await loop.run_in_executor(None, loop.time)  # Llega al hilo de grabar_audio
+        latencias.append(t_grabando - (backend.t_inicio + inicio))
+        # Que termine la pulsación (y sus rebotes) antes de la siguiente vuelta
+        await asyncio.sleep(max(0.0, backend.t_inicio + inicio + DURACION + 0.05 - loop.time()))
+    backend.cerrar()
+    ms = np.array(latencias) * 1000
+    return nombre, float(np.median(ms)), float(np.percentile(ms, 95)), float(ms.max())
+
+
+async def main():
+    pulsaciones = int(sys.argv[1]) if len(sys.argv) > 1 else PULSACIONES
+    resultados = []
+
+    linea, inicios = linea_de_tiempo(pulsaciones)
+    backend = BackendSimulado(linea)
+    resultados.append(await medir("sondeo 100 ms + 50 ms (antes)", lambda: sondeo(backend), backend, inicios))
+
+    linea, inicios = linea_de_tiempo(pulsaciones)
+    backend = BackendSimulado(linea)
+    boton = Boton(PIN, backend)
+    resultados.append(await medir("interrupción + rebote por software", boton.esperar_presion, backend, inicios))
+
+    print(f"\n{pulsaciones} pulsaciones con rebote, botón -> inicio de grabación")
+    print(f"{'método':<38}{'mediana':>10}{'p95':>10}{'máx':>10}")
+    for nombre, mediana, p95, maximo in resultados:
+        print(f"{nombre:<38}{mediana:>8.1f}ms{p95:>8.1f}ms{maximo:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
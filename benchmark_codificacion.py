@@ -0,0 +1,74 @@
+import sys
+import io
+import time
+import numpy as np
+import soundfile as sf
+import codificacion
+
+# --- 📊 BENCHMARK: WAV 44.1 kHz (actual) vs 16 kHz comprimido ---
+# Uso:  python benchmark_codificacion.py [grabacion.wav] [repeticiones]
+# Correrlo en la Pi: el tiempo que importa es el de CPU de la placa.
+
+TASA_ORIGEN = 44100
+REPETICIONES = 5
+
+
+def audio_de_prueba(segundos=5.0, tasa=TASA_ORIGEN):
+    """Señal tipo voz (armónicos modulados + ruido) si no nos pasan una grabación."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(segundos * tasa)) / tasa
+    f0 = 180 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    fase = 2 * np.pi * np.cumsum(f0) / tasa
+    voz = sum(np.sin(k * fase) / k for k in range(1, 12))
+    envolvente = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+    senal = 0.3 * voz * envolvente + 0.01 * rng.standard_normal(t.size)
+    return (senal / np.abs(senal).max() * 12000).astype(np.int16), tasa
+
+
+def ruta_actual(audio, tasa):
+    """Lo que hacía grabar_audio: WAV sin comprimir a la tasa de captura."""
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, tasa, format='WAV')
+    return buffer
+
+
+def medir(nombre, funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.process_time()
+        buffer = funcion()
+        tiempos.append(time.process_time() - t0)
+    return nombre, len(buffer.getvalue()), float(np.median(tiempos))
+
+
+def main():
+    if len(sys.argv) > 1:
+        audio, tasa = sf.read(sys.argv[1], dtype='int16')
+    else:
+        audio, tasa = audio_de_prueba()
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else REPETICIONES
+    segundos = len(audio) / tasa
+
+    resultados = [medir(f"wav {tasa // 1000} kHz (actual)", lambda: ruta_actual(audio, tasa), repeticiones)]
+    resultados.append(medir(
+        f"solo remuestreo {codificacion.TASA_SUBIDA // 1000} kHz",
+        lambda: io.BytesIO(codificacion.remuestrear(audio, tasa).tobytes()), repeticiones
+    ))
+    for formato in codificacion.FORMATOS:
+        try:
+            resultados.append(medir(
+                f"{formato} {codificacion.TASA_SUBIDA // 1000} kHz",
+                lambda: codificacion.preparar_subida(audio, tasa, formato), repeticiones
+            ))
+        except Exception as e:
+            print(f"⚠️ {formato} no disponible en este libsndfile: {e}")
+
+    base = resultados[0][1]
+    print(f"\n🎙️  Audio: {segundos:.1f} s @ {tasa} Hz | mediana de {repeticiones} corridas")
+    print(f"{'ruta':<28}{'bytes':>10}{'KB/s':>8}{'vs actual':>11}{'CPU ms':>9}")
+    for nombre, tamano, cpu in resultados:
+        print(f"{nombre:<28}{tamano:>10}{tamano / 1024 / segundos:>8.1f}{tamano / base:>10.0%}{cpu * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import sys
+import numpy as np
+from gestos import MotorGestos, Gesto, Traza, cargar_traza, reproducir
+
+# --- 📊 BENCHMARK: doble sacudón, máquina de estados (antes) vs motor de gestos ---
+# Uso:  python benchmark_gestos.py [traza.npz ...]
+# Sin argumentos arma una traza sintética con marcas (dónde SÍ hubo gesto) y
+# distractores: sacudones sueltos, sacudones cortos, caminar con la alcancía.
+# Las trazas reales se graban con GRABAR_TRAZA=ruta.npz en mpu_test.
+
+TASA_HZ = 200
+DECIMADO_ANTES = 10       # mpu_test leía una muestra cada 50 ms: 1 de cada 10 a 200 Hz
+TOLERANCIA_S = 0.5        # Una detección cuenta si llega hasta 0.5 s después de la marca
+UMBRAL_ALTO, UMBRAL_BAJO, TIEMPO_MAXIMO = 250.0, 30.0, 3.0
+BARRIDO_UMBRAL_ALTO = (150.0, 200.0, 250.0, 300.0)
+
+
+def traza_sintetica(segundos=300, tasa=TASA_HZ, semilla=0):
+    rng = np.random.default_rng(semilla)
+    t = np.arange(int(segundos * tasa)) / tasa
+    giro = rng.normal(0, 4, (len(t), 3))          # Ruido del sensor en reposo
+    eje = rng.normal(size=3)
+    eje /= np.linalg.norm(eje)
+    marcas = []
+
+    def sacudon(inicio, duracion, amplitud=330):
+        tramo = (t >= inicio) & (t < inicio + duracion)
+        fase = 2 * np.pi * 5 * (t[tramo] - inicio)
+        giro[tramo] += np.outer(amplitud * np.sin(fase), rng.permutation(eje))
+
+    momento = 3.0
+    while momento < segundos - 6:
+        tipo = rng.choice(["doble", "doble_corto", "suelto", "caminar"], p=[0.45, 0.2, 0.2, 0.15])
+        if tipo == "doble":
+            pausa = rng.uniform(0.4, 1.2)
+            sacudon(momento, 0.4)
+            sacudon(momento + 0.4 + pausa, 0.4)
+            marcas.append(momento + 0.4 + pausa)
+        elif tipo == "doble_corto":
+            # Sacudones rápidos (~0.1 s): entre dos lecturas de 50 ms se pierden fácil
+            pausa = rng.uniform(0.3, 0.8)
+            sacudon(momento, 0.12, 380)
+            sacudon(momento + 0.12 + pausa, 0.12, 380)
+            marcas.append(momento + 0.12 + pausa)
+        elif tipo == "suelto":
+            sacudon(momento, rng.uniform(0.3, 0.8))
+        else:
+            tramo = (t >= momento) & (t < momento + 4)
+            giro[tramo] += np.outer(60 * np.sin(2 * np.pi * 1.8 * t[tramo]), eje)
+        momento += rng.uniform(5, 9)
+
+    giro = np.clip(giro, -250, 250)  # Rango ±250 °/s del sensor
+    return Traza(t, giro.astype(np.float32), tasa, marcas)
+
+
+def maquina_actual(traza):
+    """La máquina de 3 estados de mpu_test, sobre una muestra cada 50 ms."""
+    tiempos = traza.tiempos[::DECIMADO_ANTES]
+    giro = traza.muestras[::DECIMADO_ANTES, -3:]
+    magnitudes = np.sqrt((giro.astype(np.float64) ** 2).sum(axis=1))
+    detecciones = []
+    estado, inicio, pausa_hasta = 0, 0.0, -1.0
+    for t, giro_total in zip(tiempos, magnitudes):
+        if t < pausa_hasta:
+            continue
+        if estado > 0 and t - inicio > TIEMPO_MAXIMO:
+            estado = 0
+        if estado == 0 and giro_total > UMBRAL_ALTO:
+            estado, inicio = 1, t
+        elif estado == 1 and giro_total < UMBRAL_BAJO:
+            estado = 2
+        elif estado == 2 and giro_total > UMBRAL_ALTO:
+            detecciones.append(t)
+            estado, pausa_hasta = 0, t + 2.0  # El sleep(2) de "enfriando sensor"
+    return np.array(detecciones)
+
+
+def motor_nuevo(traza, umbral_alto=UMBRAL_ALTO):
+    motor = MotorGestos(traza.tasa_hz)
+    motor.registrar(Gesto("doble_sacudon", 2, umbral_alto, UMBRAL_BAJO, TIEMPO_MAXIMO))
+    return np.array([d.t_aviso for d in reproducir(traza, motor)])
+
+
+def evaluar(detecciones, marcas):
+    """(aciertos, falsos positivos, latencias) emparejando cada marca con la primera detección a tiempo."""
+    usadas = np.zeros(len(detecciones), dtype=bool)
+    latencias = []
+    for marca in marcas:
+        candidatas = np.flatnonzero(~usadas & (detecciones >= marca - 0.05) & (detecciones <= marca + TOLERANCIA_S))
+        if len(candidatas):
+            usadas[candidatas[0]] = True
+            latencias.append(detecciones[candidatas[0]] - marca)
+    return len(latencias), int((~usadas).sum()), np.array(latencias)
+
+
+def fila(nombre, detecciones, traza):
+    if not len(traza.marcas):
+        return f"{nombre:<34}{len(detecciones):>8} detecciones (traza sin marcas)"
+    aciertos, falsos, latencias = evaluar(detecciones, traza.marcas)
+    if len(latencias):
+        ms = f"{np.median(latencias) * 1000:>9.0f}ms{np.percentile(latencias, 95) * 1000:>9.0f}ms"
+    else:
+        ms = f"{'—':>11}{'—':>11}"  # Ningún acierto: no hay latencia que medir
+    horas = (traza.tiempos[-1] - traza.tiempos[0]) / 3600
+    return f"{nombre:<34}{aciertos:>4}/{len(traza.marcas):<4}{falsos / horas:>9.1f}/h{ms}"
+
+
+def main():
+    trazas = [(ruta, cargar_traza(ruta)) for ruta in sys.argv[1:]] or [("sintética", traza_sintetica())]
+    for nombre, traza in trazas:
+        print(f"\n🎞️  {nombre}: {len(traza.tiempos)} muestras, {len(traza.marcas)} gestos marcados")
+        print(f"{'detector':<34}{'aciertos':>9}{'falsos':>11}{'mediana':>11}{'p95':>11}")
+        print(fila("máquina de estados 20 Hz (antes)", maquina_actual(traza), traza))
+        for umbral in BARRIDO_UMBRAL_ALTO:
+            print(fila(f"motor {traza.tasa_hz:.0f} Hz, umbral_alto {umbral:.0f}", motor_nuevo(traza, umbral), traza))
+    print("\n(latencia: desde que empieza el segundo sacudón hasta que se avisa; falsos por hora de traza)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import sys
+import time
+import math
+from sensor_mpu import SensorMPU, BusSimulado, magnitud_giro, ADDR, GYRO_SCALE
+
+# --- 📊 BENCHMARK: MPU6050 byte a byte (actual) vs ráfaga vs FIFO ---
+# Uso:  python benchmark_mpu.py            (bus simulado, I2C a 100 kHz modelado)
+#       python benchmark_mpu.py --real     (en la Pi, con el sensor conectado)
+# Con el bus simulado, el tiempo de cada transacción sale del modelo de
+# BusSimulado y se suma al de CPU medido; en la Pi, todo es tiempo real.
+
+MUESTRAS = 2000
+SEGUNDOS_FIFO = 1.0
+SLEEP_ACTUAL = 0.05  # Lo que dormía mpu_test entre muestras
+
+
+def senal_agitada(t):
+    """Giros de ±300 °/s a 3 Hz, como un sacudón."""
+    g = int(300 * GYRO_SCALE * math.sin(2 * math.pi * 3 * t)) // 2
+    return (0, 0, 16384, g, -g, g // 2)
+
+
+def read_raw_data(bus, addr):
+    """El driver de mpu_test: dos transacciones de un byte por eje."""
+    high = bus.read_byte_data(ADDR, addr)
+    low = bus.read_byte_data(ADDR, addr+1)
+    val = (high << 8) | low
+    if val > 32768:
+        val = val - 65536
+    return val
+
+
+def ruta_actual(bus):
+    gx = read_raw_data(bus, 0x43) / GYRO_SCALE
+    gy = read_raw_data(bus, 0x45) / GYRO_SCALE
+    gz = read_raw_data(bus, 0x47) / GYRO_SCALE
+    return math.sqrt(gx**2 + gy**2 + gz**2)
+
+
+def medir_por_muestra(nombre, bus, funcion, muestras):
+    transacciones0, bus0 = getattr(bus, "transacciones", 0), getattr(bus, "tiempo_bus", 0.0)
+    t0 = time.perf_counter()
+    for _ in range(muestras):
+        funcion()
+    total = time.perf_counter() - t0 + getattr(bus, "tiempo_bus", 0.0) - bus0
+    transacciones = (getattr(bus, "transacciones", 0) - transacciones0) / muestras
+    return nombre, transacciones, total / muestras
+
+
+def medir_fifo(nombre, bus, sensor, segundos):
+    sensor.iniciar()
+    transacciones0, bus0 = getattr(bus, "transacciones", 0), getattr(bus, "tiempo_bus", 0.0)
+    muestras, ocupado = 0, 0.0
+    t_fin = time.monotonic() + segundos
+    while time.monotonic() < t_fin:
+        time.sleep(SLEEP_ACTUAL)
+        t0 = time.perf_counter()
+        _, lote = sensor.vaciar_fifo()
+        magnitud_giro(lote)
+        ocupado += time.perf_counter() - t0
+        muestras += len(lote)
+    ocupado += getattr(bus, "tiempo_bus", 0.0) - bus0
+    transacciones = (getattr(bus, "transacciones", 0) - transacciones0) / max(muestras, 1)
+    return nombre, transacciones, ocupado / max(muestras, 1), muestras / segundos
+
+
+def main():
+    if "--real" in sys.argv:
+        import smbus2
+        bus = smbus2.SMBus(1)
+    else:
+        bus = BusSimulado(senal_agitada)
+
+    sensor = SensorMPU(bus).iniciar(fifo=False)
+    filas = []
+    for nombre, funcion in (
+        ("byte a byte (actual)", lambda: ruta_actual(bus)),
+        ("ráfaga giro 6 bytes", sensor.leer_giro),
+        ("ráfaga acel+giro 14 bytes", sensor.leer),
+    ):
+        nombre, transacciones, por_muestra = medir_por_muestra(nombre, bus, funcion, MUESTRAS)
+        filas.append((nombre, transacciones, por_muestra, 1 / por_muestra))
+    # Lo que de verdad muestreaba mpu_test: una lectura y 50 ms de sueño
+    filas.append(("actual con sleep(50 ms)", filas[0][1], filas[0][2], 1 / (filas[0][2] + SLEEP_ACTUAL)))
+
+    for tasa in (200, 1000):
+        sensor = SensorMPU(bus, tasa_hz=tasa)
+        filas.append(medir_fifo(f"FIFO {tasa} Hz, vaciado c/50 ms", bus, sensor, SEGUNDOS_FIFO))
+
+    print(f"\n{'método':<32}{'trans/muestra':>15}{'µs/muestra':>12}{'muestras/s':>12}")
+    for nombre, transacciones, por_muestra, tasa in filas:
+        print(f"{nombre:<32}{transacciones:>15.2f}{por_muestra * 1e6:>12.0f}{tasa:>12.0f}")
+    print("\n(FIFO: muestras/s es la tasa lograda; µs/muestra es el costo de vaciarla)")
+
+
+if __name__ == "__main__":
+    main()
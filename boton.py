@@ -0,0 +1,210 @@
+import time
+import asyncio
+import threading
+
+# --- 🔘 BOTÓN POR INTERRUPCIONES (GPIO o simulado) ---
+# En vez de leer el pin en un bucle, el backend avisa cada flanco
+# (GPIO.add_event_detect) y aquí se filtran los rebotes por software:
+# el primer flanco cuenta al instante y durante REBOTE_MS se ignora el
+# resto; al terminar esa ventana se relee el pin por si quedó distinto.
+# El estado queda en Events (hilos) y en esperas async (loop).
+#
+# El botón es activo en LOW: presionado = pin en 0.
+
+REBOTE_MS = 30
+BAJO, ALTO = 0, 1
+
+
+class BackendGPIO:
+    """RPi.GPIO: un callback por flanco, desde el hilo de eventos de la librería."""
+
+    def __init__(self, gpio):
+        self._gpio = gpio
+        self._pines = []
+
+    def configurar(self, pin, al_cambiar):
+        self._gpio.setmode(self._gpio.BCM)
+        self._gpio.setup(pin, self._gpio.IN)
+        # Sin bouncetime de la librería: con BOTH se comería el flanco de soltar
+        self._gpio.add_event_detect(
+            pin, self._gpio.BOTH, callback=lambda canal: al_cambiar(self._gpio.input(canal))
+        )
+        self._pines.append(pin)
+
+    def leer(self, pin):
+        return self._gpio.input(pin)
+
+    def cerrar(self):
+        for pin in self._pines:
+            self._gpio.remove_event_detect(pin)
+        self._gpio.cleanup()
+
+
+class BackendSimulado:
+    """
+    Reproduce una línea de tiempo [(segundos, nivel), ...] desde que se llama
+    a iniciar(), como si fueran flancos reales (en un hilo aparte).
+    `t_flancos` guarda el time.monotonic() de cada flanco para medir latencias.
+    """
+
+    def __init__(self, linea_de_tiempo, nivel_inicial=ALTO):
+        self.linea_de_tiempo = sorted(linea_de_tiempo)
+        self.nivel = nivel_inicial
+        self.t_flancos = []
+        self.t_inicio = None
+        self._al_cambiar = None
+        self._parar = threading.Event()
+        self._hilo = None
+
+    @staticmethod
+    def pulsacion(inicio, duracion, rebotes=3, separacion=0.002):
+        """Una presión con rebotes al bajar y al subir, como un botón de verdad."""
+        eventos = []
+        for t0, nivel in ((inicio, BAJO), (inicio + duracion, ALTO)):
+            for i in range(rebotes):
+                eventos.append((t0 + 2 * i * separacion, nivel))
+                eventos.append((t0 + (2 * i + 1) * separacion, 1 - nivel))
+            eventos.append((t0 + 2 * rebotes * separacion, nivel))
+        return eventos
+
+    def configurar(self, pin, al_cambiar):
+        self._al_cambiar = al_cambiar
+
+    def leer(self, pin):
+        return self.nivel
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._reproducir, name="boton-simulado", daemon=True)
+        self._hilo.start()
+        return self
+
+    def esperar(self):
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _reproducir(self):
+        self.t_inicio = t_inicio = time.monotonic()
+        for t, nivel in self.linea_de_tiempo:
+            restante = t_inicio + t - time.monotonic()
+            if restante > 0 and self._parar.wait(restante):
+                return
+            self.nivel = nivel
+            self.t_flancos.append(time.monotonic())
+            if self._al_cambiar is not None:
+                self._al_cambiar(nivel)
+
+    def cerrar(self):
+        self._parar.set()
+
+
+class Boton:
+    """
+    - `presionado` / `soltado`: threading.Event con el estado ya sin rebotes.
+    - `await esperar_presion()` / `await esperar_soltar()`: lo mismo desde el loop.
+    - `al_cambiar(funcion)`: funcion(presionado, t) en cada cambio (desde el hilo del backend).
+    `t_ultimo_cambio` es el time.monotonic() del flanco que se aceptó.
+    """
+
+    def __init__(self, pin, backend, rebote_ms=REBOTE_MS):
+        self.pin = pin
+        self.rebote_s = rebote_ms / 1000
+        self.presionado = threading.Event()
+        self.soltado = threading.Event()
+        self.t_ultimo_cambio = float("-inf")
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._oyentes = []
+        self._esperas = []  # (loop, futuro, presionado_buscado)
+
+        if self._backend.leer(pin) == BAJO:
+            self.presionado.set()
+        else:
+            self.soltado.set()
+        self._backend.configurar(pin, self._flanco)
+
+    def esta_presionado(self):
+        return self.presionado.is_set()
+
+    def al_cambiar(self, funcion):
+        with self._lock:
+            self._oyentes.append(funcion)
+        return funcion
+
+    def quitar(self, funcion):
+        with self._lock:
+            if funcion in self._oyentes:
+                self._oyentes.remove(funcion)
+
+    # --- Esperas desde el loop ---
+
+    def _esperar(self, presionado):
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        with self._lock:
+            if self.presionado.is_set() == presionado:
+                futuro.set_result(self.t_ultimo_cambio)
+            else:
+                self._esperas.append((loop, futuro, presionado))
+        return futuro
+
+    def esperar_presion(self):
+        """Se resuelve (con el t del flanco) al presionar; al toque si ya está presionado."""
+        return self._esperar(True)
+
+    def esperar_soltar(self):
+        return self._esperar(False)
+
+    # --- Flancos (hilo del backend) ---
+
+    def _flanco(self, nivel):
+        t = time.monotonic()
+        with self._lock:
+            if t - self.t_ultimo_cambio < self.rebote_s:
+                return  # Rebote: al cerrar la ventana se relee el pin
+        self._fijar(nivel == BAJO, t)
+
+    def _reconciliar(self):
+        self._fijar(self._backend.leer(self.pin) == BAJO, time.monotonic())
+
+    def _fijar(self, presionado, t):
+        with self._lock:
+            if presionado == self.presionado.is_set():
+                return
+            self.t_ultimo_cambio = t
+            if presionado:
+                self.soltado.clear()
+                self.presionado.set()
+            else:
+                self.presionado.clear()
+                self.soltado.set()
+            oyentes = list(self._oyentes)
+            listas = [e for e in self._esperas if e[2] == presionado]
+            self._esperas = [e for e in self._esperas if e[2] != presionado]
+        for loop, futuro, _ in listas:
+            loop.call_soon_threadsafe(_resolver, futuro, t)
+        for oyente in oyentes:
+            try:
+                oyente(presionado, t)
+            except Exception as e:
+                print(f"❌ Error en oyente del botón: {e}")
+        # Si el pin terminó en otro nivel durante los rebotes, lo corregimos
+        temporizador = threading.Timer(self.rebote_s, self._reconciliar)
+        temporizador.daemon = True
+        temporizador.start()
+
+    def cerrar(self):
+        self._backend.cerrar()
+
+
+def _resolver(futuro, t):
+    if not futuro.done():
+        futuro.set_result(t)
+
+
+def crear_boton(pin, rebote_ms=REBOTE_MS):
+    """Botón sobre RPi.GPIO, o None si no estamos en una Pi."""
+    try:
+        import RPi.GPIO as GPIO
+    except ImportError:
+        return None
+    return Boton(pin, BackendGPIO(GPIO), rebote_ms)
@@ -0,0 +1,82 @@
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- 🎙️ BUFFER DE CAPTURA PREASIGNADO ---
+# Un solo array reservado al arrancar y reutilizado en cada turno: nada de
+# lista de chunks + np.concatenate (que duplica la RAM justo al final).
+# El stream se abre con `callback=buffer.callback`: PortAudio entrega cada
+# bloque y se copia directo en su lugar, sin el array nuevo de stream.read().
+
+MAX_SEGUNDOS_GRABACION = float(os.getenv("MAX_SEGUNDOS_GRABACION", 30))
+FRAMES_POR_LECTURA = 1024
+ESPERA_MAX_S = 1.0  # Sin audio nuevo en este tiempo, el micrófono se cayó
+
+
+class BufferCaptura:
+    """
+    Audio del micrófono en un array de tamaño fijo (`max_segundos`).
+    - `callback` (para sd.InputStream) llena el siguiente tramo en su lugar.
+    - `esperar(desde)` bloquea hasta que llegue un bloque nuevo.
+    - `vista()` devuelve lo grabado sin copiar (para VAD / codificadores).
+    - Al llegar al máximo deja de aceptar audio (botón trabado = RAM acotada).
+    """
+
+    def __init__(self, tasa, canales=1, dtype='int16', max_segundos=MAX_SEGUNDOS_GRABACION):
+        self.tasa = tasa
+        self.max_frames = int(tasa * max_segundos)
+        self._datos = np.zeros((self.max_frames, canales), dtype=dtype)
+        self.frames = 0
+        self.desbordes = 0
+        self._hay_audio = threading.Condition()
+
+    def reiniciar(self):
+        """Deja el buffer vacío para un nuevo turno (no libera ni reserva memoria)."""
+        with self._hay_audio:
+            self.frames = 0
+            self.desbordes = 0
+
+    @property
+    def lleno(self):
+        return self.frames >= self.max_frames
+
+    @property
+    def segundos(self):
+        return self.frames / self.tasa
+
+    def espacio(self, frames):
+        """Vista escribible de los próximos `frames` (o menos si queda poco lugar)."""
+        return self._datos[self.frames:min(self.frames + frames, self.max_frames)]
+
+    def escribir(self, bloque):
+        """Copia un bloque ya leído. Devuelve False si el buffer se llenó."""
+        destino = self.espacio(len(bloque))
+        destino[:] = bloque[:len(destino)]
+        self.frames += len(destino)
+        return not self.lleno
+
+    def callback(self, indata, frames, tiempo, status):
+        """Callback de sd.InputStream (hilo de PortAudio): copia el bloque y avisa."""
+        with self._hay_audio:
+            self.desbordes += bool(status.input_overflow)
+            self.escribir(indata)
+            self._hay_audio.notify_all()
+
+    def esperar(self, desde, frames=FRAMES_POR_LECTURA, timeout=ESPERA_MAX_S):
+        """
+        Bloquea hasta tener `frames` nuevos después de `desde` (o el buffer lleno).
+        Devuelve hasta dónde hay audio: lo nuevo es `vista()[desde:hasta]`.
+        """
+        with self._hay_audio:
+            listo = self._hay_audio.wait_for(
+                lambda: self.frames >= min(desde + frames, self.max_frames), timeout
+            )
+            if not listo and self.frames == desde:
+                raise TimeoutError("El micrófono dejó de entregar audio")
+            return self.frames
+
+    def vista(self):
+        return self._datos[:self.frames]
@@ -1,20 +1,44 @@
-import RPi.GPIO as GPIO
+import sys
 import time
+from boton import Boton, BackendSimulado, crear_boton
 
-GPIO.setmode(GPIO.BCM) 
-GPIO.setup(25, GPIO.IN) 
+# Uso:  python button_test.py            (botón real en GPIO 25)
+#       python button_test.py --simulado (tres pulsaciones con rebote, sin Pi)
+PIN = 25
 
-print("Leyendo GPIO 25... (Ctrl+C para salir)")
+if "--simulado" in sys.argv:
+    linea = []
+    for inicio in (0.5, 2.0, 3.5):
+        linea += BackendSimulado.pulsacion(inicio, 0.8)
+    backend = BackendSimulado(linea)
+    boton = Boton(PIN, backend)
+    backend.iniciar()
+else:
+    backend = None
+    boton = crear_boton(PIN)
+    if boton is None:
+        sys.exit("⚠️ RPi.GPIO no encontrado (prueba con --simulado)")
+
+t_inicio = time.monotonic()
+
+def mostrar(presionado, t):
+    if presionado:
+        print(f"⚫ GPIO {PIN} en LOW (0) - presionado  [{t - t_inicio:6.3f} s]")
+    else:
+        print(f"⚡ GPIO {PIN} en HIGH (1) - suelto     [{t - t_inicio:6.3f} s]")
+
+boton.al_cambiar(mostrar)
+print(f"Escuchando flancos en GPIO {PIN}... (Ctrl+C para salir)")
 
 try:
-    while True:
-        estado = GPIO.input(25)
-        if estado == GPIO.HIGH:
-            print("⚡ GPIO 25 en HIGH (1)")
-        else:
-            print("⚫ GPIO 25 en LOW (0)")
-        
-        time.sleep(0.5) # Lee cada medio segundo
+    if backend is not None:
+        backend.esperar()
+        time.sleep(0.1)  # Última ventana de rebote
+    else:
+        while True:
+            time.sleep(1)  # Nada que leer: los flancos llegan solos
 
 except KeyboardInterrupt:
-    GPIO.cleanup()
\ No newline at end of file
+    pass
+finally:
+    boton.cerrar()
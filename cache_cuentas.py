@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- 🗂️ CACHE DEL RESUMEN DE CUENTAS (account-resume) ---
+# Dos vencimientos distintos:
+# - La LISTA de cuentas (ids, nombres de metas) solo cambia al crear una meta.
+# - Los SALDOS cambian con cada movimiento: el realtime de `movimientos` los
+#   invalida al instante y el TTL corto cubre el caso de realtime caído.
+
+TTL_SALDOS = float(os.getenv("TTL_SALDOS_S", 30))
+TTL_LISTA = float(os.getenv("TTL_LISTA_CUENTAS_S", 600))
+
+
+class CacheCuentas:
+    """
+    Guarda el último payload de `account-resume`.
+    `consultar()` es la función que va a la red (devuelve dict o {"error": ...});
+    `consultar_async()` su versión corrutina, para obtener_async/refrescar_async.
+
+    No parchamos saldos sumando el monto del evento: el snapshot pudo haberse
+    pedido cuando el movimiento ya estaba en la base y lo contaríamos dos veces.
+    Invalidar es siempre correcto y los movimientos son mucho más raros que las consultas.
+    """
+
+    def __init__(self, consultar=None, ttl_saldos=TTL_SALDOS, ttl_lista=TTL_LISTA, cuentas_extra=(),
+                 consultar_async=None):
+        self.consultar = consultar
+        self.consultar_async = consultar_async
+        self.ttl_saldos = ttl_saldos
+        self.ttl_lista = ttl_lista
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._t_snapshot = 0.0
+        self._saldos_validos = False
+        # Sube con cada invalidación: si se movió mientras una consulta estaba en
+        # vuelo, lo que vuelva es de antes del movimiento y sus saldos no valen
+        self._generacion = 0
+        self._ids = set(str(c) for c in cuentas_extra)
+        self._cuentas_extra = set(self._ids)
+        self.version_lista = 0  # Sube cada vez que cambia la lista de cuentas
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, requiere_saldos=True):
+        """
+        Devuelve el payload cacheado si sirve para lo que se pide.
+        `requiere_saldos=False`: basta con la lista (ej: buscar el id de una meta).
+        """
+        with self._lock:
+            if self._sirve(requiere_saldos):
+                self.aciertos += 1
+                return self._snapshot
+            self.fallos += 1
+        return self.refrescar(requiere_saldos)
+
+    async def obtener_async(self, requiere_saldos=True):
+        with self._lock:
+            if self._sirve(requiere_saldos):
+                self.aciertos += 1
+                return self._snapshot
+            self.fallos += 1
+        return await self.refrescar_async(requiere_saldos)
+
+    def _sirve(self, requiere_saldos):
+        if self._snapshot is None:
+            return False
+        edad = time.monotonic() - self._t_snapshot
+        if requiere_saldos:
+            return self._saldos_validos and edad < self.ttl_saldos
+        return edad < self.ttl_lista
+
+    def refrescar(self, requiere_saldos=True):
+        t0, generacion = time.monotonic(), self._generacion
+        return self._guardar(self.consultar(), t0, generacion, requiere_saldos)
+
+    async def refrescar_async(self, requiere_saldos=True):
+        t0, generacion = time.monotonic(), self._generacion
+        return self._guardar(await self.consultar_async(), t0, generacion, requiere_saldos)
+
+    def _guardar(self, datos, t0, generacion, requiere_saldos=True):
+        if not isinstance(datos, dict) or "error" in datos:
+            # Los errores no se cachean. Para buscar una meta sirve la lista vieja;
+            # un saldo viejo no se dice como si fuera el actual: va el error
+            with self._lock:
+                if not requiere_saldos and self._snapshot is not None:
+                    return self._snapshot
+            return datos
+        with self._lock:
+            firma_anterior = self._firma(self._snapshot)
+            self._snapshot = datos
+            # Contamos la edad desde que SALIÓ la petición (lo conservador)
+            self._t_snapshot = t0
+            self._saldos_validos = generacion == self._generacion
+            self._ids = self._cuentas_extra | {str(c.get("id")) for c in self.cuentas() if c.get("id")}
+            if self._firma(datos) != firma_anterior:
+                self.version_lista += 1
+        return datos
+
+    @staticmethod
+    def _firma(datos):
+        if not datos:
+            return None
+        return tuple(sorted(
+            (str(c.get("id")), c.get("meta_descripcion") or "") for c in datos.get("mis_cuentas", [])
+        ))
+
+    def cuentas(self):
+        """Lista `mis_cuentas` del snapshot actual (vacía si no hay)."""
+        return (self._snapshot or {}).get("mis_cuentas", [])
+
+    def ids(self):
+        """Ids de todas nuestras cuentas conocidas (las del snapshot + las extra)."""
+        with self._lock:
+            return frozenset(self._ids)
+
+    def invalidar_saldos(self):
+        with self._lock:
+            self._generacion += 1
+            self._saldos_validos = False
+
+    def invalidar(self):
+        """La lista de cuentas cambió (ej: meta nueva): todo se vuelve a pedir."""
+        with self._lock:
+            self._generacion += 1
+            self._snapshot = None
+            self._saldos_validos = False
+
+    def notificar_movimiento(self, registro):
+        """
+        Llamar con el `record` de cada INSERT en `movimientos`.
+        Devuelve True si el movimiento tocaba alguna de nuestras cuentas.
+        """
+        origen = str(registro.get("cuenta_origen_id"))
+        destino = str(registro.get("cuenta_destino_id"))
+        with self._lock:
+            nuestro = origen in self._ids or destino in self._ids
+            # Sin snapshot todavía no sabemos qué ids son nuestros: invalidamos igual
+            if nuestro or self._snapshot is None:
+                self._generacion += 1
+                self._saldos_validos = False
+        return nuestro
@@ -0,0 +1,213 @@
+import os
+import json
+import atexit
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- ⚙️ CONFIGURACIÓN ---
+CACHE_DIR = os.path.expanduser(os.getenv("TTS_CACHE_DIR", "~/.cache/chanchito/tts"))
+CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", 200))  # 0 = cache desactivado
+
+INDICE = "indice.json"
+# indice.json se reescribe al expulsar o cada tantas frases nuevas (y al salir),
+# no en cada guardar: la SD de la Pi se gasta con cada escritura
+GUARDAR_INDICE_CADA = int(os.getenv("TTS_GUARDAR_INDICE_CADA", 20))
+
+
+def _escribir_atomico(ruta, escribir, modo="wb", encoding=None):
+    """
+    `escribir(f)` sobre un temporal único en la misma carpeta y luego rename:
+    un corte de luz no deja archivos a medias y dos hilos no pisan el mismo .tmp.
+    """
+    f = tempfile.NamedTemporaryFile(
+        modo, encoding=encoding, dir=os.path.dirname(ruta), suffix=".tmp", delete=False
+    )
+    try:
+        with f:
+            escribir(f)
+        os.replace(f.name, ruta)
+    except BaseException:
+        try:
+            os.remove(f.name)
+        except OSError:
+            pass
+        raise
+
+
+class CacheTTS:
+    """
+    Cache en disco de frases ya sintetizadas, direccionado por contenido.
+    - Clave: sha256 de (texto, modelo, voz).
+    - Valor: PCM int16 decodificado en un .npy (se reproduce sin red ni decodificar MP3).
+    - Índice LRU (OrderedDict, más viejo primero) con tope de tamaño en bytes.
+    """
+
+    def __init__(self, carpeta=CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024)):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._indice = OrderedDict()  # clave -> {"fs": int, "bytes": int}
+        self._total = 0
+        self._sucio = False
+        self._sin_guardar = 0  # Altas que todavía no están en indice.json
+        self.aciertos = 0
+        self.fallos = 0
+        if self.activo:
+            os.makedirs(self.carpeta, exist_ok=True)
+            self._cargar_indice()
+
+    @property
+    def activo(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def clave(texto, modelo, voz):
+        crudo = json.dumps([texto, modelo, voz], ensure_ascii=False)
+        return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.carpeta, f"{clave}.npy")
+
+    # --- Índice ---
+
+    def _cargar_indice(self):
+        try:
+            with open(os.path.join(self.carpeta, INDICE), encoding="utf-8") as f:
+                entradas = json.load(f)
+        except (OSError, ValueError):
+            entradas = []
+        for clave, meta in entradas:
+            # Si alguien borró el .npy a mano, la entrada se descarta
+            if os.path.exists(self._ruta(clave)):
+                self._indice[clave] = meta
+                self._total += meta["bytes"]
+            else:
+                self._sucio = True
+        # El índice se guarda por tandas: tras un apagón puede haber .npy que no
+        # conoce (sin fs ni lugar en la LRU) y temporales a medias. Se borran, si
+        # no el tope de TTS_CACHE_MAX_MB dejaría de contarlos.
+        for nombre in os.listdir(self.carpeta):
+            clave, extension = os.path.splitext(nombre)
+            if extension == ".tmp" or (extension == ".npy" and clave not in self._indice):
+                try:
+                    os.remove(os.path.join(self.carpeta, nombre))
+                except OSError:
+                    pass
+
+    def guardar_indice(self):
+        with self._lock:
+            if not self._sucio:
+                return
+            entradas = list(self._indice.items())
+            _escribir_atomico(
+                os.path.join(self.carpeta, INDICE), lambda f: json.dump(entradas, f),
+                modo="w", encoding="utf-8",
+            )
+            self._sucio = False
+            self._sin_guardar = 0
+
+    # --- Lectura / escritura ---
+
+    def obtener(self, clave):
+        """Devuelve (pcm_int16, fs) o None. Marca la entrada como usada recién."""
+        if not self.activo:
+            return None
+        with self._lock:
+            meta = self._indice.get(clave)
+            if meta is None:
+                self.fallos += 1
+                return None
+            self._indice.move_to_end(clave)
+            self._sucio = True
+        try:
+            pcm = np.load(self._ruta(clave))
+        except (OSError, ValueError):
+            self._quitar(clave)
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return pcm, meta["fs"]
+
+    def guardar(self, clave, pcm, fs):
+        if not self.activo:
+            return
+        pcm = np.ascontiguousarray(pcm, dtype=np.int16)
+        if pcm.nbytes > self.max_bytes:
+            return
+        _escribir_atomico(self._ruta(clave), lambda f: np.save(f, pcm))
+
+        with self._lock:
+            anterior = self._indice.pop(clave, None)
+            if anterior:
+                self._total -= anterior["bytes"]
+            self._indice[clave] = {"fs": int(fs), "bytes": pcm.nbytes}
+            self._total += pcm.nbytes
+            expulsadas = []
+            while self._total > self.max_bytes and len(self._indice) > 1:
+                vieja, meta = self._indice.popitem(last=False)
+                self._total -= meta["bytes"]
+                expulsadas.append(vieja)
+            self._sucio = True
+            self._sin_guardar += 1
+            # Al expulsar se escribe siempre: ahí es cuando más se aleja del disco
+            escribir_indice = bool(expulsadas) or self._sin_guardar >= GUARDAR_INDICE_CADA
+        for vieja in expulsadas:
+            self._borrar_archivo(vieja)
+        if escribir_indice:
+            self.guardar_indice()
+
+    def _quitar(self, clave):
+        with self._lock:
+            meta = self._indice.pop(clave, None)
+            if meta:
+                self._total -= meta["bytes"]
+                self._sucio = True
+        self._borrar_archivo(clave)
+
+    def _borrar_archivo(self, clave):
+        try:
+            os.remove(self._ruta(clave))
+        except OSError:
+            pass
+
+    def precalentar(self, frases, sintetizar, modelo, voz):
+        """
+        Sintetiza (una sola vez) las frases que todavía no están en disco.
+        `sintetizar(texto)` debe devolver (pcm_int16, fs).
+        """
+        nuevas = 0
+        for texto in frases:
+            clave = self.clave(texto, modelo, voz)
+            with self._lock:
+                if clave in self._indice:
+                    continue
+            try:
+                pcm, fs = sintetizar(texto)
+                self.guardar(clave, pcm, fs)
+                nuevas += 1
+            except Exception as e:
+                print(f"⚠️ No se pudo precalentar '{texto}': {e}")
+        if nuevas:
+            self.guardar_indice()  # Las frases fijas quedan registradas aunque no salgamos limpio
+        print(f"🔥 Cache TTS lista: {nuevas} frases nuevas, {len(self._indice)} en disco")
+        return nuevas
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+def obtener_cache():
+    """Cache compartido del proceso."""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheTTS()
+            if _cache.activo:
+                atexit.register(_cache.guardar_indice)
+        return _cache
@@ -0,0 +1,199 @@
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from tenacity import (
+    Retrying, AsyncRetrying, stop_after_attempt, wait_random_exponential, retry_if_exception,
+)
+
+# --- 🔌 CLIENTE HTTP COMPARTIDO PARA LAS EDGE FUNCTIONS ---
+# Una sola requests.Session por BASE_URL: la conexión TLS queda abierta
+# (keep-alive) y un turno con varias tools reutiliza el mismo socket.
+
+# (conexión, lectura) en segundos, por endpoint
+TIMEOUTS = {
+    "account-resume": (3.05, 8),
+    "transaction": (3.05, 15),
+    "create-savings-account": (3.05, 10),
+    "last-transaction": (3.05, 5),
+}
+TIMEOUT_DEFECTO = (3.05, 10)
+
+# Mueven dinero o crean cosas: solo se reintentan si la petición NUNCA llegó
+# al servidor (no se pudo abrir la conexión). Un timeout de lectura aquí
+# podría significar que la transacción sí se hizo.
+NO_IDEMPOTENTES = {"transaction", "create-savings-account"}
+
+INTENTOS = 3
+ESTADOS_REINTENTABLES = {502, 503, 504}
+
+
+class ErrorReintentable(Exception):
+    """Respuesta 5xx transitoria (gateway / cold start de la edge function)."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def _conexion_no_establecida(e):
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    motivo = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(e, requests.ConnectionError) and isinstance(motivo, NewConnectionError)
+
+
+def _politica_reintento(endpoint):
+    if endpoint in NO_IDEMPOTENTES:
+        return _conexion_no_establecida
+    return lambda e: isinstance(e, (requests.ConnectionError, requests.Timeout, ErrorReintentable))
+
+
+class ClienteAPI:
+    """
+    POSTs a `{base_url}{endpoint}` con pool keep-alive, timeouts por endpoint
+    y reintentos con backoff exponencial + jitter (tenacity).
+    """
+
+    def __init__(self, base_url, headers=None, intentos=INTENTOS, conexiones=4):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.intentos = intentos
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        # max_retries=0: de los reintentos se encarga tenacity (con la política por endpoint)
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=conexiones, max_retries=0)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def post(self, endpoint, params=None, timeout=None):
+        """Devuelve el requests.Response. Relanza el error si se agotan los intentos."""
+        url = f"{self.base_url}{endpoint}"
+        timeout = timeout or TIMEOUTS.get(endpoint, TIMEOUT_DEFECTO)
+
+        def intento():
+            response = self.session.post(url, params=params, timeout=timeout)
+            if response.status_code in ESTADOS_REINTENTABLES and endpoint not in NO_IDEMPOTENTES:
+                raise ErrorReintentable(response)
+            return response
+
+        reintentos = Retrying(
+            stop=stop_after_attempt(self.intentos),
+            wait=wait_random_exponential(multiplier=0.2, max=2),
+            retry=retry_if_exception(_politica_reintento(endpoint)),
+            reraise=True,
+        )
+        try:
+            return reintentos(intento)
+        except ErrorReintentable as e:
+            return e.response
+
+    def post_json(self, endpoint, params=None, timeout=None):
+        """Mismo contrato que usaban las funciones *_api: dict o {"error": ...}."""
+        try:
+            response = self.post(endpoint, params, timeout)
+            if response.status_code == 200:
+                return response.json()
+            return {"error": response.text}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def precalentar(self):
+        """Abre la conexión TLS en segundo plano para que la primera tool no pague el handshake."""
+        def abrir():
+            try:
+                self.session.head(self.base_url, timeout=TIMEOUT_DEFECTO)
+                print(f"🔥 Conexión lista con {self.base_url}")
+            except requests.RequestException as e:
+                print(f"⚠️ No se pudo precalentar {self.base_url}: {e}")
+
+        hilo = threading.Thread(target=abrir, daemon=True)
+        hilo.start()
+        return hilo
+
+
+_clientes = {}
+_lock_clientes = threading.Lock()
+
+def obtener_cliente(base_url, headers=None):
+    """Un cliente (y un pool) por BASE_URL en todo el proceso."""
+    with _lock_clientes:
+        if base_url not in _clientes:
+            _clientes[base_url] = ClienteAPI(base_url, headers)
+        return _clientes[base_url]
+
+
+# --- ⚡ VERSIÓN ASYNC (httpx), para el motor de conversación en asyncio ---
+# Misma política que ClienteAPI: timeouts por endpoint y reintentos solo
+# donde es seguro, pero sin bloquear el loop que también atiende el realtime.
+
+def _politica_reintento_async(endpoint):
+    if endpoint in NO_IDEMPOTENTES:
+        # ConnectError / ConnectTimeout: la petición nunca salió
+        return lambda e: isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+    return lambda e: isinstance(e, (httpx.TransportError, ErrorReintentable))
+
+
+class ClienteAPIAsync:
+    """Igual que ClienteAPI, con un httpx.AsyncClient (pool keep-alive propio)."""
+
+    def __init__(self, base_url, headers=None, intentos=INTENTOS, conexiones=4):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.intentos = intentos
+        self.session = httpx.AsyncClient(
+            headers=headers or {},
+            limits=httpx.Limits(max_connections=conexiones, max_keepalive_connections=conexiones),
+        )
+
+    async def post(self, endpoint, params=None, timeout=None):
+        """Devuelve el httpx.Response. Relanza el error si se agotan los intentos."""
+        url = f"{self.base_url}{endpoint}"
+        conexion, lectura = timeout or TIMEOUTS.get(endpoint, TIMEOUT_DEFECTO)
+        limite = httpx.Timeout(lectura, connect=conexion)
+
+        async def intento():
+            response = await self.session.post(url, params=params, timeout=limite)
+            if response.status_code in ESTADOS_REINTENTABLES and endpoint not in NO_IDEMPOTENTES:
+                raise ErrorReintentable(response)
+            return response
+
+        reintentos = AsyncRetrying(
+            stop=stop_after_attempt(self.intentos),
+            wait=wait_random_exponential(multiplier=0.2, max=2),
+            retry=retry_if_exception(_politica_reintento_async(endpoint)),
+            reraise=True,
+        )
+        try:
+            return await reintentos(intento)
+        except ErrorReintentable as e:
+            return e.response
+
+    async def post_json(self, endpoint, params=None, timeout=None):
+        """dict o {"error": ...}, como ClienteAPI.post_json."""
+        try:
+            response = await self.post(endpoint, params, timeout)
+            if response.status_code == 200:
+                return response.json()
+            return {"error": response.text}
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+
+    async def precalentar(self):
+        try:
+            await self.session.head(self.base_url, timeout=httpx.Timeout(TIMEOUT_DEFECTO[1], connect=TIMEOUT_DEFECTO[0]))
+            print(f"🔥 Conexión lista con {self.base_url}")
+        except httpx.HTTPError as e:
+            print(f"⚠️ No se pudo precalentar {self.base_url}: {e}")
+
+    async def cerrar(self):
+        await self.session.aclose()
+
+
+_clientes_async = {}
+
+def obtener_cliente_async(base_url, headers=None):
+    """Un cliente async por BASE_URL (usar siempre desde el mismo event loop)."""
+    with _lock_clientes:
+        if base_url not in _clientes_async:
+            _clientes_async[base_url] = ClienteAPIAsync(base_url, headers)
+        return _clientes_async[base_url]
@@ -0,0 +1,123 @@
+import os
+import io
+from math import gcd
+import numpy as np
+import soundfile as sf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- 📦 CODIFICACIÓN PARA SUBIR A WHISPER ---
+# Whisper trabaja internamente a 16 kHz: mandar 44.1 kHz en WAV es pagar
+# ~88 KB por segundo de Wi-Fi por nada.
+
+TASA_SUBIDA = int(os.getenv("TASA_SUBIDA", 16000))
+FORMATO_SUBIDA = os.getenv("FORMATO_SUBIDA", "flac")  # wav | flac | ogg | opus
+
+# formato -> (formato soundfile, subtipo, extensión que Whisper reconoce)
+FORMATOS = {
+    "wav": ("WAV", "PCM_16", "wav"),
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "ogg": ("OGG", "VORBIS", "ogg"),
+    "opus": ("OGG", "OPUS", "ogg"),
+}
+
+CEROS_POR_LADO = 10      # Largo del filtro sinc (en cruces por cero a cada lado)
+BLOQUE_SALIDA = 16384    # Muestras de salida por bloque (acota la RAM en la Pi)
+
+_filtros = {}
+
+
+def _filtro_polifase(up, down):
+    """
+    Sinc con ventana de Kaiser, cortando en la menor de las dos Nyquist,
+    reordenado en `up` fases. Se cachea por par (up, down).
+    """
+    clave = (up, down)
+    if clave in _filtros:
+        return _filtros[clave]
+    factor = max(up, down)
+    medio = CEROS_POR_LADO * factor
+    n = np.arange(-medio, medio + 1)
+    h = np.sinc(n / factor) * np.kaiser(n.size, 8.0)
+    h *= up / h.sum()  # Ganancia `up`: compensa los ceros insertados al sobremuestrear
+    # Fase p usa los coeficientes h[p], h[p+up], h[p+2up], ...
+    taps_por_fase = -(-h.size // up)
+    h = np.pad(h, (0, taps_por_fase * up - h.size))
+    fases = h.reshape(taps_por_fase, up).T.astype(np.float32)
+    _filtros[clave] = (fases, medio)
+    return _filtros[clave]
+
+
+class Remuestreador:
+    """
+    Remuestreo racional up/down con filtro polifásico, vectorizado por bloques.
+    Guarda la cola de la entrada anterior, así que se puede alimentar chunk a chunk
+    (subida en streaming) y da exactamente lo mismo que procesar todo de una vez.
+    """
+
+    def __init__(self, tasa_origen, tasa_destino=TASA_SUBIDA):
+        divisor = gcd(tasa_origen, tasa_destino)
+        self.up, self.down = tasa_destino // divisor, tasa_origen // divisor
+        self.fases, self.medio = _filtro_polifase(self.up, self.down)
+        self.taps = self.fases.shape[1]
+        self._j = np.arange(self.taps)
+        # Historia = últimas `taps` muestras; arranca en ceros (relleno izquierdo)
+        self._historia = np.zeros(self.taps, dtype=np.float32)
+        self._inicio_historia = -self.taps  # Índice global de _historia[0]
+        self._entradas = 0                  # Muestras de entrada recibidas
+        self._siguiente = 0                 # Próxima muestra de salida a calcular
+
+    def procesar(self, bloque, final=False):
+        """Devuelve (int16) todas las salidas que ya se pueden calcular con lo recibido."""
+        bloque = np.asarray(bloque).reshape(-1).astype(np.float32)
+        self._entradas += bloque.size
+        x = np.concatenate([self._historia, bloque])
+        disponibles = self._inicio_historia + x.size
+        if final:
+            # Relleno derecho en ceros para vaciar la cola del filtro
+            x = np.concatenate([x, np.zeros(self.taps, dtype=np.float32)])
+            fin = (self._entradas * self.up) // self.down
+        else:
+            # Salida m es calculable si (m*down + medio)//up <= disponibles - 1
+            fin = (disponibles * self.up - 1 - self.medio) // self.down + 1
+        fin = max(fin, self._siguiente)
+
+        salida = np.empty(fin - self._siguiente, dtype=np.float32)
+        for inicio in range(self._siguiente, fin, BLOQUE_SALIDA):
+            m = np.arange(inicio, min(inicio + BLOQUE_SALIDA, fin))
+            # Posición en la señal "sobremuestreada", corrida por el retardo del filtro
+            t = m * self.down + self.medio
+            base = t // self.up - self._inicio_historia
+            muestras = x[base[:, None] - self._j[None, :]]
+            salida[m - self._siguiente] = np.einsum("ij,ij->i", muestras, self.fases[t % self.up])
+        self._siguiente = fin
+
+        self._historia = x[disponibles - self._inicio_historia - self.taps:][:self.taps].copy()
+        self._inicio_historia = disponibles - self.taps
+        return np.clip(np.rint(salida), -32768, 32767).astype(np.int16)
+
+
+def remuestrear(audio, tasa_origen, tasa_destino=TASA_SUBIDA):
+    """
+    Remuestrea una toma completa. Acepta int16 o float, mono (N,) o (N, 1).
+    Devuelve int16 mono.
+    """
+    if tasa_origen == tasa_destino:
+        return np.asarray(audio).reshape(-1).astype(np.int16, copy=False)
+    return Remuestreador(tasa_origen, tasa_destino).procesar(audio, final=True)
+
+
+def codificar(audio, tasa, formato=FORMATO_SUBIDA):
+    """Codifica PCM en memoria. Devuelve un BytesIO con `.name` (Whisper mira la extensión)."""
+    tipo, subtipo, extension = FORMATOS[formato]
+    buffer = io.BytesIO()
+    sf.write(buffer, np.asarray(audio).reshape(-1), tasa, format=tipo, subtype=subtipo)
+    buffer.seek(0)
+    buffer.name = f"audio.{extension}"
+    return buffer
+
+
+def preparar_subida(audio, tasa_origen, formato=FORMATO_SUBIDA, tasa_destino=TASA_SUBIDA):
+    """Etapa completa: remuestrear a 16 kHz y comprimir."""
+    return codificar(remuestrear(audio, tasa_origen, tasa_destino), tasa_destino, formato)
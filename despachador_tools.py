@@ -0,0 +1,132 @@
+import json
+import time
+import asyncio
+import inspect
+import threading
+
+# --- 🧰 DESPACHADOR DE TOOLS ---
+# Un registro nombre -> función en lugar del if/elif. Las tool_calls de un
+# turno corren en paralelo como tareas del event loop; solo se ordenan las
+# que declaran dependencia ("consultar_ahorros" espera a un "crear_meta" que
+# vino antes en el mismo turno). Cada tool tiene su timeout: si un endpoint
+# está lento, esa tool responde un error y el resto del turno sigue (a las no
+# idempotentes solo se las deja de esperar: su POST no se corta a la mitad).
+# Las tools corrutina corren en el loop; las normales, en un hilo (acotado).
+# Si cortan el turno (barge-in) se cancelan todas, salvo las no idempotentes
+# (mover plata, crear metas) que ya salieron: esas terminan de fondo y solo se
+# calla su resultado. Cortar el POST a medias dejaría la duda de si se hizo.
+
+MAX_HILOS = 4
+
+
+class Herramienta:
+    __slots__ = ("nombre", "funcion", "argumentos", "timeout", "depende_de", "idempotente")
+
+    def __init__(self, nombre, funcion, argumentos=(), timeout=10.0, depende_de=(), idempotente=True):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.argumentos = tuple(argumentos)
+        self.timeout = timeout
+        # Nombres de tools que, si aparecen ANTES en el mismo turno, deben terminar primero
+        self.depende_de = frozenset(depende_de)
+        self.idempotente = idempotente
+
+
+class DespachadorTools:
+    """
+    `await despachar(tool_calls)` devuelve [(tool_call, nombre, argumentos, resultado_json)]
+    en el mismo orden de `tool_calls`, listo para armar los mensajes 'tool'.
+    """
+
+    def __init__(self, max_hilos=MAX_HILOS):
+        self._registro = {}
+        # Se toma dentro del hilo: una tool que venció su timeout sigue corriendo
+        # (un hilo no se puede matar) y ocupa su lugar hasta que termina de verdad
+        self._hilos = threading.BoundedSemaphore(max_hilos)
+        self._de_fondo = set()  # Llamadas no idempotentes que siguen tras vencer su plazo
+
+    def registrar(self, nombre, funcion, argumentos=(), timeout=10.0, depende_de=(), idempotente=True):
+        self._registro[nombre] = Herramienta(nombre, funcion, argumentos, timeout, depende_de, idempotente)
+
+    async def _llamar(self, herramienta, kwargs):
+        if inspect.iscoroutinefunction(herramienta.funcion):
+            return await herramienta.funcion(**kwargs)
+
+        def en_hilo():
+            with self._hilos:
+                return herramienta.funcion(**kwargs)
+
+        return await asyncio.to_thread(en_hilo)
+
+    async def _ejecutar(self, herramienta, argumentos, previas, enviadas):
+        """Devuelve (resultado_json, completada)."""
+        # Esperamos a las tools de las que dependemos (ya tienen su propio timeout)
+        if previas:
+            await asyncio.wait(previas)
+            if not all(previa.result()[1] for previa in previas):
+                # Nos rendimos con una tool de la que dependemos: no movemos plata a ciegas
+                return json.dumps({"error": "cancelado", "mensaje": "Se canceló porque un paso anterior tardó demasiado."}), False
+        enviadas.add(asyncio.current_task())
+        t0 = time.perf_counter()
+        try:
+            kwargs = {clave: argumentos[clave] for clave in herramienta.argumentos}
+            llamada = asyncio.ensure_future(self._llamar(herramienta, kwargs))
+            if not herramienta.idempotente:
+                # Vencer el plazo solo deja de esperar: el POST sigue hasta que el banco conteste
+                self._de_fondo.add(llamada)
+                llamada.add_done_callback(lambda f: self._terminada_de_fondo(herramienta.nombre, f))
+                llamada = asyncio.shield(llamada)
+            resultado = await asyncio.wait_for(llamada, herramienta.timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️ {herramienta.nombre} no respondió a tiempo")
+            mensaje = ("El banco está lento y no pude terminar, revisa en un ratito." if herramienta.idempotente
+                       else "El banco está lento; tu pedido sigue en camino, revisa en un ratito.")
+            return json.dumps({"error": "tiempo_agotado", "mensaje": mensaje}), False
+        except Exception as e:
+            resultado = json.dumps({"error": str(e)})
+        print(f"⚙️ {herramienta.nombre} listo en {time.perf_counter() - t0:.2f} s")
+        return resultado, True
+
+    def _terminada_de_fondo(self, nombre, futuro):
+        self._de_fondo.discard(futuro)
+        if futuro.cancelled():
+            return
+        if futuro.exception() is not None:
+            print(f"❌ {nombre} falló de fondo: {futuro.exception()}")
+
+    async def despachar(self, tool_calls):
+        pendientes = []  # (tool_call, nombre, argumentos, tarea)
+        enviadas = set()  # Tareas que ya pasaron sus dependencias y llamaron a la tool
+        for tool in tool_calls:
+            nombre = tool.function.name
+            try:
+                argumentos = json.loads(tool.function.arguments or "{}")
+            except ValueError:
+                argumentos = {}
+            herramienta = self._registro.get(nombre)
+            if herramienta is None:
+                pendientes.append((tool, nombre, argumentos, None))
+                continue
+            print(f"⚙️ Ejecutando: {nombre}...")
+            # El plazo de una tool dependiente empieza cuando terminan sus previas
+            previas = [p[3] for p in pendientes if p[3] is not None and p[1] in herramienta.depende_de]
+            tarea = asyncio.create_task(self._ejecutar(herramienta, argumentos, previas, enviadas))
+            pendientes.append((tool, nombre, argumentos, tarea))
+
+        resultados = []
+        try:
+            for tool, nombre, argumentos, tarea in pendientes:
+                # shield: cancelar el turno no cancela la tool de rebote; se decide abajo
+                resultado = "{}" if tarea is None else (await asyncio.shield(tarea))[0]
+                resultados.append((tool, nombre, argumentos, resultado))
+        except asyncio.CancelledError:
+            # Turno cortado: también las tools que nadie estaba esperando todavía
+            for _, nombre, _, tarea in pendientes:
+                if tarea is None or tarea.done():
+                    continue
+                if tarea in enviadas and not self._registro[nombre].idempotente:
+                    print(f"🛡️ {nombre} ya estaba en curso: termina de fondo, sin decir el resultado")
+                    continue
+                tarea.cancel()
+            raise
+        return resultados
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+# --- 📨 EVENTOS DEL REALTIME: FILTRO, DECODIFICADOR Y DEDUPLICACIÓN ---
+# El servidor solo nos manda los movimientos de nuestras cuentas (filter),
+# del payload sacamos únicamente los campos del `record` que usamos, y cada
+# movimiento se procesa una sola vez aunque llegue repetido.
+#
+# Ojo: `ids` en el payload (ver raw.json) son los ids de las SUSCRIPCIONES
+# que coincidieron, no del evento; un mismo INSERT que calza con dos filtros
+# llega con ambos ids y dispara ambos callbacks. Para deduplicar usamos el
+# `id` de la fila, que es único por movimiento y se repite igual en un reenvío.
+
+MAX_VISTOS = 512
+
+
+class Movimiento:
+    """Lo que usamos de un INSERT en `movimientos`, sin el resto del payload."""
+    __slots__ = ("id", "monto", "cuenta_origen_id", "cuenta_destino_id", "descripcion")
+
+    def __init__(self, registro):
+        self.id = registro.get("id")
+        monto = registro.get("monto")
+        self.monto = float(monto) if monto is not None else None
+        # str() una vez aquí para comparar UUIDs sin sorpresas después
+        self.cuenta_origen_id = str(registro.get("cuenta_origen_id"))
+        self.cuenta_destino_id = str(registro.get("cuenta_destino_id"))
+        self.descripcion = registro.get("descripcion")
+
+    def get(self, campo, defecto=None):
+        """Para quien espera el `record` como dict (ej: CacheCuentas.notificar_movimiento)."""
+        return getattr(self, campo, defecto)
+
+
+def decodificar(payload):
+    """
+    Devuelve el Movimiento del payload, o None si no trae `record`
+    (eventos de 'system'). La librería entrega dicts; model_dump/__dict__
+    quedan solo como respaldo por si algún día cambia.
+    """
+    if not isinstance(payload, dict):
+        if hasattr(payload, "model_dump"):
+            payload = payload.model_dump()
+        else:
+            payload = getattr(payload, "__dict__", {})
+    registro = (payload.get("data") or {}).get("record")
+    return Movimiento(registro) if registro else None
+
+
+class VistosRecientes:
+    """LRU acotado de claves ya procesadas (se usa siempre desde el hilo del loop)."""
+
+    def __init__(self, maximo=MAX_VISTOS):
+        self.maximo = maximo
+        self._claves = OrderedDict()
+        self.repetidos = 0
+
+    def nuevo(self, clave):
+        """True la primera vez que se ve `clave` (y la recuerda); False si es repetida."""
+        if clave in self._claves:
+            self._claves.move_to_end(clave)
+            self.repetidos += 1
+            return False
+        self._claves[clave] = None
+        if len(self._claves) > self.maximo:
+            self._claves.popitem(last=False)
+        return True
+
+
+def filtro_cuentas(columna, ids_cuentas):
+    """Filtro de postgres_changes: 'col=eq.X' para una cuenta, 'col=in.(X,Y)' para varias."""
+    ids = sorted({str(c) for c in ids_cuentas})
+    if len(ids) == 1:
+        return f"{columna}=eq.{ids[0]}"
+    return f"{columna}=in.({','.join(ids)})"
@@ -0,0 +1,188 @@
+import time
+import numpy as np
+
+# --- 🤚 MOTOR DE GESTOS (ventana deslizante, NumPy) ---
+# Guarda los últimos segundos del giroscopio en un buffer circular y en cada
+# lote busca el patrón pico–valle–pico sobre toda la ventana de una vez:
+# 1. |giro| de cada muestra y media móvil causal (SUAVIZADO_S) contra el ruido.
+# 2. Cruces hacia arriba de umbral_alto = candidatos a pico.
+# 3. Dos cruces seguidos son el MISMO golpe salvo que entre ellos la señal
+#    baje de umbral_bajo (el valle); así un sacudón que tiembla no cuenta doble.
+# 4. `picos` golpes dentro de ventana_s = gesto. Tras detectarlo, los golpes
+#    de los siguientes refractario_s se ignoran.
+# Además se pueden grabar trazas del sensor a .npz y reproducirlas offline.
+
+SUAVIZADO_S = 0.03
+LOTE_REPRODUCCION = 10  # Muestras por lote al reproducir: ~lo que trae la FIFO en 50 ms a 200 Hz
+
+
+class Gesto:
+    __slots__ = ("nombre", "picos", "umbral_alto", "umbral_bajo", "ventana_s", "refractario_s")
+
+    def __init__(self, nombre, picos=2, umbral_alto=250.0, umbral_bajo=30.0, ventana_s=3.0, refractario_s=2.0):
+        self.nombre = nombre
+        self.picos = picos
+        self.umbral_alto = umbral_alto      # °/s suavizados para contar un pico
+        self.umbral_bajo = umbral_bajo      # °/s: hay que bajar de aquí entre picos
+        self.ventana_s = ventana_s          # Del primer al último pico
+        self.refractario_s = refractario_s
+
+
+class Deteccion:
+    __slots__ = ("nombre", "t_inicio", "t_pico", "t_aviso")
+
+    def __init__(self, nombre, t_inicio, t_pico, t_aviso):
+        self.nombre = nombre
+        self.t_inicio = t_inicio    # Primer pico
+        self.t_pico = t_pico        # Último pico (cuando el gesto quedó completo)
+        self.t_aviso = t_aviso      # Última muestra del lote en que se detectó
+
+    def __repr__(self):
+        return f"Deteccion({self.nombre}, pico={self.t_pico:.3f}, aviso={self.t_aviso:.3f})"
+
+
+class MotorGestos:
+    """
+    `agregar(tiempos, muestras)` con lo que devuelve SensorMPU.vaciar_fifo()
+    (se usan las 3 últimas columnas: el giroscopio) y devuelve las Deteccion
+    nuevas. No es thread-safe: lo alimenta un solo hilo.
+    """
+
+    def __init__(self, tasa_hz, suavizado_s=SUAVIZADO_S):
+        self.tasa_hz = tasa_hz
+        self.suavizado = max(1, round(suavizado_s * tasa_hz))
+        self.gestos = []
+        self._ultima = {}
+        self._crear_buffer(1.0)
+
+    def _crear_buffer(self, segundos):
+        # Margen de un segundo para que el primer pico de la ventana no quede cortado
+        self._capacidad = int((segundos + 1.0) * self.tasa_hz)
+        self._giro = np.zeros((self._capacidad, 3), dtype=np.float32)
+        self._t = np.zeros(self._capacidad)
+        self._pos = 0
+        self._n = 0
+
+    def registrar(self, gesto):
+        self.gestos.append(gesto)
+        self._ultima[gesto.nombre] = float("-inf")
+        self._crear_buffer(max(g.ventana_s for g in self.gestos))
+        return gesto
+
+    def reiniciar(self):
+        """Olvida la ventana (ej: después de una pausa larga sin leer el sensor)."""
+        self._pos = self._n = 0
+
+    def _escribir(self, tiempos, giro):
+        n = len(tiempos)
+        if n >= self._capacidad:
+            tiempos, giro, n = tiempos[-self._capacidad:], giro[-self._capacidad:], self._capacidad
+        primera = min(n, self._capacidad - self._pos)
+        self._t[self._pos:self._pos + primera] = tiempos[:primera]
+        self._giro[self._pos:self._pos + primera] = giro[:primera]
+        if primera < n:
+            self._t[:n - primera] = tiempos[primera:]
+            self._giro[:n - primera] = giro[primera:]
+        self._pos = (self._pos + n) % self._capacidad
+        self._n = min(self._n + n, self._capacidad)
+
+    def ventana(self):
+        """(tiempos, |giro| suavizado) de la ventana, en orden cronológico."""
+        indices = (self._pos - self._n + np.arange(self._n)) % self._capacidad
+        giro = self._giro[indices]
+        magnitud = np.sqrt(np.einsum("ij,ij->i", giro, giro))
+        # Media móvil causal: solo mira hacia atrás, no agrega espera
+        acumulado = np.cumsum(np.concatenate(([0.0], magnitud)))
+        k = min(self.suavizado, len(magnitud))
+        arranque = acumulado[1:k] / np.arange(1, k)  # Las primeras k-1: media de lo que hay
+        suave = np.concatenate((arranque, (acumulado[k:] - acumulado[:-k]) / k))
+        return self._t[indices], suave
+
+    def agregar(self, tiempos, muestras):
+        if len(tiempos) == 0:
+            return []
+        self._escribir(np.asarray(tiempos), np.asarray(muestras)[:, -3:])
+        tiempos_v, suave = self.ventana()
+        detecciones = []
+        for gesto in self.gestos:
+            deteccion = self._buscar(gesto, tiempos_v, suave)
+            if deteccion is not None:
+                self._ultima[gesto.nombre] = deteccion.t_pico
+                detecciones.append(deteccion)
+        return detecciones
+
+    def _buscar(self, gesto, tiempos, suave):
+        arriba = suave > gesto.umbral_alto
+        cambios = np.flatnonzero(arriba[1:] != arriba[:-1])
+        cruces = cambios[~arriba[cambios]] + 1  # Índices donde la señal pasa a estar arriba
+        if len(cruces) < gesto.picos:
+            return None
+        # Mínimo entre cada cruce y el siguiente: si baja de umbral_bajo, el siguiente es otro golpe
+        valles = np.minimum.reduceat(suave, cruces)[:-1]
+        nuevo_golpe = np.concatenate(([True], valles < gesto.umbral_bajo))
+        golpes = tiempos[cruces[nuevo_golpe]]
+        golpes = golpes[golpes > self._ultima[gesto.nombre] + gesto.refractario_s]
+        k = gesto.picos
+        if len(golpes) < k:
+            return None
+        duraciones = golpes[k - 1:] - golpes[:len(golpes) - k + 1]
+        validos = np.flatnonzero(duraciones <= gesto.ventana_s)
+        if not len(validos):
+            return None
+        i = validos[0]
+        return Deteccion(gesto.nombre, float(golpes[i]), float(golpes[i + k - 1]), float(tiempos[-1]))
+
+
+# --- 🎞️ TRAZAS: grabar y reproducir lo que vio el sensor ---
+
+class Traza:
+    __slots__ = ("tiempos", "muestras", "tasa_hz", "marcas")
+
+    def __init__(self, tiempos, muestras, tasa_hz, marcas=()):
+        self.tiempos = np.asarray(tiempos, dtype=np.float64)
+        self.muestras = np.asarray(muestras, dtype=np.float32)
+        self.tasa_hz = float(tasa_hz)
+        self.marcas = np.asarray(marcas, dtype=np.float64)  # Momentos en que SÍ se hizo el gesto
+
+    def guardar(self, ruta):
+        np.savez_compressed(
+            ruta, tiempos=self.tiempos, muestras=self.muestras,
+            tasa_hz=self.tasa_hz, marcas=self.marcas,
+        )
+
+
+def cargar_traza(ruta):
+    with np.load(ruta) as datos:
+        return Traza(datos["tiempos"], datos["muestras"], datos["tasa_hz"], datos["marcas"])
+
+
+class GrabadorTraza:
+    """Junta los lotes de vaciar_fifo() (y marcas opcionales) para guardarlos en .npz."""
+
+    def __init__(self, ruta, tasa_hz):
+        self.ruta = ruta
+        self.tasa_hz = tasa_hz
+        self._tiempos, self._muestras, self._marcas = [], [], []
+
+    def agregar(self, tiempos, muestras):
+        if len(tiempos):
+            self._tiempos.append(np.asarray(tiempos))
+            self._muestras.append(np.asarray(muestras))
+
+    def marcar(self, t=None):
+        self._marcas.append(time.monotonic() if t is None else t)
+
+    def guardar(self):
+        if not self._tiempos:
+            return None
+        traza = Traza(np.concatenate(self._tiempos), np.concatenate(self._muestras), self.tasa_hz, self._marcas)
+        traza.guardar(self.ruta)
+        return traza
+
+
+def reproducir(traza, motor, lote=LOTE_REPRODUCCION):
+    """Pasa la traza por el motor en lotes, como si viniera de la FIFO. Devuelve las Deteccion."""
+    detecciones = []
+    for inicio in range(0, len(traza.tiempos), lote):
+        detecciones += motor.agregar(traza.tiempos[inicio:inicio + lote], traza.muestras[inicio:inicio + lote])
+    return detecciones
@@ -0,0 +1,152 @@
+import re
+import unicodedata
+from functools import lru_cache
+from collections import defaultdict
+
+# --- 🎯 ÍNDICE DIFUSO DE NOMBRES DE METAS ---
+# Whisper y los niños no escriben igual que la base: "bici" vs "bicicleta",
+# "celulares" vs "célular". Normalizamos (sin tildes, singular, sin relleno)
+# y rankeamos por prefijo / trigramas / distancia de edición.
+
+UMBRAL_CONFIANZA = 0.6
+CANDIDATOS_FINOS = 5   # Solo las metas con más trigramas en común pasan a la distancia de edición
+
+# Palabras que no ayudan a distinguir metas ("para MI bici", "la META del cine")
+RELLENO = {
+    "a", "al", "de", "del", "el", "la", "las", "lo", "los", "mi", "mis", "tu", "tus",
+    "un", "una", "unos", "unas", "para", "por", "meta", "ahorro", "ahorros", "cuenta",
+}
+
+
+def sin_tildes(texto):
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _singular(palabra):
+    if len(palabra) > 4 and palabra.endswith("ces"):
+        return palabra[:-3] + "z"          # lapices -> lapiz
+    if len(palabra) > 4 and palabra.endswith("es") and palabra[-3] not in "aeiou":
+        return palabra[:-2]                # celulares -> celular
+    if len(palabra) > 3 and palabra.endswith("s"):
+        return palabra[:-1]                # bicis -> bici
+    return palabra
+
+
+def normalizar(texto):
+    """'Mis Célulares!' -> ['celular']"""
+    palabras = re.findall(r"[a-z0-9]+", sin_tildes((texto or "").lower()))
+    tokens = [_singular(p) for p in palabras if p not in RELLENO]
+    # Si todo era relleno ("la meta"), mejor quedarnos con algo
+    return tokens or [_singular(p) for p in palabras]
+
+
+def trigramas(palabra):
+    relleno = f"  {palabra} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def levenshtein(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        anterior = actual
+    return anterior[-1]
+
+
+@lru_cache(maxsize=4096)  # Las mismas palabras se repiten turno a turno
+def similitud(q, t):
+    """Parecido entre dos palabras ya normalizadas, de 0 a 1."""
+    if q == t:
+        return 1.0
+    corta, larga = sorted((q, t), key=len)
+    puntaje = 0.0
+    # Abreviaturas: "bici" -> "bicicleta", "compu" -> "computadora"
+    if len(corta) >= 3 and larga.startswith(corta):
+        puntaje = 0.8 + 0.2 * len(corta) / len(larga)
+    # Errores de transcripción: letras cambiadas/faltantes
+    puntaje = max(puntaje, 1.0 - levenshtein(q, t) / len(larga))
+    tq, tt = trigramas(q), trigramas(t)
+    puntaje = max(puntaje, 2 * len(tq & tt) / (len(tq) + len(tt)))
+    return puntaje
+
+
+class IndiceMetas:
+    """
+    Índice de las metas de `mis_cuentas`. `actualizar()` solo reconstruye si
+    cambió la lista (ids + nombres), así que se puede llamar en cada tool.
+    """
+
+    def __init__(self):
+        self._firma = None
+        self._metas = []                      # [(cuenta, tokens)]
+        self._por_trigrama = defaultdict(set) # trigrama -> índices en _metas
+        self._n_trigramas = []                # índice -> cuántos trigramas tiene la meta
+
+    def actualizar(self, lista_cuentas):
+        firma = tuple((str(c.get("id")), c.get("meta_descripcion")) for c in lista_cuentas)
+        if firma == self._firma:
+            return False
+        self._firma = firma
+        self._metas = []
+        self._por_trigrama = defaultdict(set)
+        self._n_trigramas = []
+        for cuenta in lista_cuentas:
+            # La cuenta 'simple' no tiene meta_descripcion
+            if not cuenta.get("meta_descripcion"):
+                continue
+            tokens = normalizar(cuenta["meta_descripcion"])
+            indice = len(self._metas)
+            self._metas.append((cuenta, tokens))
+            propios = set().union(*(trigramas(token) for token in tokens))
+            self._n_trigramas.append(len(propios))
+            for tri in propios:
+                self._por_trigrama[tri].add(indice)
+        return True
+
+    def _puntaje(self, tokens_q, tokens_m):
+        if not tokens_q or not tokens_m:
+            return 0.0
+        # Qué tanto de lo que dijo el niño está en la meta, y viceversa (una sola matriz)
+        parecidos = [[similitud(q, t) for t in tokens_m] for q in tokens_q]
+        cobertura_q = sum(max(fila) for fila in parecidos) / len(tokens_q)
+        cobertura_m = sum(max(columna) for columna in zip(*parecidos)) / len(tokens_m)
+        return 0.7 * cobertura_q + 0.3 * cobertura_m
+
+    def buscar(self, nombre):
+        """
+        Devuelve (cuenta, confianza) de la mejor meta, o (None, 0.0).
+        Si dos metas quedan casi empatadas, la confianza queda bajo UMBRAL_CONFIANZA.
+        """
+        tokens_q = normalizar(nombre)
+        if not self._metas or not tokens_q:
+            return None, 0.0
+        # Filtro grueso: trigramas en común (Dice), barato aunque haya cientos de metas.
+        # Levenshtein (Python puro) solo corre sobre las CANDIDATOS_FINOS mejores.
+        trigramas_q = set().union(*(trigramas(q) for q in tokens_q))
+        comunes = defaultdict(int)
+        for tri in trigramas_q:
+            for i in self._por_trigrama.get(tri, ()):
+                comunes[i] += 1
+        if not comunes:
+            return None, 0.0  # Ni la primera letra en común con ninguna meta
+        candidatos = sorted(
+            comunes, key=lambda i: 2 * comunes[i] / (len(trigramas_q) + self._n_trigramas[i]), reverse=True
+        )[:CANDIDATOS_FINOS]
+
+        ranking = sorted(
+            ((self._puntaje(tokens_q, self._metas[i][1]), i) for i in candidatos), reverse=True
+        )
+        mejor, indice = ranking[0]
+        if len(ranking) > 1 and mejor - ranking[1][0] < 0.05:
+            # Casi empate ("bici" con "Bicicleta roja" y "Bicicleta azul"): no elegimos
+            # a ciegas adónde va la plata, queda bajo el umbral y se le dicen las opciones
+            mejor = min(mejor * 0.8, UMBRAL_CONFIANZA * 0.9)
+        return self._metas[indice][0], round(mejor, 3)
+
+    def nombres(self):
+        return [cuenta["meta_descripcion"] for cuenta, _ in self._metas]
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import uuid
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageFunctionToolCall
+from openai.types.chat.chat_completion_message_function_tool_call import Function
+from numeros_es import leer_monto
+from indice_metas import sin_tildes
+
+# --- ⚡ RUTA RÁPIDA: INTENCIONES LOCALES SIN GPT ---
+# Los pedidos típicos ("¿cuánto tengo?", "guarda dos soles para el cine")
+# se resuelven con reglas y van directo a la tool. Si hay la menor duda
+# (dos pedidos juntos, pregunta educativa, falta el monto) se devuelve None
+# y decide gpt-4o como siempre.
+
+UMBRAL_INTENCION = float(os.getenv("UMBRAL_INTENCION", 0.85))
+
+VERBOS_GUARDAR = {
+    "guarda", "guardame", "guardar", "ahorra", "ahorrame", "mete", "meteme", "pon", "ponme",
+    "pasa", "pasame", "manda", "mandame", "envia", "enviame", "deposita", "separa", "separame",
+}
+VERBOS_CREAR = {"crea", "creame", "crear", "haz", "hazme", "abre", "abreme", "nueva", "nuevo"}
+PREPOSICIONES_META = {"para", "a", "al", "en"}
+RELLENO_NOMBRE = {
+    "para", "a", "al", "en", "de", "del", "por", "la", "el", "los", "las", "mi", "mis",
+    "un", "una", "meta", "cuenta", "alcancia",
+}
+# El nombre de la meta termina antes de estas palabras: lo que sigue no es parte
+# del nombre ("para el cine por favor", "para la bici mañana")
+COLA_NOMBRE = {
+    "favor", "porfa", "porfis", "ahora", "hoy", "manana", "ya", "gracias", "pues", "y",
+    "tambien", "rapido", "porfavor",
+}
+# Nexos que abren otra frase ("para el cine QUE me gusta mucho"): el nombre termina
+# antes y lo que sigue no lo entienden las reglas
+NEXOS = {
+    "que", "porque", "cuando", "donde", "si", "como", "pero", "aunque", "con", "sin",
+    "me", "te", "se", "le", "les", "es", "esta", "quiero", "para",
+}
+MAX_PALABRAS_NOMBRE = 4  # Más que esto ya no es un nombre de meta sino una frase
+# Autocorrecciones ("para el cine, no, mejor para la bici"): mueven plata, que decida el LLM
+CORRECCIONES = {"no", "mejor", "digo", "perdon", "osea", "espera", "corrijo"}
+CONFIANZA_DUDOSA = 0.5  # Por debajo de cualquier umbral razonable: va a gpt-4o
+
+# "¿cuánto tengo?", "¿cuánta plata he ahorrado?", "mi saldo"
+PATRONES_SALDO = [
+    re.compile(r"\bcuant[oa]s?\b.*\b(tengo|hay|ahorrado|ahorre|junte|juntado|llevo|plata|dinero)\b"),
+    re.compile(r"\b(mi|mis|el|ver|dime)\s+(saldo|ahorros|plata)\b"),
+    re.compile(r"^\s*(saldo|ahorros)\s*$"),
+]
+# Señales de que NO es una consulta simple de saldo
+EXCLUYE_SALDO = re.compile(r"\b(necesito|falta|faltan|cuesta|cuestan|vale|valen|gaste|gastar)\b")
+# Preguntas de educación / charla: siempre al LLM
+PREGUNTA_ABIERTA = re.compile(r"\b(que es|por que|porque|como|explica|cuentame|consejo)\b")
+
+
+def tokenizar_con_pausas(texto):
+    """
+    Como tokenizar, y además el set de índices de tokens seguidos de una pausa
+    (coma, punto, signos): ahí termina un nombre de meta.
+    """
+    tokens, pausas = [], set()
+    for m in re.finditer(r"\d+(?:[.,]\d+)*|[a-z]+|[,.;:!?…-]", sin_tildes((texto or "").lower())):
+        if m.group()[0].isalnum():
+            tokens.append(m.group())
+        elif tokens:
+            pausas.add(len(tokens) - 1)
+    return tokens, pausas
+
+
+def tokenizar(texto):
+    """Minúsculas, sin tildes; conserva decimales y miles ("3.50", "1.000") como un solo token."""
+    return tokenizar_con_pausas(texto)[0]
+
+
+def _nombre_desde(tokens):
+    """Quita relleno de las puntas: 'para la bicicleta de' -> 'bicicleta'."""
+    inicio, fin = 0, len(tokens)
+    while inicio < fin and tokens[inicio] in RELLENO_NOMBRE:
+        inicio += 1
+    while fin > inicio and tokens[fin - 1] in RELLENO_NOMBRE:
+        fin -= 1
+    return " ".join(tokens[inicio:fin])
+
+
+def _nombre_meta(tokens, inicio, pausas):
+    """
+    Nombre desde tokens[inicio:] hasta la primera pausa, palabra de cola o nexo.
+    Devuelve (nombre, completo): completo=False si después quedó algo más o si
+    el "nombre" es tan largo que parece una frase.
+    """
+    fin = len(tokens)
+    for i in range(inicio, len(tokens)):
+        # El "para" de "para el cine" es el de la meta, no un nexo
+        nexo = tokens[i] in NEXOS and not (i == inicio and tokens[i] in PREPOSICIONES_META)
+        if tokens[i] in COLA_NOMBRE or tokens[i] in CORRECCIONES or nexo:
+            fin = i
+            break
+        if i in pausas:
+            fin = i + 1
+            break
+    nombre = _nombre_desde(tokens[inicio:fin])
+    palabras = [t for t in nombre.split() if t not in RELLENO_NOMBRE]
+    return nombre, fin == len(tokens) and len(palabras) <= MAX_PALABRAS_NOMBRE
+
+
+def _intencion(nombre, argumentos, confianza):
+    return {"nombre": nombre, "argumentos": argumentos, "confianza": confianza}
+
+
+def _consultar_ahorros(texto, tokens, pausas):
+    if EXCLUYE_SALDO.search(texto) or not any(p.search(texto) for p in PATRONES_SALDO):
+        return None
+    # Si además trae un monto, probablemente pide otra cosa ("cuánto tengo si guardo 5")
+    monto, _, _ = leer_monto(tokens)
+    return _intencion("consultar_ahorros", {}, 0.95 if monto is None else 0.5)
+
+
+def _enviar_dinero_a_meta(texto, tokens, pausas):
+    verbo = next((i for i, t in enumerate(tokens[:3]) if t in VERBOS_GUARDAR), None)
+    if verbo is None:
+        return None
+    monto, inicio, fin = leer_monto(tokens, verbo + 1)
+    if monto is None or monto <= 0:
+        return _intencion("enviar_dinero_a_meta", {}, 0.3)
+    resto = tokens[fin:]
+    if not resto or resto[0] not in PREPOSICIONES_META:
+        return _intencion("enviar_dinero_a_meta", {"monto": monto}, 0.4)
+    nombre, completo = _nombre_meta(tokens, fin, pausas)
+    if not nombre:
+        return _intencion("enviar_dinero_a_meta", {"monto": monto}, 0.4)
+    if not completo or CORRECCIONES.intersection(tokens):
+        # Sobró algo después del nombre o el niño se corrigió: no movemos plata por reglas
+        confianza = CONFIANZA_DUDOSA
+    else:
+        # Palabras entre el verbo y el monto ("guarda AHORA dos soles") bajan un poco la confianza
+        confianza = 0.95 if inicio == verbo + 1 else 0.88
+    return _intencion("enviar_dinero_a_meta", {"monto": monto, "nombre_meta": nombre}, confianza)
+
+
+def _crear_meta(texto, tokens, pausas):
+    if "meta" not in tokens:
+        return None
+    pos_meta = tokens.index("meta")
+    if not any(t in VERBOS_CREAR for t in tokens[:pos_meta + 1]):
+        return None
+    monto, inicio, fin = leer_monto(tokens, pos_meta + 1)
+    if monto is None or monto <= 0:
+        return _intencion("crear_meta", {}, 0.4)
+    antes = _nombre_desde(tokens[pos_meta + 1:inicio])
+    despues, completo = _nombre_meta(tokens, fin, pausas)
+    motivo = " ".join(n for n in (antes, despues) if n)
+    if not motivo:
+        return _intencion("crear_meta", {"monto": monto}, 0.4)
+    confianza = 0.92 if completo and not CORRECCIONES.intersection(tokens) else CONFIANZA_DUDOSA
+    return _intencion("crear_meta", {"monto": monto, "motivo": motivo}, confianza)
+
+
+REGLAS = [_consultar_ahorros, _enviar_dinero_a_meta, _crear_meta]
+
+
+def interpretar(texto, umbral=UMBRAL_INTENCION):
+    """Devuelve la intención local si es clara, o None para mandar al LLM."""
+    tokens, pausas = tokenizar_con_pausas(texto)
+    plano = " ".join(tokens)
+    if not plano or PREGUNTA_ABIERTA.search(plano):
+        return None
+    candidatas = [r for r in (regla(plano, tokens, pausas) for regla in REGLAS) if r is not None]
+    # Dos pedidos en una frase ("crea la meta y dime cuánto tengo"): que lo arme el LLM
+    if len(candidatas) != 1:
+        return None
+    intencion = candidatas[0]
+    return intencion if intencion["confianza"] >= umbral else None
+
+
+def como_mensaje_asistente(intencion):
+    """
+    Arma el mismo objeto que devolvería gpt-4o con tool_calls, así el resto del
+    bucle (ejecutar tools, mensajes 'tool') no se entera de dónde vino.
+    """
+    llamada = ChatCompletionMessageFunctionToolCall(
+        id=f"local_{uuid.uuid4().hex[:12]}",
+        type="function",
+        function=Function(name=intencion["nombre"], arguments=json.dumps(intencion["argumentos"])),
+    )
+    return ChatCompletionMessage(role="assistant", content=None, tool_calls=[llamada])
+
+
+class EstadisticasIntenciones:
+    """Cuántos turnos resolvió la ruta local y cuánto LLM nos ahorramos."""
+
+    def __init__(self):
+        self.turnos = 0
+        self.locales = 0
+        self.por_intencion = {}
+        self.t_parseo_total = 0.0
+        self.t_parseo_max = 0.0
+        self.llamadas_llm = 0
+        self.t_llm_total = 0.0
+
+    def registrar(self, intencion, segundos):
+        self.turnos += 1
+        self.t_parseo_total += segundos
+        self.t_parseo_max = max(self.t_parseo_max, segundos)
+        if intencion is not None:
+            self.locales += 1
+            nombre = intencion["nombre"]
+            self.por_intencion[nombre] = self.por_intencion.get(nombre, 0) + 1
+
+    def registrar_llm(self, segundos):
+        self.llamadas_llm += 1
+        self.t_llm_total += segundos
+
+    def resumen(self):
+        if not self.turnos:
+            return "⚡ Ruta local: sin turnos todavía"
+        tasa = self.locales / self.turnos
+        parseo_ms = 1000 * self.t_parseo_total / self.turnos
+        texto = f"⚡ Ruta local: {self.locales}/{self.turnos} turnos ({tasa:.0%}) | parseo {parseo_ms:.2f} ms"
+        if self.llamadas_llm:
+            ahorro = self.locales * self.t_llm_total / self.llamadas_llm
+            texto += f" | ~{ahorro:.1f} s de gpt-4o ahorrados"
+        return texto
+
+
+def medir(texto):
+    """interpretar() + cronómetro, para alimentar EstadisticasIntenciones."""
+    t0 = time.perf_counter()
+    intencion = interpretar(texto)
+    return intencion, time.perf_counter() - t0
@@ -1,11 +1,15 @@
 import sounddevice as sd
-import numpy as np
 import scipy.io.wavfile as wav
 import requests
 import io
-import pygame
+import soundfile as sf
 import threading
 import time
+import os
+from buffer_captura import BufferCaptura
+from subida_streaming import SubidaEnStreaming
+from salida_audio import obtener_salida, abrir_al_arrancar
+from voz import ControlReproduccion
 
 # --- CONFIGURACIÓN ---
 SUPABASE_URL = "https://TU_ID_PROYECTO.supabase.co/functions/v1/cerebro-voz"
@@ -15,54 +19,65 @@ SUPABASE_KEY = "TU_ANON_KEY_AQUI"
 SAMPLE_RATE = 16000  # 16kHz es suficiente y más ligero que 44.1kHz
 CHANNELS = 1         # Mono (menos datos que enviar)
 DTYPE = 'int16'      # Formato estándar
+# 1 = el audio se sube mientras hablas (al soltar solo falta la cola del audio).
+# Apagado por defecto: el WAV va sin largo conocido (RIFF/data en 0xFFFFFFFF) y
+# falta confirmar que cerebro-voz lo acepte así; se prende a mano para probarlo
+SUBIDA_STREAMING = os.getenv("SUBIDA_STREAMING", "0") == "1"
 
 # Variable para controlar la grabación
 grabando = False
-audio_data = []
+# Buffer preasignado (tope MAX_SEGUNDOS_GRABACION): se reutiliza en cada consulta
+audio_data = BufferCaptura(SAMPLE_RATE, canales=CHANNELS, dtype=DTYPE)
+subida = None  # SubidaEnStreaming del turno actual (si SUBIDA_STREAMING)
 
 def grabar_audio():
     """Hilo que se encarga de llenar el buffer de audio mientras 'grabando' sea True"""
-    global audio_data
-    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype=DTYPE) as stream:
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype=DTYPE,
+                        blocksize=1024, callback=audio_data.callback):
         print("\n👂 ESCUCHANDO... (Habla ahora)")
+        hasta = 0
         while grabando:
-            # Leemos chunks de 1024 frames
-            data, overflowed = stream.read(1024)
-            audio_data.append(data)
+            # El callback copia chunks de 1024 frames directo al buffer
+            antes, hasta = hasta, audio_data.esperar(hasta, 1024)
+            if subida is not None:
+                subida.agregar(audio_data.vista()[antes:hasta])
+            if audio_data.lleno:
+                print("⏱️ Tiempo máximo de grabación alcanzado.")
+                break
 
 def reproducir_respuesta(audio_bytes):
     """Reproduce el MP3 recibido directamente desde la memoria RAM"""
     print("🗣️ REPRODUCIENDO RESPUESTA...")
     
-    # Inicializar mixer de pygame
-    pygame.mixer.init()
-    
-    # Cargar bytes en un objeto de archivo virtual (en memoria)
-    sonido_virtual = io.BytesIO(audio_bytes)
-    
     try:
-        pygame.mixer.music.load(sonido_virtual)
-        pygame.mixer.music.play()
-        
-        # Esperar a que termine de hablar
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
+        # Decodificar en memoria y sonar por la salida que ya está abierta
+        pcm, fs = sf.read(io.BytesIO(audio_bytes), dtype='int16')
+        if pcm.ndim > 1:
+            pcm = pcm.mean(axis=1).astype('int16')  # La salida es mono
+        obtener_salida().reproducir(pcm, fs, ControlReproduccion()).esperar()
             
     except Exception as e:
         print(f"Error reproduciendo audio: {e}")
 
 def main():
-    global grabando, audio_data
+    global grabando, subida
     
     print("--- 🎙️ CLIENTE DE VOZ FINANCIERO ---")
     print("Este script graba tu voz, la envía a Supabase y reproduce la respuesta.")
+    abrir_al_arrancar()  # El parlante se abre una vez aquí, no en cada respuesta
 
     while True:
         try:
             input("\n🔴 Presiona [ENTER] para empezar a hablar...")
             
             # 1. INICIAR GRABACIÓN
-            audio_data = [] # Limpiar buffer anterior
+            audio_data.reiniciar() # Limpiar buffer anterior
+            headers = { "Authorization": f"Bearer {SUPABASE_KEY}" }
+            if SUBIDA_STREAMING:
+                # La petición arranca YA: los chunks viajan mientras grabamos
+                subida = SubidaEnStreaming(
+                    SUPABASE_URL, SAMPLE_RATE, headers=headers, nombre_archivo="consulta.wav"
+                ).iniciar()
             grabando = True
             
             # Usamos un hilo para no bloquear el input de "parar"
@@ -75,24 +90,32 @@ def main():
             
             print("🚀 PROCESANDO Y ENVIANDO AUDIO...")
 
-            # 2. CONVERTIR A WAV EN MEMORIA
-            # Concatenamos todos los fragmentos de audio
-            recording = np.concatenate(audio_data, axis=0)
-            
-            # Crear un archivo WAV virtual en memoria RAM
-            wav_virtual = io.BytesIO()
-            wav.write(wav_virtual, SAMPLE_RATE, recording)
-            wav_virtual.seek(0) # Rebobinar al inicio del archivo virtual
+            if subida is not None:
+                # 2-3. El audio ya está casi todo en el servidor: cerramos y esperamos
+                inicio_req = time.time()
+                subida.cerrar()
+                response = subida.respuesta()
+                fin_req = time.time()
+                print(subida.resumen())
+                subida = None
+            else:
+                # 2. CONVERTIR A WAV EN MEMORIA
+                # Vista sin copia de todo lo grabado
+                recording = audio_data.vista()
+                
+                # Crear un archivo WAV virtual en memoria RAM
+                wav_virtual = io.BytesIO()
+                wav.write(wav_virtual, SAMPLE_RATE, recording)
+                wav_virtual.seek(0) # Rebobinar al inicio del archivo virtual
 
-            # 3. ENVIAR A SUPABASE
-            headers = { "Authorization": f"Bearer {SUPABASE_KEY}" }
-            files = { 
-                "file": ("consulta.wav", wav_virtual, "audio/wav") 
-            }
+                # 3. ENVIAR A SUPABASE
+                files = { 
+                    "file": ("consulta.wav", wav_virtual, "audio/wav") 
+                }
 
-            inicio_req = time.time()
-            response = requests.post(SUPABASE_URL, headers=headers, files=files)
-            fin_req = time.time()
+                inicio_req = time.time()
+                response = requests.post(SUPABASE_URL, headers=headers, files=files)
+                fin_req = time.time()
 
             if response.status_code == 200:
                 print(f"✅ Respuesta recibida en {round(fin_req - inicio_req, 2)} segs")
@@ -1,13 +1,20 @@
 import os
 import smbus2
 import time
-import math
-import requests
+import asyncio
+import threading
 import json
-import io
-import sounddevice as sd
-import soundfile as sf
 from serial_test import enviar_dato_serial
+import voz
+import respuestas
+from cliente_api import obtener_cliente
+from sensor_mpu import SensorMPU
+from gestos import MotorGestos, Gesto, GrabadorTraza
+from muestreo_gestos import Muestreador, ColaAcciones
+from respuesta_precalculada import RespuestaPrecalculada
+from salida_audio import abrir_al_arrancar
+from eventos_realtime import decodificar, VistosRecientes, filtro_cuentas
+from supabase import create_async_client
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -17,38 +24,46 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SUPABASE_FUNCTION_URL = os.getenv("SUPABASE_FUNCTION_URL")
 USUARIO_ID = os.getenv("USUARIO_ID")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Cuentas del niño (separadas por coma) para filtrar el realtime; vacío = todos los movimientos
+CUENTAS_DISPOSITIVO = frozenset(c.strip() for c in os.getenv("CUENTAS_DISPOSITIVO", "").split(",") if c.strip())
+# 1 = la respuesta del doble-shake se recalcula al llegar un movimiento y queda lista para sonar
+PRECALCULO_RESPUESTA = os.getenv("PRECALCULO_RESPUESTA", "1") == "1"
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Respuestas fijas: se sintetizan una vez al arrancar y luego salen del cache
+FRASE_SIN_CONEXION = "Lo siento, no pude conectar con tu alcancía."
+FRASE_ERROR_TECNICO = "Hubo un error técnico."
+FRASES_FALLA = (FRASE_SIN_CONEXION, FRASE_ERROR_TECNICO)
+
 # --- ⚙️ CALIBRACIÓN DEL GESTO ---
-UMBRAL_ALTO = 250.0        # Valor para considerar "Pico" (El "90" que pediste)
-UMBRAL_BAJO = 30.0        # Valor para considerar "Descenso" (Debe bajar de esto para validar)
+# Para afinarlos: grabar con GRABAR_TRAZA=ruta.npz y probar con benchmark_gestos.py
+UMBRAL_ALTO = float(os.getenv("UMBRAL_ALTO", 250.0))   # Valor para considerar "Pico" (El "90" que pediste)
+UMBRAL_BAJO = float(os.getenv("UMBRAL_BAJO", 30.0))    # Valor para considerar "Descenso" (Debe bajar de esto para validar)
 TIEMPO_MAXIMO = 3.0       # Tienes 3 segundos para completar la secuencia Pico -> Bajo -> Pico
+GRABAR_TRAZA = os.getenv("GRABAR_TRAZA")  # Ruta .npz: guarda lo que ve el sensor al salir
 
 # --- CONFIGURACIÓN MPU6050 ---
-ADDR = 0x68
-PWR_MGMT_1 = 0x6B
-GYRO_SCALE = 131.0 
-
-def init_mpu(bus):
-    bus.write_byte_data(ADDR, PWR_MGMT_1, 0)
+# El sensor muestrea solo (en su FIFO) a esta tasa; el bucle la vacía por lotes
+TASA_MUESTREO_HZ = int(os.getenv("TASA_MUESTREO_HZ", 200))
+INTERVALO_LECTURA = 0.05
 
-def read_raw_data(bus, addr):
-    high = bus.read_byte_data(ADDR, addr)
-    low = bus.read_byte_data(ADDR, addr+1)
-    val = (high << 8) | low
-    if val > 32768:
-        val = val - 65536
-    return val
+# --- COLA DE ACCIONES ---
+# Gestos que llegan mientras el chanchito responde: uno espera en cola y el resto
+# se descarta (POLITICA_COLA=reemplazar: gana el más reciente)
+MAX_GESTOS_EN_COLA = 1
+POLITICA_COLA = os.getenv("POLITICA_COLA", "descartar_nuevo")
+REBOTE_GESTO_S = 2.0      # Mismo gesto antes de esto = el mismo sacudón (antes: sleep(2))
 
 # --- 2. CEREBRO (API + GPT) ---
 
 def consultar_ultimo_movimiento():
-    endpoint = f"{SUPABASE_FUNCTION_URL}/last-transaction"
     params = {"solicitante_id": USUARIO_ID}
     print(f"📡 Consultando API...")
     try:
-        response = requests.post(endpoint, params=params, timeout=5)
+        response = obtener_cliente(SUPABASE_FUNCTION_URL).post("last-transaction", params=params)
         if response.status_code == 200:
             return response.json()
         return None
@@ -58,7 +73,13 @@ def consultar_ultimo_movimiento():
 
 def humanizar_respuesta(datos_json):
     if not datos_json:
-        return "Lo siento, no pude conectar con tu alcancía."
+        return FRASE_SIN_CONEXION
+
+    # Plantilla local: sin ida y vuelta a GPT para decir un monto
+    if not respuestas.RESPUESTAS_LLM:
+        frase = respuestas.ultimo_movimiento(datos_json)
+        if frase is not None:
+            return frase
 
     print("🧠 Generando respuesta...")
     try:
@@ -84,91 +105,141 @@ def humanizar_respuesta(datos_json):
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error GPT: {e}")
-        return "Hubo un error técnico."
+        return FRASE_ERROR_TECNICO
 
 def hablar(texto):
     print(f"🔊 Chanchito dice: '{texto}'")
     try:
-        response = client.audio.speech.create(
-            model="tts-1-hd", voice="nova", input=texto
-        )
-        audio_bytes = io.BytesIO(response.content)
-        data, fs = sf.read(audio_bytes)
-        sd.play(data, fs)
-        sd.wait()
+        voz.reproducir(client, texto)
     except Exception as e:
         print(f"❌ Error Audio: {e}")
 
-# --- 3. BUCLE PRINCIPAL (MÁQUINA DE ESTADOS) ---
+# --- ⚡ PRECÁLCULO: la respuesta ya está sintetizada cuando llega el sacudón ---
+
+def calcular_respuesta():
+    """API -> frase -> PCM, en el hilo de precálculo. Sin datos no se guarda nada."""
+    datos = consultar_ultimo_movimiento()
+    if not datos:
+        raise RuntimeError("la API no devolvió el último movimiento")
+    frase = humanizar_respuesta(datos)
+    if frase in FRASES_FALLA:
+        # No es una respuesta: que _bucle reintente en vez de servir el error como acierto
+        raise RuntimeError(f"no se pudo redactar la respuesta ('{frase}')")
+    # La misma frase cada 10 min (TTL) sin movimientos nuevos: sale del cache TTS, no de tts-1-hd
+    pcm, fs = voz.pcm_de_frase(client, frase)
+    print(f"⚡ Respuesta lista: '{frase}'")
+    return frase, pcm, fs
+
+precalculo = RespuestaPrecalculada(calcular_respuesta)
+
+async def motor_realtime_async(al_movimiento):
+    """El mismo feed de `movimientos` que voice_test, solo para saber cuándo recalcular."""
+    async_supabase = await create_async_client(SUPABASE_URL, SUPABASE_KEY)
+    vistos = VistosRecientes()
+
+    def callback_wrapper(payload):
+        movimiento = decodificar(payload)
+        if movimiento is not None and vistos.nuevo(movimiento.id):
+            al_movimiento(movimiento)
+
+    channel = async_supabase.channel('ultimo_movimiento')
+    if CUENTAS_DISPOSITIVO:
+        filtros = [filtro_cuentas(columna, CUENTAS_DISPOSITIVO) for columna in ("cuenta_destino_id", "cuenta_origen_id")]
+    else:
+        filtros = [None]
+    for filtro in filtros:
+        channel.on_postgres_changes(
+            event="INSERT", schema="public", table="movimientos", filter=filtro, callback=callback_wrapper
+        )
+    await channel.subscribe()
+    print("✅ Realtime: la respuesta se recalcula con cada movimiento.")
+
+    while True:
+        await asyncio.sleep(1)
+
+def iniciar_realtime(al_movimiento):
+    """El realtime es async: corre en su propio loop, en un hilo aparte."""
+    def correr():
+        try:
+            asyncio.run(motor_realtime_async(al_movimiento))
+        except Exception as e:
+            print(f"❌ Realtime caído (la respuesta se refresca cada {precalculo.ttl:.0f} s): {e}")
+
+    hilo = threading.Thread(target=correr, name="realtime", daemon=True)
+    hilo.start()
+    return hilo
+
+def responder_gesto(deteccion):
+    """Corre en el worker de acciones: el sensor sigue muestreando mientras tanto."""
+    print(f"2️⃣  {deteccion.nombre} ({deteccion.t_pico - deteccion.t_inicio:.1f} s entre picos) -> ✅ ¡ACCIÓN!")
+    enviar_dato_serial(3) # Cara procesando
+    try:
+        lista = precalculo.obtener() if PRECALCULO_RESPUESTA else None
+        if lista is not None:
+            # Acierto: ni API, ni GPT, ni TTS; solo play
+            print(f"🔊 Chanchito dice: '{lista.frase}'")
+            try:
+                voz.reproducir_pcm(lista.pcm, lista.fs)
+            except Exception as e:
+                print(f"❌ Error Audio: {e}")
+        else:
+            datos = consultar_ultimo_movimiento()
+            frase = humanizar_respuesta(datos)
+            hablar(frase)
+    finally:
+        enviar_dato_serial(1)
+        print("✅ Listo para nueva secuencia.\n")
+
+# --- 3. BUCLE PRINCIPAL (MUESTREO + ACCIONES) ---
 def main():
     try:
         bus = smbus2.SMBus(1)
-        init_mpu(bus)
+        sensor = SensorMPU(bus, tasa_hz=TASA_MUESTREO_HZ).iniciar()
+        abrir_al_arrancar()  # El parlante queda abierto: cada respuesta solo encola audio
+        voz.precalentar_en_segundo_plano(client, [FRASE_SIN_CONEXION, FRASE_ERROR_TECNICO])
+        if SUPABASE_FUNCTION_URL:
+            obtener_cliente(SUPABASE_FUNCTION_URL).precalentar()
+        else:
+            print("⚠️ Falta SUPABASE_FUNCTION_URL en el .env: no se podrá consultar el último movimiento.")
+        if PRECALCULO_RESPUESTA:
+            precalculo.iniciar()
+            if SUPABASE_URL and SUPABASE_KEY:
+                iniciar_realtime(lambda movimiento: precalculo.invalidar())
+            else:
+                print("⚠️ Sin SUPABASE_URL/SUPABASE_KEY: la respuesta precalculada solo se refresca por tiempo.")
         
         print("\n🐷 SENSOR ACTIVO: Modo Doble-Shake")
         print(f"ℹ️  Instrucción: Agitar (> {UMBRAL_ALTO}) -> Pausa (< {UMBRAL_BAJO}) -> Agitar (> {UMBRAL_ALTO})")
         print(f"⏱️  Tiempo límite: {TIEMPO_MAXIMO} segundos")
+        print(f"📈 Muestreo: {sensor.tasa_hz:.0f} Hz (FIFO del sensor)")
+        
+        motor = MotorGestos(sensor.tasa_hz)
+        motor.registrar(Gesto("doble_sacudon", picos=2, umbral_alto=UMBRAL_ALTO,
+                              umbral_bajo=UMBRAL_BAJO, ventana_s=TIEMPO_MAXIMO))
+        grabador = GrabadorTraza(GRABAR_TRAZA, sensor.tasa_hz) if GRABAR_TRAZA else None
         
-        # Variables de estado
-        estado = 0  # 0: Esperando 1er pico, 1: Esperando bajada, 2: Esperando 2do pico
-        tiempo_inicio_secuencia = 0
+        acciones = ColaAcciones(
+            responder_gesto, maximo=MAX_GESTOS_EN_COLA, rebote_s=REBOTE_GESTO_S, politica=POLITICA_COLA
+        ).iniciar()
         
         enviar_dato_serial(1) # Cara normal
         time.sleep(1)
 
-        while True:
-
-            # --- GIROSCOPIO ---
-            gx = read_raw_data(bus, 0x43) / GYRO_SCALE
-            gy = read_raw_data(bus, 0x45) / GYRO_SCALE
-            gz = read_raw_data(bus, 0x47) / GYRO_SCALE
-            
-            # Magnitud del movimiento
-            giro_total = math.sqrt(gx**2 + gy**2 + gz**2)
-            current_time = time.time()
-
-            # --- RESET POR TIEMPO ---
-            # Si estamos en medio de una secuencia (estado > 0) y pasó el tiempo límite
-            if estado > 0 and (current_time - tiempo_inicio_secuencia > TIEMPO_MAXIMO):
-                print("⏳ Tiempo agotado. Secuencia cancelada.")
-                estado = 0 # Volver al inicio
-
-            # --- MÁQUINA DE ESTADOS ---
-            
-            # Estado 0: Esperando el PRIMER sacudón fuerte
-            if estado == 0:
-                if giro_total > UMBRAL_ALTO:
-                    print(f"1️⃣  Primer pico detectado! ({giro_total:.0f}) -> Esperando descenso...")
-                    estado = 1
-                    tiempo_inicio_secuencia = current_time
-            
-            # Estado 1: Esperando que el usuario frene o baje la mano (Descenso)
-            elif estado == 1:
-                if giro_total < UMBRAL_BAJO:
-                    # Solo avanzamos si realmente bajó la intensidad
-                    print(f"📉  Descenso confirmado ({giro_total:.0f}) -> ¡Dale el segundo golpe!")
-                    estado = 2
-            
-            # Estado 2: Esperando el SEGUNDO sacudón fuerte
-            elif estado == 2:
-                if giro_total > UMBRAL_ALTO:
-                    print(f"2️⃣  Segundo pico detectado! ({giro_total:.0f}) -> ✅ ¡ACCIÓN!")
-                    
-                    # --- EJECUTAR ACCIÓN ---
-                    enviar_dato_serial(3) # Cara procesando
-                    
-                    datos = consultar_ultimo_movimiento()
-                    frase = humanizar_respuesta(datos)
-                    hablar(frase)
-                    
-                    # --- RESET FINAL ---
-                    print("💤 Enfriando sensor...")
-                    enviar_dato_serial(1)
-                    time.sleep(2) # Pausa para evitar rebotes
-                    estado = 0 # Reiniciamos lógica
-                    print("✅ Listo para nueva secuencia.\n")
-
-            time.sleep(0.05) # Muestreo rápido
+        sensor.reiniciar_fifo()  # Lo acumulado durante el arranque no cuenta
+        muestreador = Muestreador(sensor, motor, acciones.ofrecer, INTERVALO_LECTURA, grabador).iniciar()
+
+        try:
+            while True:
+                time.sleep(1) # Todo pasa en los hilos de muestreo y acciones
+        finally:
+            muestreador.detener()
+            print(f"📈 Muestreo: {muestreador.vueltas} vueltas, {muestreador.atrasos} atrasadas, "
+                  f"retraso máx {muestreador.retraso_max * 1000:.1f} ms, {sensor.desbordes} desbordes de FIFO")
+            print(f"🎬 Gestos: {acciones.resumen()}")
+            if PRECALCULO_RESPUESTA:
+                print(f"⚡ Precálculo: {precalculo.resumen()}")
+            if grabador is not None and grabador.guardar() is not None:
+                print(f"🎞️  Traza guardada en {GRABAR_TRAZA}")
 
     except KeyboardInterrupt:
         print("\n👋 Apagando.")
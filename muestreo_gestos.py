@@ -0,0 +1,139 @@
+import time
+import queue
+import threading
+
+# --- 🧵 MUESTREO EN SU HILO + ACCIONES EN OTRO ---
+# El hilo de muestreo vacía la FIFO del sensor a ritmo fijo (contra plazos
+# absolutos, así el trabajo de cada vuelta no lo va atrasando) y solo AVISA
+# los gestos. Las acciones (API, TTS, hablar) corren en un worker aparte con
+# una cola acotada: el sensor nunca se congela mientras el chanchito habla.
+#
+# Gestos que llegan con el worker ocupado (POLITICA_COLA):
+# - descartar_nuevo: si la cola está llena, el gesto nuevo se ignora
+# - reemplazar:      el nuevo pisa al que esperaba (gana el más reciente)
+# Además, el mismo gesto repetido dentro de rebote_s se ignora siempre.
+
+PERIODO_MUESTREO_S = 0.05
+MAX_ACCIONES_EN_COLA = 1
+REBOTE_ACCIONES_S = 2.0
+
+
+class Muestreador:
+    """
+    Cada `periodo` s: sensor.vaciar_fifo() -> grabador (opcional) -> motor.agregar()
+    -> al_detectar(deteccion) por cada gesto. `al_detectar` no debe bloquear.
+    """
+
+    def __init__(self, sensor, motor, al_detectar, periodo=PERIODO_MUESTREO_S, grabador=None):
+        self.sensor = sensor
+        self.motor = motor
+        self.al_detectar = al_detectar
+        self.periodo = periodo
+        self.grabador = grabador
+        self.vueltas = 0
+        self.atrasos = 0          # Vueltas que empezaron tarde (se saltan los plazos perdidos)
+        self.errores = 0
+        self.retraso_max = 0.0
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name="muestreo", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self, timeout=1.0):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def _vuelta(self):
+        tiempos, muestras = self.sensor.vaciar_fifo()
+        if self.grabador is not None:
+            self.grabador.agregar(tiempos, muestras)
+        for deteccion in self.motor.agregar(tiempos, muestras):
+            self.al_detectar(deteccion)
+
+    def _bucle(self):
+        plazo = time.monotonic()
+        while not self._parar.is_set():
+            retraso = time.monotonic() - plazo
+            self.retraso_max = max(self.retraso_max, retraso)
+            try:
+                self._vuelta()
+            except Exception as e:
+                # Un error de I2C suelto no mata el muestreo
+                self.errores += 1
+                print(f"❌ Error leyendo el sensor: {e}")
+            self.vueltas += 1
+
+            plazo += self.periodo
+            espera = plazo - time.monotonic()
+            if espera < 0:
+                # Nos pasamos de uno o más plazos: seguimos desde ahora, sin ráfagas de recuperación
+                self.atrasos += 1
+                plazo = time.monotonic()
+                continue
+            self._parar.wait(espera)
+
+
+class ColaAcciones:
+    """
+    Worker con cola acotada. `ofrecer(evento)` vuelve al toque (True si se
+    aceptó); `manejar(evento)` corre en el hilo del worker. El evento debe
+    tener `.nombre` (para el rebote), como las Deteccion del motor de gestos.
+    """
+
+    def __init__(self, manejar, maximo=MAX_ACCIONES_EN_COLA, rebote_s=REBOTE_ACCIONES_S, politica="descartar_nuevo"):
+        if politica not in ("descartar_nuevo", "reemplazar"):
+            raise ValueError(f"Política de cola desconocida: {politica}")
+        self.manejar = manejar
+        self.rebote_s = rebote_s
+        self.politica = politica
+        self.aceptados = 0
+        self.por_rebote = 0
+        self.por_cola_llena = 0
+        self.reemplazados = 0
+        self._cola = queue.Queue(maxsize=maximo)
+        self._ultimo = {}   # nombre -> time.monotonic() del último aceptado
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name="acciones", daemon=True)
+        self._hilo.start()
+        return self
+
+    def ofrecer(self, evento):
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._ultimo.get(evento.nombre, float("-inf")) < self.rebote_s:
+                self.por_rebote += 1
+                return False
+            try:
+                self._cola.put_nowait(evento)
+            except queue.Full:
+                if self.politica == "descartar_nuevo":
+                    self.por_cola_llena += 1
+                    return False
+                try:
+                    self._cola.get_nowait()
+                    self.reemplazados += 1
+                except queue.Empty:
+                    pass  # El worker lo tomó justo ahora
+                self._cola.put_nowait(evento)
+            self._ultimo[evento.nombre] = ahora
+            self.aceptados += 1
+            return True
+
+    def _bucle(self):
+        while True:
+            evento = self._cola.get()
+            try:
+                self.manejar(evento)
+            except Exception as e:
+                print(f"❌ Error en la acción '{evento.nombre}': {e}")
+
+    def resumen(self):
+        return (f"{self.aceptados} aceptadas, {self.por_rebote} por rebote, "
+                f"{self.por_cola_llena} con la cola llena, {self.reemplazados} reemplazadas")
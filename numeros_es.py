@@ -0,0 +1,230 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+# --- 🔢 NÚMEROS EN ESPAÑOL ---
+# Todo se arma como lista de palabras para poder concatenar clips de audio
+# palabra por palabra (anunciador) o unirlas en un texto.
+
+UNIDADES = [
+    "cero", "uno", "dos", "tres", "cuatro", "cinco", "seis", "siete", "ocho", "nueve",
+    "diez", "once", "doce", "trece", "catorce", "quince",
+    "dieciséis", "diecisiete", "dieciocho", "diecinueve",
+    "veinte", "veintiuno", "veintidós", "veintitrés", "veinticuatro",
+    "veinticinco", "veintiséis", "veintisiete", "veintiocho", "veintinueve",
+]
+DECENAS = {
+    3: "treinta", 4: "cuarenta", 5: "cincuenta", 6: "sesenta",
+    7: "setenta", 8: "ochenta", 9: "noventa",
+}
+CENTENAS = {
+    1: "ciento", 2: "doscientos", 3: "trescientos", 4: "cuatrocientos", 5: "quinientos",
+    6: "seiscientos", 7: "setecientos", 8: "ochocientos", 9: "novecientos",
+}
+# Delante de un sustantivo masculino: "un sol", "veintiún soles", "treinta y un céntimos"
+APOCOPE = {"uno": "un", "veintiuno": "veintiún"}
+
+MAXIMO = 999_999
+
+
+def _hasta_999(n):
+    palabras = []
+    centena, resto = divmod(n, 100)
+    if centena:
+        palabras.append("cien" if n == 100 else CENTENAS[centena])
+    if resto >= 30:
+        decena, unidad = divmod(resto, 10)
+        palabras.append(DECENAS[decena])
+        if unidad:
+            palabras += ["y", UNIDADES[unidad]]
+    elif resto or not centena:
+        palabras.append(UNIDADES[resto])
+    return palabras
+
+
+def _apocopar(palabras):
+    if palabras and palabras[-1] in APOCOPE:
+        palabras[-1] = APOCOPE[palabras[-1]]
+    return palabras
+
+
+def entero_a_palabras(n, apocope=False):
+    """
+    0..999999 en palabras. `apocope=True` cuando el número va antes de
+    un sustantivo masculino (soles, céntimos): "uno" -> "un".
+    """
+    if not 0 <= n <= MAXIMO:
+        raise ValueError(f"Número fuera de rango: {n}")
+    miles, resto = divmod(n, 1000)
+    palabras = []
+    if miles:
+        # "mil", "dos mil", "veintiún mil"
+        if miles > 1:
+            palabras += _apocopar(_hasta_999(miles))
+        palabras.append("mil")
+    if resto or not miles:
+        palabras += _hasta_999(resto)
+    return _apocopar(palabras) if apocope else palabras
+
+
+def partir_monto(monto):
+    """Devuelve (soles, céntimos) como enteros, redondeando al céntimo."""
+    try:
+        valor = Decimal(str(monto)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"Monto inválido: {monto}")
+    if valor < 0:
+        raise ValueError(f"Monto negativo: {monto}")
+    soles = int(valor)
+    centimos = int((valor - soles) * 100)
+    return soles, centimos
+
+
+def monto_a_palabras(monto):
+    """
+    35.5 -> ["treinta", "y", "cinco", "soles", "con", "cincuenta", "céntimos"]
+    1    -> ["un", "sol"]      0.2 -> ["veinte", "céntimos"]
+    """
+    soles, centimos = partir_monto(monto)
+    palabras = []
+    if soles or not centimos:
+        palabras += entero_a_palabras(soles, apocope=True)
+        palabras.append("sol" if soles == 1 else "soles")
+    if centimos:
+        if soles:
+            palabras.append("con")
+        palabras += entero_a_palabras(centimos, apocope=True)
+        palabras.append("céntimo" if centimos == 1 else "céntimos")
+    return palabras
+
+
+def vocabulario_montos():
+    """Todas las palabras que puede producir `monto_a_palabras` (para pregrabar clips)."""
+    palabras = set(UNIDADES) | set(DECENAS.values()) | set(CENTENAS.values())
+    palabras |= set(APOCOPE.values())
+    palabras |= {"y", "cien", "mil", "sol", "soles", "con", "céntimo", "céntimos"}
+    return sorted(palabras)
+
+
+# --- 🔤 DE PALABRAS A NÚMERO (lo que dice el niño) ---
+
+_VALOR_UNIDAD = {p: i for i, p in enumerate(UNIDADES)}
+_VALOR_UNIDAD.update({"un": 1, "una": 1, "veintiun": 21, "veintiuna": 21})
+_VALOR_DECENA = {p: d * 10 for d, p in DECENAS.items()}
+_VALOR_CENTENA = {p: c * 100 for c, p in CENTENAS.items()}
+_VALOR_CENTENA.update({"cien": 100, "quinientas": 500, "doscientas": 200, "trescientas": 300})
+
+MILES = re.compile(r"\d{1,3}(?:[.,]\d{3})+")
+DECIMALES = re.compile(r"\d+(?:[.,]\d{1,2})?")
+
+PALABRAS_SOL = {"sol", "soles", "luca", "lucas"}
+PALABRAS_CENTIMO = {"centimo", "centimos", "centavo", "centavos", "cents"}
+
+
+def _sin_tilde(palabra):
+    return (palabra.replace("á", "a").replace("é", "e").replace("í", "i")
+            .replace("ó", "o").replace("ú", "u"))
+
+
+_VALOR_UNIDAD.update({_sin_tilde(p): v for p, v in list(_VALOR_UNIDAD.items())})
+
+
+def _hasta_999_desde(tokens, i):
+    """Lee un número 0..999 desde tokens[i]. Devuelve (valor, siguiente_i) o (None, i)."""
+    valor, inicio = 0, i
+    if i < len(tokens) and tokens[i] in _VALOR_CENTENA:
+        valor += _VALOR_CENTENA[tokens[i]]
+        i += 1
+    if i < len(tokens) and tokens[i] in _VALOR_DECENA:
+        valor += _VALOR_DECENA[tokens[i]]
+        i += 1
+        if (i + 1 < len(tokens) and tokens[i] == "y"
+                and tokens[i + 1] in _VALOR_UNIDAD and 0 < _VALOR_UNIDAD[tokens[i + 1]] < 10):
+            valor += _VALOR_UNIDAD[tokens[i + 1]]
+            i += 2
+    elif i < len(tokens) and tokens[i] in _VALOR_UNIDAD and (valor == 0 or _VALOR_UNIDAD[tokens[i]]):
+        valor += _VALOR_UNIDAD[tokens[i]]
+        i += 1
+    return (valor, i) if i > inicio else (None, inicio)
+
+
+def leer_entero(tokens, i):
+    """
+    Lee un entero escrito en palabras o cifras desde tokens[i].
+    "ciento veinte" -> 120, "dos mil quinientos" -> 2500, "15" -> 15.
+    Devuelve (valor, siguiente_i) o (None, i).
+    """
+    if i < len(tokens) and tokens[i].isdigit():
+        return int(tokens[i]), i + 1
+    valor, j = _hasta_999_desde(tokens, i)
+    if j < len(tokens) and tokens[j] == "mil":
+        miles = valor if valor is not None else 1
+        resto, k = _hasta_999_desde(tokens, j + 1)
+        return miles * 1000 + (resto or 0), k
+    return valor, j
+
+
+def leer_monto(tokens, i=0):
+    """
+    Busca el primer monto desde tokens[i] (tokens en minúscula y sin tildes).
+    Entiende: "3.50", "1.000", "dos soles", "uno veinte" (= 1.20), "un sol con cincuenta",
+    "cinco soles con veinte centimos", "cincuenta centimos", "sol y medio".
+    Devuelve (monto, inicio, fin) con fin exclusivo, o (None, None, None).
+    """
+    for inicio in range(i, len(tokens)):
+        token = tokens[inicio]
+        # "sol y medio" (sin número delante)
+        if token == "sol" and tokens[inicio + 1:inicio + 3] in (["y", "medio"], ["y", "media"]):
+            return 1.5, inicio, inicio + 3
+        if token[0].isdigit():
+            # Miles: "1.000", "2,500", "1.000.000" (los céntimos nunca traen tres cifras)
+            if MILES.fullmatch(token):
+                entero = int(token.replace(".", "").replace(",", ""))
+            # Cifras con decimales: "3.50" o "3,50"
+            elif DECIMALES.fullmatch(token):
+                entero = float(token.replace(",", "."))
+            else:
+                # "1.5.3", "3.5000": mejor no adivinar un monto
+                return None, None, None
+            fin = inicio + 1
+        else:
+            entero, fin = leer_entero(tokens, inicio)
+            if entero is None:
+                continue
+
+        # "... centimos" solos: 50 centimos -> 0.50
+        if fin < len(tokens) and tokens[fin] in PALABRAS_CENTIMO:
+            return round(entero / 100, 2), inicio, fin + 1
+
+        soles = entero
+        con_moneda = fin < len(tokens) and tokens[fin] in PALABRAS_SOL
+        if con_moneda:
+            fin += 1
+        # "y medio" / "y media"
+        if fin + 1 < len(tokens) and tokens[fin] == "y" and tokens[fin + 1] in ("medio", "media"):
+            return soles + 0.5, inicio, fin + 2
+        # Céntimos: "con cincuenta", "veinte" pegado ("uno veinte"), "con 50 centimos"
+        j = fin + 1 if fin < len(tokens) and tokens[fin] == "con" else fin
+        centimos, k = leer_entero(tokens, j)
+        if centimos is not None and 0 < centimos < 100 and float(soles).is_integer():
+            if k < len(tokens) and tokens[k] in PALABRAS_CENTIMO:
+                k += 1
+            return round(soles + centimos / 100, 2), inicio, k
+        if not con_moneda and tokens[inicio:fin] in (["un"], ["una"]):
+            continue  # Artículo, no monto: "crea UNA meta"
+        return float(soles), inicio, fin
+    return None, None, None
+
+
+def monto_a_voz(monto):
+    """
+    Formato de las reglas del system prompt (lo que lee bien el TTS):
+    1 -> "1 sol", 1.2 -> "1 sol con 20 céntimos", 5.5 -> "5 soles con 50 céntimos",
+    0.2 -> "20 céntimos".
+    """
+    soles, centimos = partir_monto(monto)
+    partes = []
+    if soles or not centimos:
+        partes.append(f"{soles} {'sol' if soles == 1 else 'soles'}")
+    if centimos:
+        partes.append(f"{centimos} {'céntimo' if centimos == 1 else 'céntimos'}")
+    return " con ".join(partes)
@@ -0,0 +1,229 @@
+import os
+import queue
+import asyncio
+import itertools
+import threading
+import sounddevice as sd
+from dotenv import load_dotenv
+from voz import ControlReproduccion
+
+load_dotenv()
+
+# --- 🎚️ PLANIFICADOR DE AUDIO (una sola salida, con prioridades) ---
+# Todo lo que suena pasa por aquí: respuestas de la conversación y anuncios
+# del realtime. Un hilo reproduce en orden de prioridad; quien encola no se
+# bloquea (el callback del realtime vuelve en microsegundos).
+#
+# Qué hace un anuncio si la conversación está sonando (POLITICA_ANUNCIOS):
+# - esperar:     suena apenas termine la frase en curso (antes que lo que siga en cola)
+# - atenuar:     suena encima con la conversación bajita (las dos pistas se mezclan
+#                en la salida única; si la salida se cae a mitad del anuncio, ese
+#                anuncio espera a que termine la conversación, como en 'esperar')
+# - interrumpir: corta la conversación y suena ya
+
+POLITICA_ANUNCIOS = os.getenv("POLITICA_ANUNCIOS", "esperar")
+VENTANA_AGRUPADO_S = float(os.getenv("VENTANA_AGRUPADO_S", 1.0))  # Ráfagas de depósitos -> un anuncio
+GANANCIA_ATENUADA = 0.25
+
+PRIORIDAD_ANUNCIO = 0        # Menor número = más urgente
+PRIORIDAD_CONVERSACION = 1
+
+
+class Pedido:
+    __slots__ = ("reproducir", "prioridad", "etiqueta", "control", "al_terminar")
+
+    def __init__(self, reproducir, prioridad, etiqueta="", al_terminar=None):
+        self.reproducir = reproducir      # función(control) que bloquea mientras suena
+        self.prioridad = prioridad
+        self.etiqueta = etiqueta
+        self.control = ControlReproduccion()
+        self.al_terminar = al_terminar    # función(error o None), desde el hilo de audio
+
+
+class _Grupo:
+    __slots__ = ("datos", "pedido")
+
+    def __init__(self):
+        self.datos = []
+        self.pedido = None
+
+
+class PlanificadorAudio:
+
+    def __init__(self, politica=POLITICA_ANUNCIOS, ventana=VENTANA_AGRUPADO_S):
+        self.politica = politica
+        self.ventana = ventana
+        self._cola = queue.PriorityQueue()   # (prioridad, secuencia, Pedido)
+        self._cola_encima = queue.Queue()    # Anuncios que suenan sobre la conversación atenuada
+        self._secuencia = itertools.count()
+        self._lock = threading.Lock()
+        self._actual = None                  # Pedido sonando en el hilo principal (con _lock)
+        self._encima = None                  # Pedido sonando encima, política 'atenuar' (con _lock)
+        self._grupos = {}                    # clave -> _Grupo todavía sin sonar
+        self._hilos = []
+
+    def iniciar(self):
+        if not self._hilos:
+            for objetivo, nombre in ((self._bucle, "audio"), (self._bucle_encima, "audio-encima")):
+                hilo = threading.Thread(target=objetivo, name=nombre, daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+        return self
+
+    # --- Encolar ---
+
+    def encolar(self, reproducir, prioridad=PRIORIDAD_CONVERSACION, etiqueta="", al_terminar=None):
+        pedido = Pedido(reproducir, prioridad, etiqueta, al_terminar=al_terminar)
+        self._cola.put((prioridad, next(self._secuencia), pedido))
+        return pedido
+
+    def encolar_async(self, reproducir, prioridad=PRIORIDAD_CONVERSACION, etiqueta=""):
+        """Como encolar, pero devuelve un futuro del loop que se resuelve al terminar de sonar."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+
+        def resolver(error):
+            if futuro.done():
+                return
+            if error is None:
+                futuro.set_result(None)
+            else:
+                futuro.set_exception(error)
+
+        pedido = self.encolar(
+            reproducir, prioridad, etiqueta,
+            al_terminar=lambda error: loop.call_soon_threadsafe(resolver, error),
+        )
+        # Si el turno se cancela, lo que iba a decir ya no tiene sentido
+        futuro.add_done_callback(lambda f: f.cancelled() and pedido.control.interrumpir())
+        return futuro
+
+    def anunciar(self, clave, dato, armar):
+        """
+        Anuncio agrupable (ej: depósitos). Los `dato` con la misma `clave` que
+        lleguen dentro de la ventana, o mientras el anuncio espera turno, se
+        juntan: `armar(datos, control)` reproduce UN anuncio para todos.
+        La ventana corre en un Timer, no en el hilo de audio: lo que ya está en
+        cola suena mientras tanto. Se puede llamar desde el callback del realtime.
+        """
+        with self._lock:
+            grupo = self._grupos.get(clave)
+            if grupo is not None:
+                grupo.datos.append(dato)
+                return grupo.pedido
+            grupo = _Grupo()
+            grupo.datos.append(dato)
+            self._grupos[clave] = grupo
+
+        def reproducir(control):
+            # Desde aquí los nuevos datos abren otro grupo
+            with self._lock:
+                if clave in self._grupos and self._grupos[clave] is grupo:
+                    del self._grupos[clave]
+            armar(grupo.datos, control)
+
+        pedido = Pedido(reproducir, PRIORIDAD_ANUNCIO, clave)
+        grupo.pedido = pedido
+        if self.ventana > 0:
+            temporizador = threading.Timer(self.ventana, self._encolar_anuncio, args=(pedido,))
+            temporizador.daemon = True
+            temporizador.start()
+        else:
+            self._encolar_anuncio(pedido)
+        return pedido
+
+    def _encolar_anuncio(self, pedido):
+        """Al cerrarse la ventana: decide según la política con lo que suena en ese momento."""
+        with self._lock:
+            actual, encima = self._actual, self._encima
+        conversando = actual is not None and actual.prioridad > PRIORIDAD_ANUNCIO
+        if conversando and self.politica == "atenuar" and encima is None:
+            self._cola_encima.put(pedido)
+            return
+        if conversando and self.politica == "interrumpir":
+            actual.control.interrumpir()
+        self._cola.put((PRIORIDAD_ANUNCIO, next(self._secuencia), pedido))
+
+    def cortar_conversacion(self):
+        """
+        Barge-in: silencia la conversación que suena y descarta la que espera en
+        cola (los anuncios siguen). Solo marca controles: se puede llamar desde
+        cualquier hilo y la salida saca la pista en su bloque siguiente.
+        """
+        with self._cola.mutex:
+            pedidos = [p for _, _, p in self._cola.queue if p.prioridad == PRIORIDAD_CONVERSACION]
+        with self._lock:
+            actual = self._actual
+        if actual is not None and actual.prioridad == PRIORIDAD_CONVERSACION:
+            pedidos.append(actual)
+        for pedido in pedidos:
+            pedido.control.interrumpir()
+        return len(pedidos)
+
+    # --- Hilos de reproducción ---
+
+    @staticmethod
+    def _ejecutar(pedido):
+        error = None
+        try:
+            if not pedido.control.detener.is_set():
+                pedido.reproducir(pedido.control)
+        except Exception as e:
+            print(f"❌ Error reproduciendo '{pedido.etiqueta}': {e}")
+            error = e
+        finally:
+            if pedido.al_terminar is not None:
+                pedido.al_terminar(error)
+        return error
+
+    def _bucle(self):
+        while True:
+            _, _, pedido = self._cola.get()
+            with self._lock:
+                self._actual = pedido
+                if self._encima is not None:
+                    pedido.control.ganancia = GANANCIA_ATENUADA
+            try:
+                self._ejecutar(pedido)
+            finally:
+                with self._lock:
+                    self._actual = None
+
+    def _bucle_encima(self):
+        while True:
+            pedido = self._cola_encima.get()
+            with self._lock:
+                self._encima = pedido
+                if self._actual is not None:
+                    self._actual.control.ganancia = GANANCIA_ATENUADA
+            error = None
+            try:
+                pedido.reproducir(pedido.control)
+            except sd.PortAudioError:
+                # Se cayó la salida a mitad del anuncio: este espera su turno (los
+                # siguientes vuelven a intentar encima, la salida se reabre sola)
+                print(f"⚠️ No se pudo atenuar; '{pedido.etiqueta}' sonará al terminar la conversación.")
+                self._cola.put((PRIORIDAD_ANUNCIO, next(self._secuencia), pedido))
+                continue
+            except Exception as e:
+                print(f"❌ Error reproduciendo '{pedido.etiqueta}': {e}")
+                error = e
+            finally:
+                with self._lock:
+                    self._encima = None
+                    if self._actual is not None:
+                        self._actual.control.ganancia = 1.0
+            if pedido.al_terminar is not None:
+                pedido.al_terminar(error)
+
+
+_planificador = None
+_lock_planificador = threading.Lock()
+
+def obtener_planificador():
+    """El planificador del proceso (arranca sus hilos la primera vez)."""
+    global _planificador
+    with _lock_planificador:
+        if _planificador is None:
+            _planificador = PlanificadorAudio().iniciar()
+        return _planificador
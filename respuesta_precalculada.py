@@ -0,0 +1,125 @@
+import time
+import threading
+
+# --- ⚡ RESPUESTA PRECALCULADA (doble-shake) ---
+# "¿Cuál fue mi último movimiento?" solo cambia cuando entra una fila nueva
+# en `movimientos`. Un hilo la recalcula (API -> frase -> PCM) apenas avisa
+# el realtime y la deja lista; el sacudón solo le da play.
+# Nunca se sirve una respuesta vieja: si hay un movimiento que todavía no
+# está calculado, se espera un poco al cálculo en curso y si no, falla
+# (quien llama hace el camino normal).
+
+TTL_PRECALCULO_S = 600     # Aunque el realtime se caiga, no servimos algo de hace más de 10 min
+ESPERA_MAX_S = 1.5         # Con el cálculo en vuelo, conviene esperarlo antes que empezar de cero
+REINTENTO_S = 30.0         # Si el cálculo falla (API caída), se reintenta solo
+
+
+class RespuestaLista:
+    __slots__ = ("frase", "pcm", "fs", "version", "t_lista")
+
+    def __init__(self, frase, pcm, fs, version, t_lista):
+        self.frase = frase
+        self.pcm = pcm
+        self.fs = fs
+        self.version = version
+        self.t_lista = t_lista
+
+
+class RespuestaPrecalculada:
+    """
+    `calcular()` -> (frase, pcm, fs), o excepción si no se pudo (no se guarda nada).
+    `invalidar()` desde el callback del realtime; `obtener()` desde el sacudón.
+    """
+
+    def __init__(self, calcular, ttl=TTL_PRECALCULO_S, espera_max=ESPERA_MAX_S):
+        self.calcular = calcular
+        self.ttl = ttl
+        self.espera_max = espera_max
+        self._cond = threading.Condition()
+        self._version = 0
+        self._lista = None
+        self._t_sucia = None        # Primer movimiento todavía sin respuesta calculada
+        self._hilo = None
+        # Métricas
+        self.aciertos = 0
+        self.aciertos_con_espera = 0
+        self.fallos_obsoleta = 0    # Había respuesta, pero de antes del último movimiento (o vencida)
+        self.fallos_sin_respuesta = 0
+        self.recalculos = 0
+        self.antiguedades = []      # Edad de cada respuesta servida (s)
+        self.retrasos = []          # Movimiento -> respuesta lista (s)
+
+    def iniciar(self):
+        """Arranca el hilo, que de entrada calcula la primera respuesta."""
+        self._t_sucia = time.monotonic()
+        self._hilo = threading.Thread(target=self._bucle, name="precalculo", daemon=True)
+        self._hilo.start()
+        return self
+
+    def invalidar(self):
+        """Llegó un movimiento: la respuesta actual ya no vale. Solo toma un lock."""
+        with self._cond:
+            self._version += 1
+            if self._t_sucia is None:
+                self._t_sucia = time.monotonic()
+            self._cond.notify_all()
+
+    def _vigente(self):
+        lista = self._lista
+        return (lista is not None and lista.version == self._version
+                and time.monotonic() - lista.t_lista < self.ttl)
+
+    def obtener(self):
+        """La RespuestaLista vigente, o None (fallo: hay que calcularla en el momento)."""
+        with self._cond:
+            if self._vigente():
+                self.aciertos += 1
+            elif self._cond.wait_for(self._vigente, timeout=self.espera_max):
+                self.aciertos_con_espera += 1
+            else:
+                if self._lista is None:
+                    self.fallos_sin_respuesta += 1
+                else:
+                    self.fallos_obsoleta += 1
+                return None
+            lista = self._lista
+        self.antiguedades.append(time.monotonic() - lista.t_lista)
+        return lista
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while self._vigente():
+                    # Despertamos cuando llegue un movimiento o cuando venza el TTL
+                    self._cond.wait(timeout=max(0.0, self._lista.t_lista + self.ttl - time.monotonic()))
+                version = self._version
+            try:
+                frase, pcm, fs = self.calcular()
+            except Exception as e:
+                print(f"⚠️ No se pudo precalcular la respuesta: {e}")
+                with self._cond:
+                    self._cond.wait_for(lambda: self._version != version, timeout=REINTENTO_S)
+                continue
+            ahora = time.monotonic()
+            with self._cond:
+                self.recalculos += 1
+                self._lista = RespuestaLista(frase, pcm, fs, version, ahora)
+                if version == self._version:
+                    if self._t_sucia is not None:
+                        self.retrasos.append(ahora - self._t_sucia)
+                    self._t_sucia = None
+                self._cond.notify_all()
+
+    def resumen(self):
+        servidas = self.aciertos + self.aciertos_con_espera
+        total = servidas + self.fallos_obsoleta + self.fallos_sin_respuesta
+        partes = [
+            f"{servidas}/{total} al toque ({self.aciertos_con_espera} esperando el cálculo)",
+            f"fallos: {self.fallos_obsoleta} obsoletas, {self.fallos_sin_respuesta} sin respuesta",
+            f"{self.recalculos} recálculos",
+        ]
+        if self.antiguedades:
+            partes.append(f"edad al servir: máx {max(self.antiguedades):.0f} s")
+        if self.retrasos:
+            partes.append(f"movimiento -> lista: {sum(self.retrasos) / len(self.retrasos):.2f} s promedio")
+        return ", ".join(partes)
@@ -0,0 +1,115 @@
+import re
+import asyncio
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageFunctionToolCall
+from openai.types.chat.chat_completion_message_function_tool_call import Function
+
+# --- 🌊 RESPUESTA DE GPT EN STREAMING, FRASE POR FRASE ---
+# En vez de esperar la respuesta completa, cortamos el texto en oraciones a
+# medida que llega y cada una va al TTS apenas se cierra. El niño escucha la
+# primera frase mientras gpt-4o todavía escribe la segunda.
+
+# Fin de oración: . ! ? … (y cierres de comillas/paréntesis) seguido de espacio.
+# "1.20" no corta porque después del punto no hay espacio.
+FIN_DE_FRASE = re.compile(r'[.!?…]+["\')\]]*\s+')
+MIN_CARACTERES = 12  # "¡Oink!" suelto se junta con la siguiente: una petición TTS menos
+
+
+class DivisorFrases:
+    """Acumula pedazos de texto (deltas del stream) y suelta oraciones completas."""
+
+    def __init__(self, min_caracteres=MIN_CARACTERES):
+        self.min_caracteres = min_caracteres
+        self._pendiente = ""
+
+    def agregar(self, fragmento):
+        self._pendiente += fragmento
+        frases, inicio = [], 0
+        for fin in FIN_DE_FRASE.finditer(self._pendiente):
+            frase = self._pendiente[inicio:fin.end()].strip()
+            if len(frase) >= self.min_caracteres:
+                frases.append(frase)
+                inicio = fin.end()
+        self._pendiente = self._pendiente[inicio:]
+        return frases
+
+    def cerrar(self):
+        resto, self._pendiente = self._pendiente.strip(), ""
+        return [resto] if resto else []
+
+
+def dividir_frases(fragmentos, min_caracteres=MIN_CARACTERES):
+    """Versión generador de DivisorFrases, para texto que ya está entero o es iterable."""
+    divisor = DivisorFrases(min_caracteres)
+    for fragmento in fragmentos:
+        yield from divisor.agregar(fragmento)
+    yield from divisor.cerrar()
+
+
+async def dividir_frases_async(fragmentos, min_caracteres=MIN_CARACTERES):
+    divisor = DivisorFrases(min_caracteres)
+    async for fragmento in fragmentos:
+        for frase in divisor.agregar(fragmento):
+            yield frase
+    for frase in divisor.cerrar():
+        yield frase
+
+
+class ChatEnStreaming:
+    """
+    Envuelve `await chat.completions.create(stream=True)` de AsyncOpenAI.
+    `fragmentos()` entrega el texto a medida que llega y de paso arma las
+    tool_calls; al agotarse, `mensaje()` devuelve el mismo ChatCompletionMessage
+    que la llamada normal.
+    """
+
+    def __init__(self, client, **kwargs):
+        self._client = client
+        self._kwargs = kwargs
+        self._stream = None
+        self._chunks = None  # Un solo iterador: fragmentos() y mensaje() siguen donde quedó el otro
+        self.texto = ""
+        self._tool_calls = {}  # índice -> {"id", "name", "arguments"}
+
+    async def fragmentos(self):
+        if self._chunks is None:
+            self._stream = await self._client.chat.completions.create(stream=True, **self._kwargs)
+            self._chunks = aiter(self._stream)
+        try:
+            async for chunk in self._chunks:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                # Las tool_calls llegan por pedazos: id y nombre primero, los argumentos a trozos
+                for parcial in delta.tool_calls or []:
+                    llamada = self._tool_calls.setdefault(parcial.index, {"id": "", "name": "", "arguments": ""})
+                    if parcial.id:
+                        llamada["id"] = parcial.id
+                    if parcial.function is not None:
+                        llamada["name"] += parcial.function.name or ""
+                        llamada["arguments"] += parcial.function.arguments or ""
+                if delta.content:
+                    self.texto += delta.content
+                    yield delta.content
+        except asyncio.CancelledError:
+            # Turno cortado (barge-in): soltamos la conexión ya, no cuando la junte el GC
+            await self.cerrar()
+            raise
+
+    async def cerrar(self):
+        if self._stream is not None:
+            await self._stream.close()
+
+    async def mensaje(self):
+        # Por si nadie consumió el stream (ej: solo había tool_calls)
+        async for _ in self.fragmentos():
+            pass
+        tool_calls = [
+            ChatCompletionMessageFunctionToolCall(
+                id=llamada["id"], type="function",
+                function=Function(name=llamada["name"], arguments=llamada["arguments"] or "{}"),
+            )
+            for _, llamada in sorted(self._tool_calls.items())
+        ]
+        return ChatCompletionMessage(
+            role="assistant", content=self.texto or None, tool_calls=tool_calls or None
+        )
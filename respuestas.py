@@ -0,0 +1,142 @@
+import os
+import json
+from numeros_es import monto_a_voz
+from indice_metas import sin_tildes
+
+# --- 💬 RESPUESTAS CON PLANTILLA (sin segunda llamada a GPT) ---
+# Cada resultado de tool tiene su frase fija siguiendo las reglas de voz del
+# system prompt. Si el JSON no trae lo que esperamos, se devuelve None y el
+# llamador usa el LLM como antes.
+
+RESPUESTAS_LLM = os.getenv("RESPUESTAS_LLM", "0") == "1"  # 1 = siempre redacta GPT
+
+# Valores de movimientos.tipo (sin tildes); con otro tipo, el signo del monto decide
+TIPOS_INGRESO = {"ingreso", "deposito", "entrada", "abono"}
+TIPOS_GASTO = {"gasto", "egreso", "salida", "retiro", "cargo"}
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _enumerar(nombres):
+    nombres = [n for n in nombres if n]
+    if len(nombres) <= 1:
+        return "".join(nombres)
+    return ", ".join(nombres[:-1]) + " y " + nombres[-1]
+
+
+def _cargar(resultado):
+    if isinstance(resultado, (dict, list)):
+        return resultado
+    try:
+        return json.loads(resultado)
+    except (TypeError, ValueError):
+        return None
+
+
+def meta_creada(argumentos, datos):
+    if not isinstance(datos, dict):
+        return None
+    if "error" in datos:
+        return "¡Oink! No pude crear la meta, probemos otra vez."
+    monto, motivo = _numero(argumentos.get("monto")), argumentos.get("motivo")
+    if monto is None or not motivo:
+        return "¡Genial! Meta creada. ¡A juntar esos soles!"
+    return f"¡Genial! Meta para {motivo} de {monto_a_voz(monto)} creada. ¡A juntar esos soles!"
+
+
+def dinero_guardado(argumentos, datos):
+    if not isinstance(datos, dict):
+        return None
+    if datos.get("error") == "meta_no_encontrada":
+        disponibles = _enumerar(datos.get("cuentas_disponibles") or [])
+        texto = f"¡Oink! No encontré la meta {argumentos.get('nombre_meta', '')}."
+        return f"{texto} Tus metas son {disponibles}." if disponibles else texto
+    if "error" in datos:
+        return "¡Oink! No pude guardar tu plata, intentemos otra vez."
+    monto = _numero(argumentos.get("monto"))
+    if monto is None:
+        return None
+    # Regla del prompt: al ahorrar NO se dice el saldo total. El nombre es el de
+    # la meta encontrada (lo pone la tool), no la frase tal cual la dijo el niño
+    meta = datos.get("meta_descripcion")
+    return f"¡Oink! Guardado {monto_a_voz(monto)} para {meta}." if meta else f"¡Oink! Guardado {monto_a_voz(monto)}."
+
+
+def resumen_saldo(argumentos, datos):
+    """Gran total primero, luego 'para gastar' y el resto agrupado en 'ahorros'."""
+    if not isinstance(datos, dict):
+        return None
+    if "error" in datos:
+        return "¡Oink! No pude revisar tu alcancía ahora."
+    cuentas = datos.get("mis_cuentas")
+    if not cuentas:
+        return None
+    saldos = [_numero(c.get("saldo_actual")) for c in cuentas]
+    if any(s is None for s in saldos):
+        return None
+    total = sum(saldos)
+    # La cuenta 'simple' (sin meta_descripcion) es la de gastar
+    para_gastar = sum(s for c, s in zip(cuentas, saldos) if not c.get("meta_descripcion"))
+    ahorros = total - para_gastar
+    texto = f"¡Oink! Tienes {monto_a_voz(total)} en total."
+    if ahorros > 0 and para_gastar > 0:
+        texto += f" {monto_a_voz(para_gastar)} para gastar y {monto_a_voz(ahorros)} en ahorros."
+    elif ahorros > 0:
+        texto += " ¡Todo está en tus ahorros!"
+    return texto
+
+
+def ultimo_movimiento(datos):
+    """
+    Para el doble-shake (mpu_test). last-transaction devuelve la fila de
+    'movimientos' ('tipo, monto, descripcion'), suelta o como lista.
+    """
+    if isinstance(datos, list):
+        datos = datos[0] if datos else None
+    if not isinstance(datos, dict):
+        return None
+    monto = _numero(datos.get("monto"))
+    if monto is None:
+        return None
+    detalle = f" en {datos['descripcion']}" if datos.get("descripcion") else ""
+    tipo = sin_tildes(str(datos.get("tipo") or "").strip().lower())
+    if tipo in TIPOS_INGRESO:
+        return f"¡Oink! Tu último movimiento fue un ingreso de {monto_a_voz(abs(monto))}{detalle}. ¡Bien ahí!"
+    if tipo in TIPOS_GASTO or monto < 0:
+        return f"¡Oink! Tu último movimiento fue un gasto de {monto_a_voz(abs(monto))}{detalle}."
+    # Sin saber si entró o salió, no lo inventamos
+    return f"¡Oink! Tu último movimiento fue de {monto_a_voz(abs(monto))}{detalle}."
+
+
+PLANTILLAS = {
+    "crear_meta": meta_creada,
+    "enviar_dinero_a_meta": dinero_guardado,
+    "consultar_ahorros": resumen_saldo,
+}
+
+
+def renderizar_turno(resultados):
+    """
+    `resultados`: lista de (nombre_tool, argumentos, resultado_json) en orden.
+    Devuelve el texto a decir, o None si alguna tool no tiene plantilla aplicable.
+    """
+    if RESPUESTAS_LLM or not resultados:
+        return None
+    frases = []
+    for nombre, argumentos, resultado in resultados:
+        plantilla = PLANTILLAS.get(nombre)
+        datos = _cargar(resultado)
+        if plantilla and isinstance(datos, dict) and datos.get("error") in ("tiempo_agotado", "cancelado"):
+            # El despachador se rindió con esta tool: no sabemos si se hizo, no lo afirmamos
+            frase = f"¡Oink! {datos['mensaje']}"
+        else:
+            frase = plantilla(argumentos or {}, datos) if plantilla else None
+        if frase is None:
+            return None
+        frases.append(frase)
+    return " ".join(frases)
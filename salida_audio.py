@@ -0,0 +1,246 @@
+import os
+import time
+import threading
+import numpy as np
+import sounddevice as sd
+from dotenv import load_dotenv
+from codificacion import Remuestreador
+
+load_dotenv()
+
+# --- 🔊 SALIDA DE AUDIO ÚNICA (un OutputStream abierto todo el rato) ---
+# Abrir el dispositivo en cada frase cuesta latencia y en el parlante USB a
+# veces suena un "pop". Aquí se abre UNA vez a tasa fija y cada cosa que
+# suena es una Pista: su PCM se remuestrea a TASA_SALIDA al escribirlo y el
+# callback mezcla todas las pistas activas, con la ganancia de su control.
+# Cortar una pista (control.detener) la silencia en el bloque siguiente.
+
+TASA_SALIDA = int(os.getenv("TASA_SALIDA", 48000))
+CANALES_SALIDA = int(os.getenv("CANALES_SALIDA", 1))
+BLOQUE_MS = int(os.getenv("BLOQUE_SALIDA_MS", 10))  # Granularidad de mezcla y de corte
+BYTES_POR_MUESTRA = 2
+MARGEN_ESPERA_S = 2.0   # Sobre lo que falta por sonar, antes de dar la salida por colgada
+PASO_ESPERA_S = 0.25    # Cada cuánto se revisa que el stream siga vivo mientras se espera
+
+
+class BufferJitter:
+    """
+    Cola de bytes PCM entre la descarga (hilo principal) y el callback de audio.
+    Espera a tener `prebuffer` bytes antes de sonar y, si se vacía a mitad de frase
+    (la red se atrasó), rellena con silencio y vuelve a juntar colchón.
+    """
+
+    def __init__(self, prebuffer_bytes):
+        self.prebuffer = prebuffer_bytes - prebuffer_bytes % BYTES_POR_MUESTRA
+        self._datos = bytearray()
+        self._lock = threading.Lock()
+        self._fin = False
+        self._sonando = False
+        self.t_primer_audio = None
+        self.vaciados = 0  # Underruns (veces que nos quedamos sin audio a mitad de frase)
+
+    def escribir(self, chunk):
+        with self._lock:
+            self._datos += chunk
+
+    def terminar(self):
+        with self._lock:
+            self._fin = True
+
+    def pendiente(self):
+        with self._lock:
+            return len(self._datos)
+
+    def agotado(self):
+        with self._lock:
+            return self._fin and len(self._datos) < BYTES_POR_MUESTRA
+
+    def leer(self, destino):
+        """Copia a `destino` (buffer de salida) lo disponible y rellena con ceros."""
+        with self._lock:
+            if not self._sonando and (self._fin or len(self._datos) >= self.prebuffer):
+                self._sonando = True
+            n = 0
+            if self._sonando:
+                n = min(len(destino), len(self._datos) - len(self._datos) % BYTES_POR_MUESTRA)
+                destino[:n] = self._datos[:n]
+                del self._datos[:n]
+                if n and self.t_primer_audio is None:
+                    self.t_primer_audio = time.perf_counter()
+                if n < len(destino) and not self._fin:
+                    self.vaciados += 1
+                    self._sonando = False
+        destino[n:] = bytes(len(destino) - n)
+        return n
+
+
+class Pista:
+    """
+    PCM int16 mono a `fs` que se va escribiendo (de a chunks o de una vez).
+    `control` es un voz.ControlReproduccion: detener y ganancia.
+    """
+
+    def __init__(self, control, fs, tasa_salida, prebuffer_ms=0, salida=None):
+        self.control = control
+        self.tasa_salida = tasa_salida
+        self._salida = salida
+        self.buffer = BufferJitter(tasa_salida * BYTES_POR_MUESTRA * prebuffer_ms // 1000)
+        self.terminada = threading.Event()
+        self._remuestreador = Remuestreador(fs, tasa_salida) if fs != tasa_salida else None
+        self._resto = b""  # Byte suelto si un chunk de red corta una muestra a la mitad
+        self._scratch = bytearray()
+
+    @property
+    def t_primer_audio(self):
+        return self.buffer.t_primer_audio
+
+    @property
+    def vaciados(self):
+        return self.buffer.vaciados
+
+    def escribir(self, pcm):
+        """`pcm`: bytes int16 little-endian o array int16."""
+        if isinstance(pcm, np.ndarray):
+            muestras = np.ascontiguousarray(pcm, dtype=np.int16).reshape(-1)
+        else:
+            datos = self._resto + bytes(pcm)
+            corte = len(datos) - len(datos) % BYTES_POR_MUESTRA
+            muestras, self._resto = np.frombuffer(datos[:corte], dtype=np.int16), datos[corte:]
+        if self._remuestreador is not None:
+            muestras = self._remuestreador.procesar(muestras)
+        self.buffer.escribir(muestras.tobytes())
+
+    def terminar(self):
+        if self._remuestreador is not None:
+            self.buffer.escribir(self._remuestreador.procesar(np.zeros(0, dtype=np.int16), final=True).tobytes())
+        self.buffer.terminar()
+
+    def esperar(self, timeout=None):
+        """
+        Bloquea hasta que termine de sonar (o la corten). Si el stream se cae
+        (parlante USB desenchufado, error de PortAudio) o no termina en lo que
+        falta por sonar + MARGEN_ESPERA_S, descarta la salida para que se
+        reabra con el próximo audio y lanza sd.PortAudioError.
+        """
+        if timeout is None:
+            timeout = self.buffer.pendiente() / (self.tasa_salida * BYTES_POR_MUESTRA) + MARGEN_ESPERA_S
+        limite = time.monotonic() + timeout
+        while not self.terminada.wait(min(PASO_ESPERA_S, max(0.0, limite - time.monotonic()))):
+            if self._salida is not None and not self._salida.activa():
+                _descartar(self._salida)
+                if self.control.detener.is_set():
+                    return True  # Ya la habían cortado: no hay nada que reclamar
+                raise sd.PortAudioError("La salida de audio se detuvo")
+            if time.monotonic() >= limite:
+                if self._salida is not None:
+                    _descartar(self._salida)
+                raise sd.PortAudioError("La salida de audio no avanza")
+        return True
+
+    def _mezclar_en(self, mezcla):
+        """Desde el callback: suma su bloque a `mezcla`. Devuelve False si ya terminó."""
+        if self.control.detener.is_set():
+            return False
+        bytes_bloque = len(mezcla) * BYTES_POR_MUESTRA
+        if len(self._scratch) != bytes_bloque:
+            self._scratch = bytearray(bytes_bloque)
+        if self.buffer.leer(self._scratch):
+            muestras = np.frombuffer(self._scratch, dtype=np.int16)
+            mezcla += muestras * (self.control.ganancia / 32768.0)
+        return not self.buffer.agotado()
+
+
+class SalidaAudio:
+
+    def __init__(self, tasa=TASA_SALIDA, canales=CANALES_SALIDA, bloque_ms=BLOQUE_MS):
+        self.tasa = tasa
+        self.canales = canales
+        self.bloque = tasa * bloque_ms // 1000
+        self._pistas = ()      # Tupla nueva en cada cambio: el callback la lee sin lock
+        self._lock = threading.Lock()
+        self._stream = None
+        self.underruns = 0
+
+    def iniciar(self):
+        self._stream = sd.OutputStream(
+            samplerate=self.tasa, channels=self.canales, dtype='float32',
+            blocksize=self.bloque, latency='low', callback=self._callback,
+        )
+        self._stream.start()
+        return self
+
+    def activa(self):
+        return self._stream is not None and self._stream.active
+
+    @property
+    def latencia(self):
+        return self._stream.latency if self._stream is not None else 0.0
+
+    def pista(self, control, fs, prebuffer_ms=0):
+        """Nueva Pista que empieza a sonar apenas tenga `prebuffer_ms` de audio."""
+        pista = Pista(control, fs, self.tasa, prebuffer_ms, salida=self)
+        with self._lock:
+            self._pistas = self._pistas + (pista,)
+        return pista
+
+    def reproducir(self, pcm, fs, control):
+        """Atajo para audio que ya está entero en memoria."""
+        pista = self.pista(control, fs)
+        pista.escribir(pcm)
+        pista.terminar()
+        return pista
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.underruns += 1
+        mezcla = np.zeros(frames, dtype=np.float32)
+        terminadas = [p for p in self._pistas if not p._mezclar_en(mezcla)]
+        np.clip(mezcla, -1.0, 1.0, out=mezcla)
+        outdata[:] = mezcla[:, None]
+        if terminadas:
+            with self._lock:
+                self._pistas = tuple(p for p in self._pistas if p not in terminadas)
+            for pista in terminadas:
+                pista.terminada.set()
+
+    def cerrar(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        with self._lock:
+            pistas, self._pistas = self._pistas, ()
+        for pista in pistas:
+            pista.terminada.set()
+
+
+_salida = None
+_lock_salida = threading.Lock()
+
+def obtener_salida():
+    """La salida del proceso; abre el dispositivo la primera vez (o de nuevo si se cayó)."""
+    global _salida
+    with _lock_salida:
+        if _salida is not None and not _salida.activa():
+            _salida.cerrar()
+            _salida = None
+        if _salida is None:
+            _salida = SalidaAudio().iniciar()
+        return _salida
+
+
+def _descartar(salida):
+    """La salida se colgó: se cierra (libera a quien espere) y la próxima se abre de cero."""
+    global _salida
+    with _lock_salida:
+        if _salida is salida:
+            _salida = None
+    salida.cerrar()
+
+
+def abrir_al_arrancar():
+    """Abre el parlante al inicio del programa; si falla, se reintenta con el primer audio."""
+    try:
+        return obtener_salida()
+    except sd.PortAudioError as e:
+        print(f"⚠️ No se pudo abrir la salida de audio: {e}")
+        return None
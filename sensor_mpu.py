@@ -0,0 +1,227 @@
+import time
+import struct
+import numpy as np
+
+# --- 🧭 DRIVER MPU6050: RÁFAGAS I2C Y FIFO ---
+# Antes: dos read_byte_data por eje (6 idas y vueltas por muestra del giroscopio)
+# y sleep(50 ms) entre muestras -> ~20 Hz. Aquí:
+# - leer(): acelerómetro + temperatura + giroscopio en UNA ráfaga de 14 bytes.
+# - vaciar_fifo(): el sensor muestrea solo a TASA_MUESTREO_HZ y guarda en su
+#   FIFO interna; nosotros la vaciamos por lotes cuando queramos.
+# Unidades: acelerómetro en g (±2 g), giroscopio en °/s (±250 °/s, como antes).
+
+ADDR = 0x68
+
+# Registros
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+GYRO_CONFIG = 0x1B
+ACCEL_CONFIG = 0x1C
+FIFO_EN = 0x23
+INT_STATUS = 0x3A
+ACCEL_XOUT_H = 0x3B
+GYRO_XOUT_H = 0x43
+USER_CTRL = 0x6A
+PWR_MGMT_1 = 0x6B
+FIFO_COUNTH = 0x72
+FIFO_R_W = 0x74
+
+# Bits
+FIFO_EN_GIRO = 0x70           # XG | YG | ZG
+FIFO_EN_ACEL = 0x08
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+INT_STATUS_FIFO_OFLOW = 0x10
+DLPF_44HZ = 0x03              # Con filtro pasa bajos el giroscopio entrega 1 kHz
+
+GYRO_SCALE = 131.0            # LSB por °/s en ±250 °/s
+ACCEL_SCALE = 16384.0         # LSB por g en ±2 g
+TASA_INTERNA_HZ = 1000
+TASA_MUESTREO_HZ = 200
+TAMANO_FIFO = 1024
+MAX_BLOQUE_I2C = 32           # Límite de read_i2c_block_data (SMBus)
+
+_RAFAGA = struct.Struct(">7h")  # ax ay az temp gx gy gz
+
+
+class SensorMPU:
+    """
+    `bus` es un smbus2.SMBus (o BusSimulado). Con `con_acelerometro=False`
+    la FIFO guarda solo el giroscopio: 6 bytes por muestra en vez de 12.
+    """
+
+    def __init__(self, bus, direccion=ADDR, tasa_hz=TASA_MUESTREO_HZ, con_acelerometro=False):
+        self.bus = bus
+        self.direccion = direccion
+        self.divisor = max(0, min(255, round(TASA_INTERNA_HZ / tasa_hz) - 1))
+        self.tasa_hz = TASA_INTERNA_HZ / (1 + self.divisor)
+        self.con_acelerometro = con_acelerometro
+        self.bytes_muestra = 12 if con_acelerometro else 6
+        # Leemos la FIFO en bloques de muestras enteras (<= 32 bytes)
+        self._bloque = MAX_BLOQUE_I2C // self.bytes_muestra * self.bytes_muestra
+        escalas = [GYRO_SCALE] * 3
+        if con_acelerometro:
+            escalas = [ACCEL_SCALE] * 3 + escalas
+        self._escalas = np.array(escalas, dtype=np.float32)
+        self.desbordes = 0
+
+    def iniciar(self, fifo=True):
+        escribir = lambda registro, valor: self.bus.write_byte_data(self.direccion, registro, valor)
+        escribir(PWR_MGMT_1, 0)          # Despertar
+        escribir(CONFIG, DLPF_44HZ)
+        escribir(SMPLRT_DIV, self.divisor)
+        escribir(GYRO_CONFIG, 0)         # ±250 °/s
+        escribir(ACCEL_CONFIG, 0)        # ±2 g
+        if fifo:
+            escribir(FIFO_EN, FIFO_EN_GIRO | (FIFO_EN_ACEL if self.con_acelerometro else 0))
+            self.reiniciar_fifo()
+        return self
+
+    # --- Lecturas directas (una ráfaga) ---
+
+    def leer(self):
+        """(aceleración [g] x3, giro [°/s] x3) de una sola transacción de 14 bytes."""
+        ax, ay, az, _, gx, gy, gz = _RAFAGA.unpack(
+            bytes(self.bus.read_i2c_block_data(self.direccion, ACCEL_XOUT_H, 14))
+        )
+        return (
+            (ax / ACCEL_SCALE, ay / ACCEL_SCALE, az / ACCEL_SCALE),
+            (gx / GYRO_SCALE, gy / GYRO_SCALE, gz / GYRO_SCALE),
+        )
+
+    def leer_giro(self):
+        gx, gy, gz = struct.unpack(">3h", bytes(self.bus.read_i2c_block_data(self.direccion, GYRO_XOUT_H, 6)))
+        return gx / GYRO_SCALE, gy / GYRO_SCALE, gz / GYRO_SCALE
+
+    # --- FIFO ---
+
+    def reiniciar_fifo(self):
+        self.bus.write_byte_data(self.direccion, USER_CTRL, USER_CTRL_FIFO_RESET)
+        self.bus.write_byte_data(self.direccion, USER_CTRL, USER_CTRL_FIFO_EN)
+
+    def muestras_en_fifo(self):
+        alto, bajo = self.bus.read_i2c_block_data(self.direccion, FIFO_COUNTH, 2)
+        return ((alto << 8) | bajo) // self.bytes_muestra
+
+    def vaciar_fifo(self):
+        """
+        Devuelve (tiempos, muestras): muestras es (n, 3) de giro en °/s, o
+        (n, 6) con el acelerómetro delante; tiempos son time.monotonic()
+        estimados a partir de la tasa (la última muestra es "ahora").
+        Si la FIFO se desbordó, las muestras vienen corridas: se descartan.
+        """
+        t_ahora = time.monotonic()
+        if self.bus.read_byte_data(self.direccion, INT_STATUS) & INT_STATUS_FIFO_OFLOW:
+            self.desbordes += 1
+            self.reiniciar_fifo()
+            return np.empty(0), np.empty((0, len(self._escalas)), dtype=np.float32)
+
+        restantes = self.muestras_en_fifo() * self.bytes_muestra
+        crudo = bytearray()
+        while restantes > 0:
+            n = min(self._bloque, restantes)
+            crudo += bytes(self.bus.read_i2c_block_data(self.direccion, FIFO_R_W, n))
+            restantes -= n
+
+        # Un solo paso: big-endian int16 -> float escalado
+        muestras = np.frombuffer(crudo, dtype=">i2").reshape(-1, len(self._escalas)) / self._escalas
+        tiempos = t_ahora - np.arange(len(muestras))[::-1] / self.tasa_hz
+        return tiempos, muestras.astype(np.float32)
+
+
+def magnitud_giro(muestras):
+    """|giro| en °/s por muestra (las 3 últimas columnas son el giroscopio)."""
+    giro = muestras[:, -3:]
+    return np.sqrt(np.einsum("ij,ij->i", giro, giro))
+
+
+class BusSimulado:
+    """
+    SMBus de mentira con los registros del MPU6050 que usamos. `senal(t)`
+    devuelve (ax, ay, az, gx, gy, gz) crudos (int16) en el instante t; la FIFO
+    se llena sola a la tasa configurada, como el chip.
+    `tiempo_bus` acumula lo que habrían tardado las transacciones en un bus
+    I2C real (ver costo_transaccion); con `demorar=True` además se espera.
+    """
+
+    T_BYTE_S = 9 / 100_000   # 9 bits por byte a 100 kHz (I2C de la Pi por defecto)
+    OVERHEAD_S = 60e-6       # Syscall + START/STOP por transacción
+
+    def __init__(self, senal=None, demorar=False):
+        self.senal = senal or (lambda t: (0, 0, 16384, 0, 0, 0))
+        self.demorar = demorar
+        self.registros = bytearray(128)
+        self.fifo = bytearray()
+        self.transacciones = 0
+        self.tiempo_bus = 0.0
+        self._t_fifo = None
+
+    def costo_transaccion(self, bytes_datos):
+        # Dirección + registro + dirección de lectura + datos
+        return self.OVERHEAD_S + (3 + bytes_datos) * self.T_BYTE_S
+
+    def _transaccion(self, bytes_datos):
+        costo = self.costo_transaccion(bytes_datos)
+        self.transacciones += 1
+        self.tiempo_bus += costo
+        if self.demorar:
+            time.sleep(costo)
+
+    def _tasa(self):
+        return TASA_INTERNA_HZ / (1 + self.registros[SMPLRT_DIV])
+
+    def _actualizar_fifo(self):
+        if not self.registros[USER_CTRL] & USER_CTRL_FIFO_EN:
+            self._t_fifo = None
+            return
+        ahora = time.monotonic()
+        if self._t_fifo is None:
+            self._t_fifo = ahora
+            return
+        periodo = 1 / self._tasa()
+        habilitado = self.registros[FIFO_EN]
+        while self._t_fifo + periodo <= ahora:
+            self._t_fifo += periodo
+            ax, ay, az, gx, gy, gz = self.senal(self._t_fifo)
+            valores = ((ax, ay, az) if habilitado & FIFO_EN_ACEL else ()) + (gx, gy, gz)
+            muestra = struct.pack(f">{len(valores)}h", *valores)
+            if len(self.fifo) + len(muestra) > TAMANO_FIFO:
+                self.registros[INT_STATUS] |= INT_STATUS_FIFO_OFLOW
+                del self.fifo[:len(muestra)]  # El chip pisa lo más viejo
+            self.fifo += muestra
+
+    def write_byte_data(self, direccion, registro, valor):
+        self._transaccion(1)
+        if registro == USER_CTRL and valor & USER_CTRL_FIFO_RESET:
+            self.fifo.clear()
+            self._t_fifo = None
+            valor &= ~USER_CTRL_FIFO_RESET
+        self._actualizar_fifo()
+        self.registros[registro] = valor
+        self._actualizar_fifo()
+
+    def read_byte_data(self, direccion, registro):
+        return self.read_i2c_block_data(direccion, registro, 1)[0]
+
+    def read_i2c_block_data(self, direccion, registro, largo):
+        if largo > MAX_BLOQUE_I2C:
+            raise ValueError(f"read_i2c_block_data: máximo {MAX_BLOQUE_I2C} bytes")
+        self._transaccion(largo)
+        self._actualizar_fifo()
+        if registro == FIFO_R_W:
+            datos, self.fifo[:largo] = self.fifo[:largo], b""
+            return list(datos)
+        if registro == INT_STATUS:
+            estado, self.registros[INT_STATUS] = self.registros[INT_STATUS], 0  # Se limpia al leer
+            return [estado]
+        if registro == FIFO_COUNTH:
+            return [len(self.fifo) >> 8, len(self.fifo) & 0xFF]
+        if ACCEL_XOUT_H <= registro < ACCEL_XOUT_H + 14:
+            ax, ay, az, gx, gy, gz = self.senal(time.monotonic())
+            crudo = struct.pack(">7h", ax, ay, az, 0, gx, gy, gz)
+            inicio = registro - ACCEL_XOUT_H
+            return list(crudo[inicio:inicio + largo])
+        return list(self.registros[registro:registro + largo])
+
+    def close(self):
+        pass
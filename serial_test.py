@@ -1,6 +1,9 @@
 import serial
 import time
 import os
+import queue
+import atexit
+import threading
 from dotenv import load_dotenv
 
 # Configuración del puerto
@@ -11,25 +14,150 @@ load_dotenv()
 PORT = os.getenv('SERIAL_PORT', '/dev/ttyS0')
 BAUD = int(os.getenv('SERIAL_BAUDRATE', 9600))
 
+# Ventana para juntar cambios de cara seguidos (ej: 1 -> 3 -> 1 en ráfaga = solo "1")
+VENTANA_COALESCENCIA = float(os.getenv('SERIAL_COALESCENCIA_MS', 150)) / 1000
+# El microcontrolador se reinicia al abrir el puerto: esperamos solo UNA vez al conectar
+ESPERA_ARRANQUE = 2.0
+REINTENTO_MAXIMO = 10.0   # Tope (segundos) del backoff de reconexión
+
+_FIN = object()  # Centinela para apagar el hilo escritor
+
+
+class ControladorCara:
+    """
+    Mantiene el puerto serial abierto y escribe las caras desde un hilo propio.
+    - `enviar()` nunca bloquea: solo deja el estado en una cola.
+    - Los cambios que llegan en ráfaga se juntan y solo se escribe el último.
+    - Si el puerto se cae, se reconecta solo (con backoff) sin perder el último estado.
+    """
+
+    def __init__(self, puerto=PORT, baudios=BAUD, ventana=VENTANA_COALESCENCIA):
+        self.puerto = puerto
+        self.baudios = baudios
+        self.ventana = ventana
+        self._cola = queue.Queue()
+        self._ser = None
+        self._ultimo_enviado = None
+        self._hilo = threading.Thread(target=self._bucle, name="cara-serial", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def enviar(self, dato):
+        self._cola.put(str(dato))
+
+    def detener(self, timeout=3.0):
+        """Escribe lo pendiente y cierra el puerto (espera como máximo `timeout`)."""
+        if self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join(timeout)
+
+    # --- Hilo escritor ---
+
+    def _bucle(self):
+        pendiente = None
+        espera_reintento = 0.5
+
+        while True:
+            # Si hay un estado sin escribir (puerto caído), esperamos el backoff
+            # pero atentos a que llegue un estado más nuevo que lo reemplace.
+            try:
+                dato = self._cola.get(timeout=espera_reintento if pendiente else None)
+            except queue.Empty:
+                dato = None
+
+            if dato is _FIN:
+                if pendiente is not None:
+                    self._escribir(pendiente)
+                break
+            if dato is not None:
+                dato, fin = self._juntar_rafaga(dato)
+                pendiente = dato
+                if fin:
+                    self._escribir(pendiente)
+                    break
+
+            if pendiente is None or pendiente == self._ultimo_enviado:
+                pendiente = None
+                continue
+
+            if self._escribir(pendiente):
+                pendiente = None
+                espera_reintento = 0.5
+            else:
+                espera_reintento = min(espera_reintento * 2, REINTENTO_MAXIMO)
+
+        self._cerrar()
+
+    def _juntar_rafaga(self, dato):
+        """Consume todo lo que llegue dentro de la ventana y se queda con el último."""
+        limite = time.monotonic() + self.ventana
+        while True:
+            restante = limite - time.monotonic()
+            try:
+                siguiente = self._cola.get(timeout=max(restante, 0)) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                return dato, False
+            if siguiente is _FIN:
+                return dato, True
+            dato = siguiente
+
+    def _conectar(self):
+        if self._ser is not None and self._ser.is_open:
+            return self._ser
+        self._ser = serial.Serial(self.puerto, self.baudios, timeout=1, write_timeout=1)
+        time.sleep(ESPERA_ARRANQUE)
+        # Tras reconectar no sabemos qué cara muestra la placa: forzamos reescritura
+        self._ultimo_enviado = None
+        print(f"🔌 Puerto {self.puerto} abierto | baud {self.baudios}")
+        return self._ser
+
+    def _escribir(self, dato):
+        try:
+            ser = self._conectar()
+            ser.write(dato.encode('utf-8'))
+            ser.flush()
+            self._ultimo_enviado = dato
+            print(f"Éxito: Se envió '{dato}' al puerto {self.puerto} | baud {self.baudios}")
+            return True
+        except (serial.SerialException, OSError) as e:
+            print(f"Error de conexión serial: {e}")
+            self._cerrar()
+            return False
+        except Exception as e:
+            print(f"Ocurrió un error inesperado: {e}")
+            return False
+
+    def _cerrar(self):
+        if self._ser is not None:
+            try:
+                self._ser.close()
+            except Exception:
+                pass
+            self._ser = None
+
+
+_controlador = None
+_lock_controlador = threading.Lock()
+
+def obtener_controlador():
+    """Devuelve el controlador compartido del proceso (lo crea la primera vez)."""
+    global _controlador
+    with _lock_controlador:
+        if _controlador is None:
+            _controlador = ControladorCara().iniciar()
+            atexit.register(_controlador.detener)
+        return _controlador
+
 def enviar_dato_serial(dato: int=0):
     """
     Envía un dato por el puerto serial definido en el .env
+    No bloquea: el dato se encola y lo escribe el hilo del ControladorCara.
     """
-    try:
-        with serial.Serial(PORT, BAUD, timeout=1) as ser:
-            time.sleep(2) 
-            if ser.is_open:
-                dato_codificado = str(dato).encode('utf-8')
-                ser.write(dato_codificado)
-                print(f"Éxito: Se envió '{dato}' al puerto {PORT} | baud {BAUD}")
-            else:
-                print("Error: No se pudo abrir el puerto.")
-                
-    except serial.SerialException as e:
-        print(f"Error de conexión serial: {e}")
-    except Exception as e:
-        print(f"Ocurrió un error inesperado: {e}")
+    obtener_controlador().enviar(dato)
 
 if __name__ == "__main__":
     numero = input("Ingresa el número a enviar: ")
-    enviar_dato_serial(numero)
\ No newline at end of file
+    enviar_dato_serial(numero)
+    obtener_controlador().detener(timeout=ESPERA_ARRANQUE + 2)
@@ -0,0 +1,140 @@
+import uuid
+import queue
+import struct
+import threading
+import time
+import numpy as np
+import requests
+from codificacion import Remuestreador, TASA_SUBIDA
+
+# --- 📤 SUBIDA EN STREAMING (mientras el niño sigue hablando) ---
+# El cuerpo multipart se manda con Transfer-Encoding: chunked: cada bloque del
+# micrófono se remuestrea a 16 kHz y sale por la red apenas se graba. Al soltar
+# el botón solo falta mandar la cola y esperar la respuesta del servidor.
+
+_FIN = object()
+_CANCELAR = object()
+
+
+class SubidaCancelada(Exception):
+    pass
+
+
+def cabecera_wav_streaming(tasa, canales=1, bits=16):
+    """
+    Cabecera WAV para un largo desconocido: tamaños en 0xFFFFFFFF
+    (convención de WAV en streaming que ffmpeg/Whisper aceptan).
+    """
+    bloque = canales * bits // 8
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, canales, tasa, tasa * bloque, bloque, bits)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+class SubidaEnStreaming:
+    """
+    POST multipart en un hilo propio, alimentado con bloques PCM int16.
+    - `agregar(bloque)`: no bloquea; se llama desde el bucle de captura.
+    - `cerrar()`: ya no hay más audio (botón soltado).
+    - `respuesta(timeout)`: espera la respuesta HTTP del servidor.
+    - `cancelar()`: corta la subida (no hubo voz, nueva pulsación...).
+    """
+
+    def __init__(self, url, tasa_origen, headers=None, campos=None, session=None,
+                 nombre_campo="file", nombre_archivo="audio.wav", tasa_destino=TASA_SUBIDA,
+                 timeout=(5, 30)):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.campos = dict(campos or {})
+        self.session = session or requests
+        self.nombre_campo = nombre_campo
+        self.nombre_archivo = nombre_archivo
+        self.tasa_destino = tasa_destino
+        self.timeout = timeout
+        self._remuestreador = Remuestreador(tasa_origen, tasa_destino)
+        self._frontera = uuid.uuid4().hex
+        self._cola = queue.Queue()
+        self._listo = threading.Event()
+        self._respuesta = None
+        self._error = None
+        self._hilo = threading.Thread(target=self._subir, name="subida-audio", daemon=True)
+        # Métricas: cuánto audio ya estaba en la red cuando se soltó el botón
+        self.bytes_enviados = 0
+        self.bytes_al_cerrar = None
+        self.t_cerrado = None
+        self.t_respuesta = None
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def agregar(self, bloque):
+        self._cola.put(bloque)
+
+    def cerrar(self):
+        self.t_cerrado = time.perf_counter()
+        self.bytes_al_cerrar = self.bytes_enviados
+        self._cola.put(_FIN)
+
+    def cancelar(self):
+        self._cola.put(_CANCELAR)
+
+    def respuesta(self, timeout=None):
+        """Devuelve el requests.Response (o relanza el error de la subida)."""
+        if not self._listo.wait(timeout):
+            raise TimeoutError("La subida en streaming no respondió a tiempo")
+        if self._error is not None:
+            raise self._error
+        return self._respuesta
+
+    # --- Hilo de subida ---
+
+    def _parte(self, nombre, valor=None, archivo=None, tipo=None):
+        cabecera = f"--{self._frontera}\r\nContent-Disposition: form-data; name=\"{nombre}\""
+        if archivo:
+            cabecera += f"; filename=\"{archivo}\"\r\nContent-Type: {tipo}"
+        cabecera += "\r\n\r\n"
+        if valor is not None:
+            cabecera += f"{valor}\r\n"
+        return cabecera.encode("utf-8")
+
+    def _cuerpo(self):
+        for nombre, valor in self.campos.items():
+            yield self._parte(nombre, valor)
+        yield self._parte(self.nombre_campo, archivo=self.nombre_archivo, tipo="audio/wav")
+        yield cabecera_wav_streaming(self.tasa_destino)
+        while True:
+            bloque = self._cola.get()
+            if bloque is _CANCELAR:
+                raise SubidaCancelada()
+            final = bloque is _FIN
+            pcm = self._remuestreador.procesar(np.empty(0, dtype=np.int16) if final else bloque, final=final)
+            if pcm.size:
+                datos = pcm.tobytes()
+                self.bytes_enviados += len(datos)
+                yield datos
+            if final:
+                break
+        yield f"\r\n--{self._frontera}--\r\n".encode("utf-8")
+
+    def _subir(self):
+        headers = {**self.headers, "Content-Type": f"multipart/form-data; boundary={self._frontera}"}
+        try:
+            self._respuesta = self.session.post(self.url, headers=headers, data=self._cuerpo(), timeout=self.timeout)
+        except Exception as e:
+            self._error = e
+        finally:
+            self.t_respuesta = time.perf_counter()
+            self._listo.set()
+
+    def resumen(self):
+        """Texto corto con lo que se ganó al solapar subida y grabación."""
+        if not self.bytes_enviados or self.bytes_al_cerrar is None:
+            return "📤 Subida en streaming sin datos"
+        previo = self.bytes_al_cerrar / self.bytes_enviados
+        texto = f"📤 {previo:.0%} del audio ya estaba subido al soltar el botón"
+        if self.t_cerrado and self.t_respuesta:
+            texto += f" | respuesta {self.t_respuesta - self.t_cerrado:.2f} s después"
+        return texto
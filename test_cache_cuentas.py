@@ -0,0 +1,102 @@
+import asyncio
+from cache_cuentas import CacheCuentas
+from eventos_realtime import Movimiento
+
+# --- 🗂️ PRUEBAS DEL CACHE DE CUENTAS: nunca un saldo viejo como si fuera el actual ---
+# Correr con:  python -m pytest -q
+
+
+def _resumen(saldo, metas=("meta-bici",)):
+    return {"mis_cuentas": [{"id": "billetera", "saldo_actual": saldo}]
+            + [{"id": m, "saldo_actual": 0, "meta_descripcion": m} for m in metas]}
+
+
+class _Api:
+    """account-resume de mentira: devuelve las respuestas en orden y cuenta las llamadas."""
+
+    def __init__(self, *respuestas, durante=None):
+        self.respuestas = list(respuestas)
+        self.durante = durante  # Se corre en medio de la consulta (la petición "en vuelo")
+        self.llamadas = 0
+
+    def __call__(self):
+        self.llamadas += 1
+        if self.durante is not None:
+            self.durante()
+        return self.respuestas.pop(0)
+
+    async def asincrona(self):
+        return self()
+
+
+def test_acierto_sin_volver_a_la_red():
+    api = _Api(_resumen(10))
+    cache = CacheCuentas(api)
+    assert cache.obtener() is cache.obtener()
+    assert api.llamadas == 1 and cache.aciertos == 1
+
+
+def test_movimiento_durante_la_consulta_no_deja_saldos_validos():
+    cache = None
+    api = _Api(_resumen(10), durante=lambda: cache.notificar_movimiento(
+        {"cuenta_origen_id": "papa", "cuenta_destino_id": "billetera"}
+    ))
+    cache = CacheCuentas(api, cuentas_extra=["billetera"])
+    assert cache.obtener()["mis_cuentas"][0]["saldo_actual"] == 10
+    assert not cache._sirve(requiere_saldos=True)   # Se vuelve a pedir
+    assert cache._sirve(requiere_saldos=False)      # La lista sí sirve
+
+
+def test_invalidar_durante_la_consulta_async_tambien_cuenta():
+    cache = None
+    api = _Api(_resumen(10), _resumen(15), durante=lambda: cache.invalidar_saldos())
+    cache = CacheCuentas(consultar_async=api.asincrona)
+    asyncio.run(cache.obtener_async())
+    assert not cache._sirve(requiere_saldos=True)
+    api.durante = None
+    assert asyncio.run(cache.obtener_async())["mis_cuentas"][0]["saldo_actual"] == 15
+    assert cache._sirve(requiere_saldos=True)
+
+
+def test_movimiento_ajeno_no_invalida_y_sin_snapshot_si():
+    cache = CacheCuentas(_Api(_resumen(10)))
+    # Todavía no sabemos qué cuentas son nuestras: por las dudas se invalida
+    assert not cache.notificar_movimiento({"cuenta_origen_id": "x", "cuenta_destino_id": "y"})
+    cache.obtener()
+    assert not cache.notificar_movimiento({"cuenta_origen_id": "x", "cuenta_destino_id": "y"})
+    assert cache._sirve(requiere_saldos=True)
+    # El Movimiento decodificado del realtime sirve igual que el dict
+    assert cache.notificar_movimiento(Movimiento({"id": 1, "cuenta_origen_id": "x", "cuenta_destino_id": "meta-bici"}))
+    assert not cache._sirve(requiere_saldos=True)
+
+
+def test_error_no_devuelve_saldo_viejo():
+    api = _Api(_resumen(10), {"error": "timeout"}, {"error": "timeout"})
+    cache = CacheCuentas(api, cuentas_extra=["billetera"])
+    cache.obtener()
+    cache.invalidar_saldos()
+    assert cache.obtener() == {"error": "timeout"}
+    # Para buscar el id de una meta, la lista vieja sirve
+    assert cache.refrescar(requiere_saldos=False)["mis_cuentas"][1]["id"] == "meta-bici"
+
+
+def test_ttl_de_saldos_y_de_lista_por_separado():
+    api = _Api(_resumen(10), _resumen(11))
+    cache = CacheCuentas(api, ttl_saldos=0, ttl_lista=600)
+    cache.obtener()
+    assert cache.obtener(requiere_saldos=False)["mis_cuentas"][0]["saldo_actual"] == 10
+    assert cache.obtener()["mis_cuentas"][0]["saldo_actual"] == 11
+    assert api.llamadas == 2
+
+
+def test_version_lista_e_ids_siguen_a_las_metas():
+    api = _Api(_resumen(10), _resumen(12), _resumen(12, metas=("meta-bici", "meta-cine")))
+    cache = CacheCuentas(api, cuentas_extra=["alcancia"])
+    cache.refrescar()
+    version = cache.version_lista
+    cache.refrescar()                               # Solo cambió un saldo
+    assert cache.version_lista == version
+    cache.invalidar()
+    cache.obtener()                                 # Meta nueva
+    assert cache.version_lista == version + 1
+    assert cache.ids() == {"alcancia", "billetera", "meta-bici", "meta-cine"}
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+from cache_cuentas import CacheCuentas
+from eventos_realtime import Movimiento, VistosRecientes, decodificar, filtro_cuentas
+
+# --- 📨 PRUEBAS DE LOS EVENTOS DEL REALTIME: filtro, decodificador y repetidos ---
+# Correr con:  python -m pytest -q
+
+
+def _payload(**registro):
+    return {"data": {"type": "INSERT", "table": "movimientos", "record": registro}, "ids": [111, 222]}
+
+
+def test_filtro_una_cuenta_usa_eq_y_varias_usan_in():
+    assert filtro_cuentas("cuenta_destino_id", ["abc"]) == "cuenta_destino_id=eq.abc"
+    assert filtro_cuentas("cuenta_origen_id", ["b", "a", "b"]) == "cuenta_origen_id=in.(a,b)"
+
+
+def test_decodificar_saca_solo_lo_que_usamos():
+    movimiento = decodificar(_payload(id=7, monto="12.50", cuenta_origen_id=1, cuenta_destino_id="x",
+                                      descripcion="Para el cine", fecha="2024-01-01"))
+    assert movimiento.id == 7 and movimiento.monto == 12.5
+    assert (movimiento.cuenta_origen_id, movimiento.cuenta_destino_id) == ("1", "x")
+    # CacheCuentas.notificar_movimiento lo lee como si fuera el dict del record
+    assert movimiento.get("cuenta_destino_id") == "x" and movimiento.get("fecha", "nada") == "nada"
+
+
+def test_decodificar_sin_record_o_como_objeto():
+    assert decodificar({"data": {"type": "system"}}) is None
+    assert decodificar({}) is None
+    objeto = SimpleNamespace(data={"record": {"id": 1, "monto": None}})
+    assert decodificar(objeto).monto is None
+
+
+def test_vistos_recientes_deja_pasar_cada_clave_una_vez():
+    vistos = VistosRecientes()
+    assert vistos.nuevo(7) and not vistos.nuevo(7) and not vistos.nuevo(7)
+    assert vistos.nuevo(8) and vistos.repetidos == 2
+
+
+def test_vistos_recientes_olvida_la_menos_usada():
+    vistos = VistosRecientes(maximo=2)
+    assert vistos.nuevo("a") and vistos.nuevo("b")
+    assert not vistos.nuevo("a")  # "a" pasa a ser la más reciente
+    assert vistos.nuevo("c")      # Se va "b", no "a"
+    assert not vistos.nuevo("a") and vistos.nuevo("b")
+
+
+def test_movimiento_sirve_para_notificar_al_cache():
+    cache = CacheCuentas(cuentas_extra=["x"])
+    assert cache.notificar_movimiento(Movimiento({"cuenta_origen_id": 9, "cuenta_destino_id": "x"}))
+    assert not cache.notificar_movimiento(Movimiento({"cuenta_origen_id": 9, "cuenta_destino_id": 8}))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from gestos import MotorGestos, Gesto, Traza, GrabadorTraza, cargar_traza, reproducir
+
+# --- 🤚 PRUEBAS DEL MOTOR DE GESTOS: dos sacudones con pausa sí, uno suelto no ---
+# Correr con:  python -m pytest -q
+
+
+def _traza_sacudones(inicios, tasa=200, segundos=6.0):
+    t = np.arange(int(segundos * tasa)) / tasa
+    giro = np.zeros((len(t), 3), dtype=np.float32)
+    for inicio in inicios:
+        tramo = (t >= inicio) & (t < inicio + 0.4)
+        # En dos ejes: cada uno satura en ±250 °/s, la magnitud pasa el umbral igual
+        giro[tramo, 1:] = 330 * np.sin(2 * np.pi * 5 * (t[tramo] - inicio))[:, None]
+    return Traza(t, np.clip(giro, -250, 250), tasa, [])
+
+
+def _motor():
+    motor = MotorGestos(200)
+    motor.registrar(Gesto("doble"))
+    return motor
+
+
+@pytest.mark.parametrize("inicios, esperadas", [
+    ([1.0, 2.2], 1),        # Doble sacudón
+    ([1.0], 0),             # Uno suelto
+    ([0.5, 4.5], 0),        # Demasiado separados para la ventana de 3 s
+])
+def test_motor_gestos_doble_sacudon(inicios, esperadas):
+    detecciones = reproducir(_traza_sacudones(inicios), _motor())
+    assert len(detecciones) == esperadas
+    if esperadas:
+        assert 2.2 <= detecciones[0].t_pico <= detecciones[0].t_aviso < 2.2 + 0.5
+
+
+def test_refractario_no_cuenta_el_mismo_gesto_dos_veces():
+    # Tres sacudones seguidos: el tercero cae en el refractario del primer gesto
+    assert len(reproducir(_traza_sacudones([1.0, 2.0, 3.0]), _motor())) == 1
+
+
+@pytest.mark.parametrize("lote", [1, 10, 400])
+def test_el_tamano_del_lote_no_cambia_la_deteccion(lote):
+    detecciones = reproducir(_traza_sacudones([1.0, 2.2]), _motor(), lote=lote)
+    assert len(detecciones) == 1
+
+
+def test_traza_grabada_se_reproduce_igual(tmp_path):
+    original = _traza_sacudones([1.0, 2.2])
+    grabador = GrabadorTraza(str(tmp_path / "traza.npz"), original.tasa_hz)
+    for inicio in range(0, len(original.tiempos), 25):
+        grabador.agregar(original.tiempos[inicio:inicio + 25], original.muestras[inicio:inicio + 25])
+    grabador.marcar(2.6)
+    grabador.guardar()
+    cargada = cargar_traza(str(tmp_path / "traza.npz"))
+    assert cargada.marcas.tolist() == [2.6] and len(cargada.tiempos) == len(original.tiempos)
+    assert len(reproducir(cargada, _motor())) == 1
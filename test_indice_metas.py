@@ -0,0 +1,49 @@
+import pytest
+from indice_metas import IndiceMetas, UMBRAL_CONFIANZA, normalizar
+
+# --- 🎯 PRUEBAS DEL ÍNDICE DE METAS: parecido basta, ambiguo no ---
+# Correr con:  python -m pytest -q
+
+
+def _indice(*nombres):
+    indice = IndiceMetas()
+    indice.actualizar([{"id": "billetera"}] + [{"id": i, "meta_descripcion": n} for i, n in enumerate(nombres)])
+    return indice
+
+
+def test_normalizar_quita_tildes_relleno_y_plural():
+    assert normalizar("Mis Célulares!") == ["celular"]
+    assert normalizar("la meta") == ["la", "meta"]  # Todo relleno: algo queda
+
+
+@pytest.mark.parametrize("dicho, meta", [
+    ("bici", "Bicicleta"),
+    ("bisicleta", "Bicicleta"),
+    ("celulares", "Celular"),
+    ("el cine", "Entradas al cine"),
+])
+def test_indice_metas_encuentra_sobre_el_umbral(dicho, meta):
+    cuenta, confianza = _indice("Bicicleta", "Celular", "Entradas al cine").buscar(dicho)
+    assert cuenta["meta_descripcion"] == meta and confianza >= UMBRAL_CONFIANZA
+
+
+def test_indice_metas_desconocida_o_empatada_queda_bajo_el_umbral():
+    assert _indice("Bicicleta", "Celular").buscar("helicoptero")[1] < UMBRAL_CONFIANZA
+    dos_bicis = _indice("Bicicleta roja", "Bicicleta azul")
+    assert dos_bicis.buscar("bici")[1] < UMBRAL_CONFIANZA
+    cuenta, confianza = dos_bicis.buscar("bici roja")
+    assert cuenta["meta_descripcion"] == "Bicicleta roja" and confianza >= UMBRAL_CONFIANZA
+
+
+def test_muchas_metas_el_filtro_de_trigramas_no_pierde_la_buena():
+    relleno = [f"{cosa} {i}" for i in range(40) for cosa in ("pelota", "mochila", "regalo", "zapatillas", "libro")]
+    cuenta, confianza = _indice(*relleno, "Bicicleta").buscar("bisicleta")
+    assert cuenta["meta_descripcion"] == "Bicicleta" and confianza >= UMBRAL_CONFIANZA
+
+
+def test_actualizar_solo_reconstruye_si_cambia_la_lista():
+    indice = IndiceMetas()
+    cuentas = [{"id": 1, "meta_descripcion": "Cine"}]
+    assert indice.actualizar(cuentas) and not indice.actualizar(list(cuentas))
+    assert indice.actualizar(cuentas + [{"id": 2, "meta_descripcion": "Play"}])
+    assert indice.nombres() == ["Cine", "Play"]
@@ -0,0 +1,218 @@
+import pytest
+import intenciones
+
+# --- 🧪 PRUEBAS DE LA LÓGICA PURA (sin audio, red ni hardware) ---
+# Correr con:  python -m pytest -q
+
+
+# --- ⚡ intenciones: lo que mueve plata tiene que ser inequívoco ---
+
+@pytest.mark.parametrize("frase, monto, meta", [
+    ("Guarda diez soles para el cine.", 10.0, "cine"),
+    ("guarda dos soles para la bicicleta", 2.0, "bicicleta"),
+    ("pon 3.50 para la bicicleta roja", 3.5, "bicicleta roja"),
+    ("mete cinco soles a la play", 5.0, "play"),
+    ("pon 5 soles en la meta entradas al cine", 5.0, "entradas al cine"),
+    ("Guarda 1.000 soles para la bici", 1000, "bici"),   # Punto de miles, no decimal
+])
+def test_enviar_dinero_claro(frase, monto, meta):
+    intencion = intenciones.interpretar(frase)
+    assert intencion["nombre"] == "enviar_dinero_a_meta"
+    assert intencion["argumentos"] == {"monto": monto, "nombre_meta": meta}
+
+
+@pytest.mark.parametrize("frase", [
+    "Guarda diez soles para el cine, no mejor para la bici",
+    "guarda diez soles para el cine no digo para la bici",
+    "guarda diez soles para el cine, perdón, para la bici",
+    "guarda diez soles para el cine por favor",
+    "guarda dos soles para la bici mañana",
+    "guarda dos soles para la bici, y para el cine tres",
+    "guarda dos soles para el cine y dime cuánto tengo",
+    "guarda dos soles para el cine que me gusta mucho",
+    "guarda 3 soles para la bici para mi hermano",
+    "guarda dos soles para comprar una pelota de fútbol grande azul",
+])
+def test_enviar_dinero_dudoso_va_al_llm(frase):
+    assert intenciones.interpretar(frase) is None
+
+
+def test_nombre_meta_termina_en_la_pausa():
+    tokens, pausas = intenciones.tokenizar_con_pausas("guarda diez soles para el cine, no mejor para la bici")
+    nombre, completo = intenciones._nombre_meta(tokens, tokens.index("para"), pausas)
+    assert nombre == "cine"
+    assert not completo
+
+
+@pytest.mark.parametrize("frase, motivo", [
+    ("crea una meta de 50 soles para una pelota", "pelota"),
+    ("crea una meta para la pelota de 50 soles", "pelota"),
+])
+def test_crear_meta(frase, motivo):
+    intencion = intenciones.interpretar(frase)
+    assert intencion["nombre"] == "crear_meta"
+    assert intencion["argumentos"] == {"monto": 50.0, "motivo": motivo}
+
+
+def test_crear_meta_con_correccion_va_al_llm():
+    assert intenciones.interpretar("crea una meta de 50 soles para una pelota, no, mejor para un libro") is None
+
+
+@pytest.mark.parametrize("frase", ["¿Cuánto tengo?", "mi saldo", "cuánta plata he ahorrado"])
+def test_consultar_ahorros(frase):
+    assert intenciones.interpretar(frase)["nombre"] == "consultar_ahorros"
+
+
+@pytest.mark.parametrize("frase", ["¿Qué es el ahorro?", "¿Cuánto cuesta una bici?", ""])
+def test_preguntas_abiertas_van_al_llm(frase):
+    assert intenciones.interpretar(frase) is None
+
+
+# --- 💬 respuestas: lo que dice el chanchito sale de los datos reales ---
+
+def test_dinero_guardado_nombra_la_meta_encontrada():
+    import respuestas
+    frase = respuestas.dinero_guardado(
+        {"monto": 2, "nombre_meta": "la bici por favor"}, {"ok": True, "meta_descripcion": "Bicicleta"}
+    )
+    assert "Bicicleta" in frase and "favor" not in frase
+
+
+@pytest.mark.parametrize("fila, esperado", [
+    ({"tipo": "ingreso", "monto": 5, "descripcion": "Propina"}, "un ingreso de"),
+    ([{"tipo": "Depósito", "monto": 5, "descripcion": None}], "un ingreso de"),
+    ({"tipo": "gasto", "monto": 3, "descripcion": "helado"}, "un gasto de"),
+    ({"tipo": "otro", "monto": -3, "descripcion": ""}, "un gasto de"),
+    ({"tipo": "otro", "monto": 3, "descripcion": ""}, "fue de"),
+])
+def test_ultimo_movimiento_lee_tipo_monto_descripcion(fila, esperado):
+    import respuestas
+    assert esperado in respuestas.ultimo_movimiento(fila)
+
+
+def test_ultimo_movimiento_sin_monto_va_al_llm():
+    import respuestas
+    assert respuestas.ultimo_movimiento([]) is None
+    assert respuestas.ultimo_movimiento({"tipo": "ingreso"}) is None
+
+
+# --- 🎙️ buffer de captura: el callback escribe en su lugar y el tope se respeta ---
+
+class _Estado:
+    input_overflow = False
+
+
+def test_buffer_captura_callback_y_tope():
+    import numpy as np
+    from buffer_captura import BufferCaptura
+    buffer = BufferCaptura(1000, max_segundos=1)
+    bloque = np.arange(400, dtype=np.int16).reshape(-1, 1)
+    for _ in range(3):
+        buffer.callback(bloque, len(bloque), None, _Estado())
+    assert buffer.lleno and buffer.frames == 1000
+    assert buffer.esperar(800, 400) == 1000                 # Lleno: no se queda esperando
+    assert buffer.vista()[400:800, 0].tolist() == list(range(400))
+    with pytest.raises(TimeoutError):
+        BufferCaptura(1000).esperar(0, timeout=0.01)
+
+
+# --- 🎚️ VAD manos libres: las ventanas cruzan los chunks del micrófono ---
+
+def _voz_y_silencio(fs, ms_voz, ms_silencio):
+    import numpy as np
+    t = np.arange(fs * ms_voz // 1000) / fs
+    voz = (700 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+    return np.concatenate((voz, np.zeros(fs * ms_silencio // 1000, dtype=np.int16)))
+
+
+@pytest.mark.parametrize("tam_chunk", [1024, 300])
+def test_detector_fin_de_voz_mide_el_silencio_entre_chunks(tam_chunk):
+    import vad
+    fs = 44100
+    audio = _voz_y_silencio(fs, 500, 1500)
+    detector = vad.DetectorFinDeVoz(fs, silencio_ms=800)
+    fin = next(i for i in range(0, len(audio), tam_chunk) if detector.alimentar(audio[i:i + tam_chunk]))
+    ms_silencio = 1000 * (fin + tam_chunk) / fs - 500
+    # Voz bajita: con ventanas rellenas de ceros no se oía. Corta a los ~800 ms de silencio, ni antes ni mucho después
+    assert detector.hubo_voz and 800 <= ms_silencio <= 800 + vad.VENTANA_MS + 1000 * tam_chunk / fs
+
+
+# --- 🧰 despachador: una tool vencida sigue ocupando su hilo hasta terminar ---
+
+def test_tool_vencida_no_libera_el_hilo_antes_de_tiempo():
+    import time
+    import asyncio
+    from types import SimpleNamespace
+    from despachador_tools import DespachadorTools
+    corriendo, maximo = [0], [0]
+
+    def lenta():
+        corriendo[0] += 1
+        maximo[0] = max(maximo[0], corriendo[0])
+        time.sleep(0.2)
+        corriendo[0] -= 1
+        return "{}"
+
+    despachador = DespachadorTools(max_hilos=1)
+    despachador.registrar("lenta", lenta, timeout=0.05)
+    llamada = SimpleNamespace(function=SimpleNamespace(name="lenta", arguments="{}"))
+
+    async def dos_turnos():
+        primero = await despachador.despachar([llamada])
+        segundo = await despachador.despachar([llamada])
+        return primero, segundo
+
+    primero, segundo = asyncio.run(dos_turnos())
+    assert "tiempo_agotado" in primero[0][3] and "tiempo_agotado" in segundo[0][3]
+    assert maximo[0] == 1
+
+
+# --- 🔢 números en español: lo que dice el niño y lo que dice el chanchito ---
+
+@pytest.mark.parametrize("frase, monto", [
+    ("dos soles", 2.0),
+    ("uno veinte", 1.2),
+    ("tres cincuenta", 3.5),
+    ("un sol con cincuenta", 1.5),
+    ("sol y medio", 1.5),
+    ("cincuenta centimos", 0.5),
+    ("ciento veinte soles", 120.0),
+    ("dos mil quinientos", 2500.0),
+    ("veintiún soles", 21.0),
+    ("3.50", 3.5),
+    ("3,5", 3.5),
+    ("1.000 soles", 1000),
+    ("1,000 soles", 1000),
+    ("2.500.000", 2500000),
+])
+def test_leer_monto_en_palabras(frase, monto):
+    from numeros_es import leer_monto
+    assert leer_monto(intenciones.tokenizar(frase))[0] == monto
+
+
+def test_cifra_ambigua_va_al_llm():
+    assert intenciones.interpretar("guarda 1.5.3 soles para la bici") is None
+
+
+def test_tool_no_idempotente_vencida_termina_de_fondo():
+    import asyncio
+    from types import SimpleNamespace
+    from despachador_tools import DespachadorTools
+    hechas = []
+
+    async def transferir():
+        await asyncio.sleep(0.1)
+        hechas.append("transferencia")
+        return "{}"
+
+    despachador = DespachadorTools()
+    despachador.registrar("transferir", transferir, timeout=0.02, idempotente=False)
+    llamada = SimpleNamespace(function=SimpleNamespace(name="transferir", arguments="{}"))
+
+    async def turno():
+        resultado = await despachador.despachar([llamada])
+        await asyncio.sleep(0.2)
+        return resultado
+
+    resultado = asyncio.run(turno())
+    assert "sigue en camino" in resultado[0][3] and hechas == ["transferencia"]
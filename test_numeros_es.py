@@ -0,0 +1,31 @@
+import pytest
+from numeros_es import monto_a_palabras, entero_a_palabras, vocabulario_montos
+
+# --- 🔢 PRUEBAS DE NÚMEROS EN ESPAÑOL: lo que dice el chanchito ---
+# Correr con:  python -m pytest -q
+# (lo que dice el niño, leer_monto, se prueba con las intenciones en test_logica)
+
+
+@pytest.mark.parametrize("monto, palabras", [
+    (1, "un sol"),
+    (21, "veintiún soles"),
+    (100, "cien soles"),
+    (0.2, "veinte céntimos"),
+    (0.01, "un céntimo"),
+    (35.5, "treinta y cinco soles con cincuenta céntimos"),
+    (2001, "dos mil un soles"),
+])
+def test_monto_a_palabras(monto, palabras):
+    assert " ".join(monto_a_palabras(monto)) == palabras
+
+
+def test_entero_fuera_de_rango():
+    with pytest.raises(ValueError):
+        entero_a_palabras(1_000_000)
+
+
+def test_el_vocabulario_cubre_todos_los_clips():
+    # El anunciador concatena un clip por palabra: ninguna puede faltar
+    vocabulario = set(vocabulario_montos())
+    for monto in (0, 0.05, 1, 1.5, 21.21, 99.99, 100, 115, 999.99, 1001, 21000, 999_999):
+        assert set(monto_a_palabras(monto)) <= vocabulario
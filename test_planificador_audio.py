@@ -0,0 +1,115 @@
+import time
+import threading
+import pytest
+
+# Sin PortAudio (CI, contenedores) sounddevice no se puede importar
+try:
+    import sounddevice as sd
+    from planificador_audio import PlanificadorAudio, GANANCIA_ATENUADA
+except (ImportError, OSError) as e:
+    pytest.skip(f"sin salida de audio: {e}", allow_module_level=True)
+
+# --- 🎚️ PRUEBAS DEL PLANIFICADOR DE AUDIO: prioridades, ventana y políticas ---
+# Correr con:  python -m pytest -q
+
+
+def _sonar(registro, nombre, dura=0.0, listo=None):
+    """Una 'reproducción' que anota cuándo sonó y, si dura, respeta el control."""
+    def reproducir(control):
+        registro.append((nombre, control.ganancia))
+        if listo is not None:
+            listo.set()
+        fin = time.monotonic() + dura
+        while time.monotonic() < fin and not control.detener.is_set():
+            time.sleep(0.01)
+    return reproducir
+
+
+def _esperar(condicion, plazo=2.0):
+    fin = time.monotonic() + plazo
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condicion()
+
+
+def test_anuncios_de_la_ventana_suenan_como_uno_y_no_retrasan_la_conversacion():
+    planificador = PlanificadorAudio(politica="esperar", ventana=0.3).iniciar()
+    registro, anuncios = [], []
+    planificador.anunciar("deposito", 5, lambda datos, control: anuncios.append(list(datos)))
+    planificador.anunciar("deposito", 3, lambda datos, control: anuncios.append(["otro armado"]))
+    t0 = time.monotonic()
+    conversacion = threading.Event()
+    planificador.encolar(_sonar(registro, "conv", listo=conversacion))
+    assert conversacion.wait(0.2), "la conversación esperó la ventana del anuncio"
+    assert time.monotonic() - t0 < 0.2
+    assert _esperar(lambda: anuncios)
+    assert anuncios == [[5, 3]]
+
+
+def test_esperar_deja_terminar_la_frase_y_pasa_antes_que_la_cola():
+    planificador = PlanificadorAudio(politica="esperar", ventana=0).iniciar()
+    registro, sonando = [], threading.Event()
+    primera = planificador.encolar(_sonar(registro, "frase 1", dura=0.2, listo=sonando))
+    planificador.encolar(_sonar(registro, "frase 2"))
+    assert sonando.wait(1)
+    planificador.anunciar("deposito", 5, lambda datos, control: registro.append(("anuncio", control.ganancia)))
+    assert _esperar(lambda: len(registro) == 3)
+    assert [nombre for nombre, _ in registro] == ["frase 1", "anuncio", "frase 2"]
+    assert not primera.control.detener.is_set()
+
+
+def test_interrumpir_corta_la_conversacion():
+    planificador = PlanificadorAudio(politica="interrumpir", ventana=0).iniciar()
+    registro, sonando = [], threading.Event()
+    frase = planificador.encolar(_sonar(registro, "frase", dura=5, listo=sonando))
+    assert sonando.wait(1)
+    t0 = time.monotonic()
+    planificador.anunciar("deposito", 5, lambda datos, control: registro.append(("anuncio", control.ganancia)))
+    assert _esperar(lambda: len(registro) == 2, plazo=1)
+    assert frase.control.detener.is_set() and time.monotonic() - t0 < 1
+
+
+def test_atenuar_suena_encima_con_la_conversacion_bajita():
+    planificador = PlanificadorAudio(politica="atenuar", ventana=0).iniciar()
+    registro, sonando = [], threading.Event()
+    frase = planificador.encolar(_sonar(registro, "frase", dura=0.4, listo=sonando))
+    assert sonando.wait(1)
+
+    def armar(datos, control):
+        registro.append(("anuncio", frase.control.ganancia))
+        time.sleep(0.1)
+
+    planificador.anunciar("deposito", 5, armar)
+    assert _esperar(lambda: len(registro) == 2, plazo=0.3)  # No esperó a que termine la frase
+    assert registro[1] == ("anuncio", GANANCIA_ATENUADA)
+    assert _esperar(lambda: frase.control.ganancia == 1.0)  # Al terminar el anuncio vuelve el volumen
+
+
+def test_atenuar_si_se_cae_la_salida_el_anuncio_espera_su_turno():
+    planificador = PlanificadorAudio(politica="atenuar", ventana=0).iniciar()
+    registro, sonando, fallas = [], threading.Event(), [1]
+    planificador.encolar(_sonar(registro, "frase", dura=0.3, listo=sonando))
+    assert sonando.wait(1)
+
+    def armar(datos, control):
+        if fallas:
+            fallas.pop()
+            raise sd.PortAudioError("se cayó la salida")
+        registro.append(("anuncio", datos))
+
+    planificador.anunciar("deposito", 5, armar)
+    assert _esperar(lambda: len(registro) == 2)
+    assert registro == [("frase", 1.0), ("anuncio", [5])]
+
+
+def test_cortar_conversacion_descarta_la_cola_pero_no_los_anuncios():
+    planificador = PlanificadorAudio(politica="esperar", ventana=0).iniciar()
+    registro, sonando = [], threading.Event()
+    planificador.encolar(_sonar(registro, "frase 1", dura=5, listo=sonando))
+    planificador.encolar(_sonar(registro, "frase 2"))
+    assert sonando.wait(1)
+    planificador.anunciar("deposito", 5, lambda datos, control: registro.append(("anuncio", datos)))
+    assert planificador.cortar_conversacion() == 2
+    assert _esperar(lambda: ("anuncio", [5]) in registro, plazo=1)
+    time.sleep(0.1)
+    assert [nombre for nombre, _ in registro] == ["frase 1", "anuncio"]
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from respuesta_streaming import DivisorFrases, ChatEnStreaming, dividir_frases, dividir_frases_async
+
+# --- 🌊 PRUEBAS DE LA RESPUESTA EN STREAMING: frases enteras y tool_calls rearmadas ---
+# Correr con:  python -m pytest -q
+
+
+def test_divisor_suelta_solo_frases_cerradas():
+    divisor = DivisorFrases()
+    assert divisor.agregar("¡Oink! Tienes 1.20 so") == []          # "1.20" no corta
+    assert divisor.agregar("les en total. Y para gas") == ["¡Oink! Tienes 1.20 soles en total."]
+    assert divisor.agregar("tar 50 céntimos") == []
+    assert divisor.cerrar() == ["Y para gastar 50 céntimos"]
+    assert divisor.cerrar() == []
+
+
+def test_frase_corta_se_junta_con_la_siguiente():
+    assert list(dividir_frases(["¡Oink! ", "¡Guardé tus dos soles! ", "Bien."])) == [
+        "¡Oink! ¡Guardé tus dos soles!", "Bien.",
+    ]
+
+
+@pytest.mark.parametrize("pedazos", [
+    ["Hola, ¿cómo estás? Muy bien, gracias. Chau"],
+    list("Hola, ¿cómo estás? Muy bien, gracias. Chau"),   # Un carácter por delta
+])
+def test_el_corte_no_depende_de_como_llegan_los_pedazos(pedazos):
+    assert list(dividir_frases(pedazos)) == ["Hola, ¿cómo estás?", "Muy bien, gracias.", "Chau"]
+
+
+def test_dividir_frases_async():
+    async def deltas():
+        for pedazo in ("Primera frase larga. ", "Segunda frase larga."):
+            yield pedazo
+
+    async def juntar():
+        return [frase async for frase in dividir_frases_async(deltas())]
+
+    assert asyncio.run(juntar()) == ["Primera frase larga.", "Segunda frase larga."]
+
+
+# --- ChatEnStreaming contra un stream de mentira con la forma de los chunks de OpenAI ---
+
+def _chunk(contenido=None, tool_calls=None):
+    delta = SimpleNamespace(content=contenido, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def _parcial(indice, id=None, nombre=None, argumentos=None):
+    funcion = SimpleNamespace(name=nombre, arguments=argumentos)
+    return SimpleNamespace(index=indice, id=id, function=funcion)
+
+
+class _Stream:
+    def __init__(self, chunks, colgar=False):
+        self._chunks = chunks
+        self._colgar = colgar
+        self.cerrado = False
+
+    def __aiter__(self):
+        return self._iterar()
+
+    async def _iterar(self):
+        for chunk in self._chunks:
+            yield chunk
+        if self._colgar:
+            await asyncio.sleep(10)
+
+    async def close(self):
+        self.cerrado = True
+
+
+class _Cliente:
+    def __init__(self, stream):
+        self.stream = stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._crear))
+
+    async def _crear(self, **kwargs):
+        assert kwargs["stream"] is True
+        return self.stream
+
+
+def test_tool_calls_rearmadas_desde_pedazos():
+    stream = _Stream([
+        _chunk(tool_calls=[_parcial(0, id="call_a", nombre="enviar_dinero_", argumentos="")]),
+        _chunk(tool_calls=[_parcial(0, nombre="a_meta", argumentos='{"monto": 2,')]),
+        _chunk(tool_calls=[_parcial(1, id="call_b", nombre="consultar_ahorros")]),
+        _chunk(tool_calls=[_parcial(0, argumentos=' "nombre_meta": "cine"}')]),
+        SimpleNamespace(choices=[]),  # Chunk de uso, sin choices
+    ])
+    mensaje = asyncio.run(ChatEnStreaming(_Cliente(stream), model="gpt-4o").mensaje())
+    assert mensaje.content is None
+    llamadas = [(t.id, t.function.name, t.function.arguments) for t in mensaje.tool_calls]
+    assert llamadas == [
+        ("call_a", "enviar_dinero_a_meta", '{"monto": 2, "nombre_meta": "cine"}'),
+        ("call_b", "consultar_ahorros", "{}"),
+    ]
+
+
+def test_texto_por_fragmentos_y_mensaje_sigue_donde_quedo():
+    stream = _Stream([_chunk("¡Oink! "), _chunk("Tienes diez soles.")])
+
+    async def turno():
+        chat = ChatEnStreaming(_Cliente(stream), model="gpt-4o")
+        async for _ in chat.fragmentos():
+            break  # El llamador deja de leer a mitad
+        return await chat.mensaje()
+
+    mensaje = asyncio.run(turno())
+    assert mensaje.content == "¡Oink! Tienes diez soles." and mensaje.tool_calls is None
+
+
+def test_cancelar_el_turno_cierra_el_stream():
+    stream = _Stream([_chunk("Hola")], colgar=True)
+
+    async def turno():
+        chat = ChatEnStreaming(_Cliente(stream), model="gpt-4o")
+        tarea = asyncio.ensure_future(chat.mensaje())
+        await asyncio.sleep(0.05)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+
+    asyncio.run(turno())
+    assert stream.cerrado
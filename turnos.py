@@ -0,0 +1,129 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- ✂️ TURNOS CORTABLES (barge-in) ---
+# Cada turno de la conversación (transcribir -> pensar -> hablar) corre como
+# una tarea del loop. Si el niño vuelve a apretar el botón mientras tanto:
+# 1. En el mismo hilo del botón se corta el audio (`al_cortar`): la salida
+#    saca la pista en el bloque siguiente, sin esperar al loop.
+# 2. El loop cancela la tarea: las peticiones httpx / AsyncOpenAI en vuelo se
+#    abortan (se cierra la conexión) y lo que llegue después ya no tiene dónde
+#    volver. `vigente()` cubre lo que corre fuera de la tarea.
+# 3. `correr()` vuelve apenas la tarea terminó de cerrarse, o al cumplirse
+#    LIMITE_CORTE_MS aunque no (sigue cerrándose de fondo): se graba ya.
+
+LIMITE_CORTE_MS = float(os.getenv("LIMITE_CORTE_MS", 50))
+
+_turno_actual = contextvars.ContextVar("turno_actual", default=None)
+
+
+async def _en_turno(turno, corrutina):
+    # La tarea tiene su propia copia del contexto: esto no se ve desde afuera
+    _turno_actual.set(turno)
+    return await corrutina
+
+
+def _recoger(tarea):
+    # Un error al cerrarse un turno ya cortado no le importa a nadie
+    if not tarea.cancelled():
+        tarea.exception()
+
+
+class GestorTurnos:
+    """
+    `await correr(corrutina)` -> True si el turno se cortó.
+    `interrumpir(t_senal)` desde cualquier hilo (oyente del botón, teclado);
+    `t_senal` es el time.monotonic() de la pulsación.
+    """
+
+    def __init__(self, al_cortar=None, limite_ms=LIMITE_CORTE_MS):
+        self.al_cortar = al_cortar    # función() rápida que silencia el audio
+        self.limite_s = limite_ms / 1000
+        self._lock = threading.Lock()
+        self._id = 0
+        self._vivo = None             # Id del turno que todavía se puede cortar
+        self._loop = None
+        self._tarea = None
+        self._cortado = None          # asyncio.Event del turno en curso
+        self._t_senal = None
+        # Métricas (ms desde la pulsación)
+        self.ms_audio = []            # Hasta que se pidió cortar el audio
+        self.ms_total = []            # Hasta que la tarea terminó de cerrarse
+        self.fuera_de_limite = 0
+
+    def vigente(self):
+        """Dentro de un turno: False si ya lo cortaron (no hay que encolar nada más)."""
+        turno = _turno_actual.get()
+        return turno is None or turno == self._vivo
+
+    async def correr(self, corrutina):
+        loop = asyncio.get_running_loop()
+        cortado = asyncio.Event()
+        with self._lock:
+            self._id += 1
+            turno = self._id
+            tarea = loop.create_task(_en_turno(turno, corrutina))
+            self._vivo, self._loop, self._tarea, self._cortado = turno, loop, tarea, cortado
+        tarea.add_done_callback(_recoger)
+        aviso = asyncio.ensure_future(cortado.wait())
+        try:
+            await asyncio.wait({tarea, aviso}, return_when=asyncio.FIRST_COMPLETED)
+            if not cortado.is_set():
+                tarea.result()  # Los errores del turno salen como antes
+                return False
+            restante = self._t_senal + self.limite_s - time.monotonic()
+            if restante > 0:
+                await asyncio.wait({tarea}, timeout=restante)
+            self._medir(tarea)
+            return True
+        except asyncio.CancelledError:
+            tarea.cancel()
+            raise
+        finally:
+            aviso.cancel()
+            with self._lock:
+                if self._vivo == turno:
+                    self._vivo = None
+
+    def interrumpir(self, t_senal=None):
+        """Corta el turno en curso. Devuelve False si no había ninguno."""
+        t_senal = time.monotonic() if t_senal is None else t_senal
+        with self._lock:
+            if self._vivo is None:
+                return False
+            turno, loop = self._vivo, self._loop
+            self._vivo = None
+            self._t_senal = t_senal
+        if self.al_cortar is not None:
+            self.al_cortar()
+        self.ms_audio.append((time.monotonic() - t_senal) * 1000)
+        loop.call_soon_threadsafe(self._cancelar, turno)
+        return True
+
+    def _cancelar(self, turno):
+        if turno != self._id:
+            return  # Llegó tarde: ese turno ya terminó y empezó otro
+        self._tarea.cancel()
+        self._cortado.set()
+
+    def _medir(self, tarea):
+        total = (time.monotonic() - self._t_senal) * 1000
+        self.ms_total.append(total)
+        if not tarea.done():
+            self.fuera_de_limite += 1
+            print(f"⚠️ El turno no se cerró en {self.limite_s * 1000:.0f} ms; termina de fondo.")
+        print(f"✂️ Turno cortado: audio en {self.ms_audio[-1]:.1f} ms, todo en {total:.1f} ms")
+
+    def resumen(self):
+        if not self.ms_total:
+            return "✂️ Sin turnos cortados"
+        ordenados = sorted(self.ms_total)
+        return (f"✂️ {len(ordenados)} turnos cortados: cierre mediana {ordenados[len(ordenados) // 2]:.1f} ms, "
+                f"máx {ordenados[-1]:.1f} ms, audio máx {max(self.ms_audio):.1f} ms, "
+                f"{self.fuera_de_limite} sobre el límite")
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- 🎚️ DETECCIÓN DE VOZ (VAD por energía + cruces por cero) ---
+
+VENTANA_MS = 30            # Largo de cada ventana de análisis
+PASO_MS = 10               # Desplazamiento entre ventanas (se solapan)
+RMS_MINIMO = 300.0         # Piso absoluto (int16): por debajo nunca es voz
+FACTOR_RUIDO = 3.0         # Voz = RMS por encima de 3x el ruido de fondo
+ZCR_FRICATIVA = 0.25       # "s", "f", "ch": mucha oscilación con poca energía
+MARGEN_MS = 150            # Colchón que dejamos antes/después de la voz al recortar
+SILENCIO_FIN_MS = int(os.getenv("VAD_SILENCIO_FIN_MS", 800))  # Manos libres: fin de turno
+ESPERA_VOZ_MS = int(os.getenv("VAD_ESPERA_VOZ_MS", 6000))     # Manos libres: nadie habló
+
+
+def _a_mono(audio):
+    audio = np.asarray(audio)
+    return audio.reshape(-1) if audio.ndim == 1 or audio.shape[1] == 1 else audio.mean(axis=1)
+
+
+def caracteristicas(audio, fs, ventana_ms=VENTANA_MS, paso_ms=PASO_MS):
+    """
+    RMS y tasa de cruces por cero por ventana deslizante, todo vectorizado.
+    Devuelve (rms, zcr), un valor por ventana.
+    """
+    x = _a_mono(audio).astype(np.float32)
+    ventana = max(fs * ventana_ms // 1000, 2)
+    paso = max(fs * paso_ms // 1000, 1)
+    if x.size < ventana:
+        x = np.pad(x, (0, ventana - x.size))
+    marcos = sliding_window_view(x, ventana)[::paso]
+    rms = np.sqrt(np.mean(marcos * marcos, axis=1))
+    signos = np.signbit(marcos)
+    zcr = np.count_nonzero(signos[:, 1:] != signos[:, :-1], axis=1) / (ventana - 1)
+    return rms, zcr
+
+
+def umbral_ruido(rms):
+    """Estimación del piso de ruido: las ventanas más calladas de la toma."""
+    piso = np.percentile(rms, 10) if rms.size else 0.0
+    return max(piso * FACTOR_RUIDO, RMS_MINIMO)
+
+
+def es_voz(rms, zcr, umbral):
+    return (rms > umbral) | ((zcr > ZCR_FRICATIVA) & (rms > umbral * 0.5))
+
+
+def recortar_silencio(audio, fs, margen_ms=MARGEN_MS):
+    """
+    Devuelve una vista de `audio` sin el silencio de inicio y fin
+    (con `margen_ms` de colchón), o None si no hay voz en toda la toma.
+    """
+    rms, zcr = caracteristicas(audio, fs)
+    voz = np.flatnonzero(es_voz(rms, zcr, umbral_ruido(rms)))
+    if not voz.size:
+        return None
+    paso = max(fs * PASO_MS // 1000, 1)
+    ventana = max(fs * VENTANA_MS // 1000, 2)
+    margen = fs * margen_ms // 1000
+    inicio = max(voz[0] * paso - margen, 0)
+    fin = min(voz[-1] * paso + ventana + margen, len(audio))
+    return audio[inicio:fin]
+
+
+class DetectorFinDeVoz:
+    """
+    Endpointing para modo manos libres: se alimenta con cada chunk del micrófono
+    y avisa cuando, después de haber oído voz, pasan `silencio_ms` de silencio.
+    El piso de ruido se adapta con una media móvil de las ventanas sin voz.
+    """
+
+    def __init__(self, fs, silencio_ms=SILENCIO_FIN_MS, espera_voz_ms=ESPERA_VOZ_MS):
+        self.fs = fs
+        self.silencio_ms = silencio_ms
+        self.espera_voz_ms = espera_voz_ms
+        self.ruido = RMS_MINIMO / FACTOR_RUIDO
+        self.hubo_voz = False
+        self._ms_silencio = 0.0
+        self._ms_total = 0.0
+        self._ventana = max(fs * VENTANA_MS // 1000, 2)
+        self._paso = max(fs * PASO_MS // 1000, 1)
+        # Muestras que todavía no cerraron ventana: las ventanas cruzan de un chunk
+        # al siguiente (a 44.1 kHz una ventana son 1323 muestras y el chunk 1024)
+        self._historial = np.zeros(0, dtype=np.float32)
+
+    def alimentar(self, chunk):
+        """Devuelve True cuando el turno terminó (o nadie habló a tiempo)."""
+        self._ms_total += 1000.0 * len(chunk) / self.fs
+        x = np.concatenate((self._historial, _a_mono(chunk).astype(np.float32)))
+        ventanas = 0 if x.size < self._ventana else (x.size - self._ventana) // self._paso + 1
+        self._historial = x[ventanas * self._paso:]
+        if ventanas:
+            rms, zcr = caracteristicas(x[:(ventanas - 1) * self._paso + self._ventana], self.fs)
+            umbral = max(self.ruido * FACTOR_RUIDO, RMS_MINIMO)
+            voz = es_voz(rms, zcr, umbral)
+            if (~voz).any():
+                self.ruido = 0.9 * self.ruido + 0.1 * float(np.median(rms[~voz]))
+            if voz.any():
+                self.hubo_voz = True
+                # Solo cuenta el silencio posterior a la última ventana con voz
+                ultima = np.flatnonzero(voz)[-1]
+                self._ms_silencio = (voz.size - 1 - ultima) * PASO_MS
+            else:
+                self._ms_silencio += voz.size * PASO_MS
+
+        if self.hubo_voz:
+            return self._ms_silencio >= self.silencio_ms
+        return self._ms_total >= self.espera_voz_ms
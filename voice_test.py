@@ -1,130 +1,201 @@
 import os
-import io
 import json, time
 import threading
+import queue
 import asyncio
-import requests
 import sounddevice as sd
-import soundfile as sf
-import numpy as np
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from supabase import create_async_client 
 from serial_test import enviar_dato_serial
+import voz
+import vad
+import codificacion
+from buffer_captura import BufferCaptura, MAX_SEGUNDOS_GRABACION
+from subida_streaming import SubidaEnStreaming
+from cliente_api import obtener_cliente_async
+from cache_cuentas import CacheCuentas
+from indice_metas import IndiceMetas, UMBRAL_CONFIANZA
+import intenciones
+import respuestas
+from despachador_tools import DespachadorTools
+from respuesta_streaming import ChatEnStreaming, dividir_frases, dividir_frases_async
+from anunciador_montos import AnunciadorMontos
+from planificador_audio import obtener_planificador
+from numeros_es import monto_a_voz
+from eventos_realtime import decodificar, VistosRecientes, filtro_cuentas
+from boton import crear_boton
+from salida_audio import abrir_al_arrancar
+from turnos import GestorTurnos
 
 
 load_dotenv()
 
-INPUT_CTRL = True  # <--- TRUE = Botón GPIO, FALSE = Teclado (Enter/Ctrl+C)
+INPUT_CTRL = True  # <--- TRUE = Botón GPIO, FALSE = Teclado (Enter)
 GPIO_PIN = 25      # Pin físico del botón
 SAMPLE_RATE = 44100
+MANOS_LIBRES = os.getenv("MANOS_LIBRES", "0") == "1"  # 1 = también deja de grabar al detectar silencio
+# 1 = el audio viaja a Whisper mientras el niño habla (subida chunked en paralelo a la grabación)
+TRANSCRIPCION_STREAMING = os.getenv("TRANSCRIPCION_STREAMING", "0") == "1"
+# 1 = la respuesta se dice oración por oración mientras gpt-4o la sigue escribiendo
+RESPUESTA_STREAMING = os.getenv("RESPUESTA_STREAMING", "1") == "1"
+# 1 = el servidor filtra el realtime por nuestras cuentas; 0 = todos los INSERT de movimientos
+REALTIME_FILTRADO = os.getenv("REALTIME_FILTRADO", "1") == "1"
 
 # IDs y URLs
 SUPABASE_URL = "https://mntnwbnpnsgyvmybfuqn.supabase.co"
 SUPABASE_KEY = "sb_publishable_EFKqBeNCOHx47vyFv2-2KA_fR3hQkrp" # Necesitas la KEY publica (anon) o service_role
 USUARIO_ID = "d4266198-2e99-41df-8b98-0793da30944c" # ID del niño para las pruebas
 CUENTA_PRINCIPAL_ID = "30c0bcf3-2dee-4d85-a5c4-568e81fc3eab"         # ID de la billetera origen
+# Cuentas que anuncia este chanchito (separadas por coma; por defecto, la billetera)
+CUENTAS_DISPOSITIVO = frozenset(
+    c.strip() for c in os.getenv("CUENTAS_DISPOSITIVO", CUENTA_PRINCIPAL_ID).split(",") if c.strip()
+)
 BASE_URL = "https://mntnwbnpnsgyvmybfuqn.supabase.co/functions/v1/"
+api = obtener_cliente_async(BASE_URL)  # httpx async: pool keep-alive + timeouts + reintentos
 
 
 # --- ⚙️ CONFIGURACIÓN ---
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
-
-try:
-    import RPi.GPIO as GPIO
-    if INPUT_CTRL:
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(GPIO_PIN, GPIO.IN)
-except ImportError:
+client = OpenAI(api_key=api_key)        # TTS y subidas: corren en hilos del executor
+aclient = AsyncOpenAI(api_key=api_key)  # Chat y Whisper: en el mismo loop que el realtime
+anunciador = AnunciadorMontos()
+planificador = obtener_planificador()  # Única salida de audio: conversación + anuncios
+# Barge-in: una pulsación a mitad de turno silencia la respuesta desde el hilo del botón
+turnos = GestorTurnos(al_cortar=planificador.cortar_conversacion)
+
+boton = crear_boton(GPIO_PIN) if INPUT_CTRL else None  # Flancos por interrupción, sin leer el pin en bucle
+if INPUT_CTRL and boton is None:
     print("⚠️ RPi.GPIO no encontrado. Forzando modo Teclado.")
     INPUT_CTRL = False
 
-def esperar_activacion():
+async def esperar_activacion():
     """
-    Bloquea el flujo hasta que el usuario dé la señal de inicio.
+    Espera (sin bloquear el loop) a que el usuario dé la señal de inicio.
     - Modo GPIO: Espera flanco de bajada (apretar botón).
     - Modo Teclado: Espera ENTER.
     """
     if not INPUT_CTRL:
-        input("\n⌨️  [ENTER] para empezar a hablar...")
+        teclado.vaciar()
+        print("\n⌨️  [ENTER] para empezar a hablar...")
+        await teclado.enter()
         return
 
     print(f"\n🔘 [Esperando BOTÓN en GPIO {GPIO_PIN} para hablar...]")
-    
-    # Bucle de espera no bloqueante (permite que Ctrl+C mate el script)
-    while True:
-        # Si el botón baja a 0 (LOW), es que se presionó
-        if GPIO.input(GPIO_PIN) == GPIO.LOW:
-            # Pequeño debounce para evitar falsos positivos
-            time.sleep(0.05)
-            if GPIO.input(GPIO_PIN) == GPIO.LOW:
-                return # Salimos de la espera, comenzamos a grabar
-        time.sleep(0.1)
+    # El flanco despierta al loop apenas llega (los rebotes ya vienen filtrados)
+    await boton.esperar_presion()
+
+# Lo activa el loop: ENTER en modo teclado, o cancelación del turno (Ctrl+C)
+parar_grabacion = threading.Event()
 
 def debe_seguir_grabando():
     """
     Devuelve True si debemos seguir grabando, False si debemos parar.
-    - Modo GPIO: Devuelve True mientras el botón siga presionado (LOW).
-    - Modo Teclado: Siempre True (el stop se maneja por excepción KeyboardInterrupt).
+    - Modo GPIO: Devuelve True mientras el botón siga presionado.
+    - Modo Teclado: True hasta que llegue el ENTER de parada.
     """
+    if parar_grabacion.is_set():
+        return False
     if not INPUT_CTRL:
         return True
     
-    # En modo GPIO, seguimos grabando solo si el botón sigue presionado (LOW)
-    return GPIO.input(GPIO_PIN) == GPIO.LOW
+    # Estado ya sin rebotes: leer un Event, no el pin, en cada bloque de audio
+    return boton.presionado.is_set()
 
 # --- ⚡ REALTIME CALLBACK (Lo que pasa cuando llega dinero) ---
-def procesar_cambio_realtime(payload):
+# Montos típicos de depósito: sus frases se dejan sintetizadas al arrancar
+MONTOS_FRECUENTES = [1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0]
+
+def frase_deposito(monto):
+    return f"¡Oink! Acaban de llegar {monto} soles para ti."
+
+def anunciar_depositos(montos, control):
     """
-    Parsea el payload específico de la librería Realtime de Python.
-    Estructura: payload['data']['record']
+    Corre en el hilo de audio cuando le toca turno al anuncio. Si llegaron
+    varios depósitos seguidos, se dicen juntos en una sola frase.
     """
+    enviar_dato_serial(3)
     try:
-        enviar_dato_serial(3)
-        # 1. Normalización: Aseguramos que sea un diccionario accesible
-        # Si la librería devuelve un objeto complejo, intentamos convertirlo
-        datos = payload
-        if hasattr(payload, 'model_dump'): # Pydantic v2 (común en libs modernas)
-            datos = payload.model_dump()
-        elif hasattr(payload, '__dict__'):
-            datos = payload.__dict__
-            
-        # 2. Navegación: Entramos a 'data' -> 'record'
-        # (Basado en tu log: {'data': {'record': {...}}})
-        info_realtime = datos.get('data', {})
-        registro = info_realtime.get('record', {})
+        if len(montos) == 1:
+            frase = frase_deposito(montos[0])
+            # Primero con clips offline (milisegundos); si el anunciador
+            # aún no está listo, con el TTS normal
+            pcm = anunciador.componer(montos[0])
+            if pcm is not None:
+                print(f"🐷 Chanchito dice (offline): {frase}")
+                voz.reproducir_pcm(pcm, anunciador.fs, control)
+            else:
+                print(f"🐷 Chanchito dice: {frase}")
+                voz.reproducir(client, frase, control)
+        else:
+            total = sum(float(m) for m in montos)
+            frase = f"¡Oink! Llegaron {len(montos)} depósitos, en total {monto_a_voz(total)}."
+            print(f"🐷 Chanchito dice: {frase}")
+            voz.reproducir(client, frase, control)
+        print("\n🎤 [ENTER] para hablar...")
+    finally:
+        enviar_dato_serial(1)
 
-        if not registro:
+vistos_realtime = VistosRecientes()  # Reenvíos tras reconectar: cada movimiento se anuncia una vez
+
+def procesar_cambio_realtime(payload):
+    """
+    Corre dentro del callback del realtime: solo lee el registro y encola
+    el anuncio (no toca el audio), así el websocket nunca se queda esperando.
+    """
+    try:
+        movimiento = decodificar(payload)
+        if movimiento is None:
             # A veces llegan eventos de 'system' sin registro, los ignoramos
             return
+        # Un INSERT que calza con los dos filtros (origen y destino) llega dos veces
+        if not vistos_realtime.nuevo(movimiento.id):
+            return
 
-        # 3. Extracción de datos
-        # Convertimos a str() por seguridad para comparar UUIDs
-        destino_id = str(registro.get('cuenta_destino_id'))
-        monto = registro.get('monto')
-        descripcion = registro.get('descripcion') or "un depósito"
-
-        # Debug para ver qué está leyendo (puedes borrarlo luego)
-        # print(f"DEBUG: Destino={destino_id} | Monto={monto}")
+        # Si el movimiento toca alguna de nuestras cuentas, los saldos cacheados ya no valen
+        cuentas.notificar_movimiento(movimiento)
 
-        # 4. Lógica de negocio: ¿Es para mí?
-        # Asegúrate de que CUENTA_PRINCIPAL_ID sea un string en tus constantes
-        if destino_id == str(CUENTA_PRINCIPAL_ID):
-            print(f"\n🔔 REALTIME: ¡Llegaron {monto} soles!")
-            
-            frase = f"¡Oink! Acaban de llegar {monto} soles para ti."
-            
-            # Hablar inmediatamente
-            hablar_chanchito(frase)
-            print("\n🎤 [ENTER] para hablar...")
+        # ¿Es para mí? (y no un paso de plata entre mis propias cuentas)
+        if (movimiento.cuenta_destino_id in CUENTAS_DISPOSITIVO
+                and movimiento.cuenta_origen_id not in CUENTAS_DISPOSITIVO):
+            print(f"\n🔔 REALTIME: ¡Llegaron {movimiento.monto} soles!")
+            # Depósitos seguidos se agrupan en un solo anuncio
+            planificador.anunciar("deposito", movimiento.monto, anunciar_depositos)
 
     except Exception as e:
         print(f"❌ Error procesando payload: {e}")
         # Tip: Imprime el payload crudo si vuelve a fallar para diagnosticar
         # print(payload)
-    finally:
-        enviar_dato_serial(1)
+
+def cuentas_a_escuchar():
+    """Las del dispositivo (anuncios) + todas las que tiene el caché (metas incluidas, para invalidarlo)."""
+    return CUENTAS_DISPOSITIVO | cuentas.ids()
+
+async def suscribir_movimientos(async_supabase, ids):
+    # Wrapper para conectar el callback (vuelve en microsegundos)
+    def callback_wrapper(payload):
+        procesar_cambio_realtime(payload)
+
+    channel = async_supabase.channel('cambios_movimientos')
+    if ids is not None:
+        # Solo lo que entra o sale de nuestras cuentas
+        for columna in ("cuenta_destino_id", "cuenta_origen_id"):
+            channel.on_postgres_changes(
+                event="INSERT",
+                schema="public",
+                table="movimientos",
+                filter=filtro_cuentas(columna, ids),
+                callback=callback_wrapper
+            )
+    else:
+        channel.on_postgres_changes(
+            event="INSERT",
+            schema="public",
+            table="movimientos",
+            callback=callback_wrapper
+        )
+    await channel.subscribe()
+    return channel
 
 async def motor_realtime_async():
     print("📡 Iniciando conexión Async con Supabase...")
@@ -132,52 +203,44 @@ async def motor_realtime_async():
     # 1. Crear cliente
     async_supabase = await create_async_client(SUPABASE_URL, SUPABASE_KEY)
     
-    # 2. Wrapper para conectar el callback
-    def callback_wrapper(payload):
-        procesar_cambio_realtime(payload)
-
-    # 3. Suscribirse
-    channel = async_supabase.channel('cambios_movimientos')
-    await channel.on_postgres_changes(
-        event="INSERT",
-        schema="public",
-        table="movimientos",
-        callback=callback_wrapper
-    ).subscribe()
+    # 2. Suscribirse
+    ids = cuentas_a_escuchar() if REALTIME_FILTRADO else None
+    channel = await suscribir_movimientos(async_supabase, ids)
 
     print("✅ Escuchando cambios en tiempo real.")
 
-    # 4. Mantener vivo el loop asíncrono
+    # 3. Mantener vivo el cliente (y el canal) mientras corra el loop
     while True:
         await asyncio.sleep(1)
-
-def iniciar_hilo_realtime():
-    """Lanza el proceso asíncrono en un hilo separado para no bloquear el micrófono"""
-    def run_loop():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(motor_realtime_async())
-
-    hilo = threading.Thread(target=run_loop, daemon=True)
-    hilo.start()
+        if REALTIME_FILTRADO and cuentas_a_escuchar() != ids:
+            # Primera carga del caché o meta nueva: el filtro tiene que cubrir esas cuentas
+            ids = cuentas_a_escuchar()
+            await async_supabase.remove_channel(channel)
+            channel = await suscribir_movimientos(async_supabase, ids)
+            cuentas.invalidar_saldos()  # Lo que pasó durante el cambio de canal no lo vimos
+            print(f"📡 Realtime filtrado por {len(ids)} cuentas.")
+
+def iniciar_realtime():
+    """El realtime vive en el mismo loop que la conversación, como una tarea más."""
+    async def con_log():
+        try:
+            await motor_realtime_async()
+        except Exception as e:
+            print(f"❌ Realtime caído: {e}")
+
+    return asyncio.ensure_future(con_log())
 
 # --- 🔌 CAPA DE CONEXIÓN (APIs) ---
 
-def consultar_cuentas_api(usuario_id):
+async def consultar_cuentas_api(usuario_id):
     endpoint = "account-resume"
     url = f"{BASE_URL}{endpoint}"
     print(f"📡 Consultando: {url}")
     
-    try:
-        # Usamos POST con params como indicaste en tu snippet anterior
-        response = requests.post(url, params={"usuario_id": usuario_id})
-        if response.status_code == 200:
-            return response.json()
-        return {"error": response.text}
-    except Exception as e:
-        return {"error": str(e)}
+    # Usamos POST con params como indicaste en tu snippet anterior
+    return await api.post_json(endpoint, params={"usuario_id": usuario_id})
 
-def realizar_transaccion_api(destino, monto, descripcion):
+async def realizar_transaccion_api(destino, monto, descripcion):
     endpoint = "transaction"
     url = f"{BASE_URL}{endpoint}"
     print(f"📡 Transacción: {url}")
@@ -189,15 +252,9 @@ def realizar_transaccion_api(destino, monto, descripcion):
         "monto": monto,
         "descripcion": descripcion
     }
-    try:
-        response = requests.post(url, params=params)
-        if response.status_code == 200:
-            return response.json()
-        return {"error": response.text}
-    except Exception as e:
-        return {"error": str(e)}
+    return await api.post_json(endpoint, params=params)
 
-def crear_meta_api(meta_monto, nombre_meta):
+async def crear_meta_api(meta_monto, nombre_meta):
     endpoint = "create-savings-account"
     url = f"{BASE_URL}{endpoint}"
     print(f"📡 Creando Meta: {url}")
@@ -207,56 +264,63 @@ def crear_meta_api(meta_monto, nombre_meta):
         "meta": meta_monto,
         "nombre_meta": nombre_meta
     }
-    try:
-        response = requests.post(url, params=params)
-        if response.status_code == 200:
-            return response.json()
-        return {"error": response.text}
-    except Exception as e:
-        return {"error": str(e)}
+    return await api.post_json(endpoint, params=params)
+
+# Último `account-resume` en memoria: lo invalida el realtime de `movimientos`
+estadisticas_intenciones = intenciones.EstadisticasIntenciones()
+cuentas = CacheCuentas(
+    consultar_async=lambda: consultar_cuentas_api(USUARIO_ID), cuentas_extra=[CUENTA_PRINCIPAL_ID]
+)
+indice_metas = IndiceMetas()
 
 # --- 🧠 LÓGICA DE HERRAMIENTAS (Tools GPT) ---
 
-def tool_crear_meta(monto, motivo):
+async def tool_crear_meta(monto, motivo):
     """Acción: El niño crea una meta."""
-    resultado = crear_meta_api(monto, motivo)
+    resultado = await crear_meta_api(monto, motivo)
+    if "error" not in resultado:
+        cuentas.invalidar() # Hay una cuenta nueva: la lista cacheada ya no sirve
     return json.dumps(resultado)
 
-def tool_consultar_ahorros():
+async def tool_consultar_ahorros():
     """Acción: El niño pregunta cuánto tiene."""
-    datos = consultar_cuentas_api(USUARIO_ID)
+    datos = await cuentas.obtener_async()
     return json.dumps(datos)
 
-def tool_enviar_dinero_a_meta(monto, nombre_meta):
+def buscar_meta(lista_cuentas, nombre_meta):
+    """
+    Devuelve (id, descripcion) de la meta que mejor coincide con `nombre_meta`.
+    Tolera tildes, plurales, abreviaturas ("bici") y errores de Whisper.
+    """
+    # Solo se reconstruye si cambió la lista de cuentas
+    indice_metas.actualizar(lista_cuentas)
+    cuenta, confianza = indice_metas.buscar(nombre_meta)
+    if cuenta is None or confianza < UMBRAL_CONFIANZA:
+        return None, ""
+    print(f"🎯 '{nombre_meta}' -> '{cuenta['meta_descripcion']}' (confianza {confianza:.2f})")
+    return cuenta.get('id'), cuenta['meta_descripcion']
+
+async def tool_enviar_dinero_a_meta(monto, nombre_meta):
     """
     Acción: Mover dinero a una meta.
     LÓGICA: Busca el ID basándose en 'meta_descripcion' del JSON de la API.
     """
     print(f"🔍 Buscando meta '{nombre_meta}' en la lista de cuentas...")
     
-    # 1. Obtenemos el JSON completo
-    datos = consultar_cuentas_api(USUARIO_ID)
+    # 1. Obtenemos el JSON completo (del cache: para el id no hacen falta saldos frescos)
+    datos = await cuentas.obtener_async(requiere_saldos=False)
     
     # 2. Accedemos a la lista correcta 'mis_cuentas'
     # Si la API da error o no trae la lista, usamos una lista vacía para no romper el código
     lista_cuentas = datos.get('mis_cuentas', [])
     
-    id_destino = None
-    meta_encontrada_nombre = ""
+    # 3. Buscamos coincidencias
+    id_destino, meta_encontrada_nombre = buscar_meta(lista_cuentas, nombre_meta)
 
-    # 3. Iteramos buscando coincidencias
-    for cuenta in lista_cuentas:
-        # Extraemos la descripción (ej: "cine", "celular")
-        descripcion_db = cuenta.get('meta_descripcion')
-        
-        # Verificamos que no sea None (la cuenta 'simple' tiene None)
-        if descripcion_db:
-            # Comparamos ignorando mayúsculas/minúsculas
-            # Ej: Si niño dice "Cine" y en DB está "cine", esto da True
-            if nombre_meta.lower() in descripcion_db.lower():
-                id_destino = cuenta.get('id')
-                meta_encontrada_nombre = descripcion_db
-                break
+    # La meta pudo crearse desde la app de los papás: una sola vuelta a la red
+    if not id_destino:
+        lista_cuentas = (await cuentas.refrescar_async(requiere_saldos=False)).get('mis_cuentas', [])
+        id_destino, meta_encontrada_nombre = buscar_meta(lista_cuentas, nombre_meta)
             
     # 4. Manejo de error si NO existe la meta
     if not id_destino:
@@ -271,13 +335,34 @@ def tool_enviar_dinero_a_meta(monto, nombre_meta):
     # 5. Si SÍ existe, ejecutamos la transacción
     print(f"✅ Meta encontrada: {meta_encontrada_nombre} (ID: {id_destino})")
     
-    resultado = realizar_transaccion_api(
+    resultado = await realizar_transaccion_api(
         destino=id_destino,
         monto=monto,
         descripcion=f"Ahorro enviado a {meta_encontrada_nombre}"
     )
+    if isinstance(resultado, dict) and "error" not in resultado:
+        # El evento realtime también invalida; esto cubre el caso de realtime caído
+        cuentas.invalidar_saldos()
+        # La respuesta nombra la meta encontrada, no lo que se entendió ("la bici" -> "Bicicleta")
+        resultado = {**resultado, "meta_descripcion": meta_encontrada_nombre}
     return json.dumps(resultado)
 
+# Registro de tools: las independientes corren en paralelo, las dependientes en orden
+despachador = DespachadorTools()
+# Las que escriben no se abortan si cortan el turno (ver despachador_tools)
+despachador.registrar("crear_meta", tool_crear_meta, argumentos=("monto", "motivo"), timeout=12, idempotente=False)
+# Una meta creada en este mismo turno tiene que existir antes de mandarle plata;
+# dos envíos salen de la misma billetera, así que también van en fila
+despachador.registrar(
+    "enviar_dinero_a_meta", tool_enviar_dinero_a_meta, argumentos=("monto", "nombre_meta"),
+    timeout=20, depende_de=("crear_meta", "enviar_dinero_a_meta"), idempotente=False,
+)
+# El saldo se lee después de cualquier cambio pedido antes en el turno
+despachador.registrar(
+    "consultar_ahorros", tool_consultar_ahorros,
+    timeout=8, depende_de=("crear_meta", "enviar_dinero_a_meta"),
+)
+
 # Schema para OpenAI
 tools_schema = [
     {
@@ -320,69 +405,325 @@ tools_schema = [
 ]
 
 # --- 🔊 AUDIO (Input/Output) ---
-def grabar_audio():
-    print("🔴 GRABANDO... (Suelta el botón / Ctrl+C para terminar)")
-    audio_data = []
+# Reservado una vez: la RAM de la grabación no crece turno a turno
+buffer_mic = BufferCaptura(SAMPLE_RATE)
+
+def grabar_audio(subida=None):
+    """
+    Graba hasta soltar el botón (o silencio en manos libres).
+    Sin `subida`: devuelve el audio codificado listo para Whisper.
+    Con `subida` (SubidaEnStreaming): cada chunk se manda apenas se lee y
+    se devuelve la misma subida, ya cerrada, para esperar la transcripción.
+    """
+    if MANOS_LIBRES:
+        print("🔴 GRABANDO... (Habla; paro cuando te quedes callado o sueltes el botón)")
+    else:
+        print("🔴 GRABANDO... (Suelta el botón / ENTER para terminar)")
+    buffer_mic.reiniciar()
+    detector = vad.DetectorFinDeVoz(SAMPLE_RATE) if MANOS_LIBRES else None
+    # Manos libres con el botón sostenido: soltarlo también corta (un toque suelto no)
+    sostenido = detector is None or (INPUT_CTRL and boton.presionado.is_set())
     
     try:
-        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='int16') as stream:
+        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='int16',
+                            blocksize=1024, callback=buffer_mic.callback):
+            hasta = 0
             while True:
-                # 1. Leemos audio del micro
-                data, overflow = stream.read(1024)
-                audio_data.append(data)
+                # 1. El callback copia el audio del micro directo al buffer preasignado
+                antes, hasta = hasta, buffer_mic.esperar(hasta, 1024)
+                bloque = buffer_mic.vista()[antes:hasta]
+                if subida is not None:
+                    subida.agregar(bloque)
+                if buffer_mic.lleno:
+                    print(f"⏱️ Máximo de {MAX_SEGUNDOS_GRABACION:.0f} s alcanzado. Procesando...")
+                    break
                 
                 # 2. Verificamos condición de parada
-                if not debe_seguir_grabando():
+                if detector is not None and detector.alimentar(bloque):
+                    print("✅ Silencio detectado. Procesando...")
+                    break
+                if sostenido and not debe_seguir_grabando():
                     print("✅ Botón soltado. Procesando...")
                     break
-                    
-    except KeyboardInterrupt:
-        if INPUT_CTRL: print("\n⚠️ Interrupción manual.")
-        else: print("\n✅ Grabación finalizada (Teclado).")
+                if parar_grabacion.is_set():
+                    break
+    except (sd.PortAudioError, TimeoutError) as e:
+        print(f"❌ Error micrófono: {e}")
 
-    if not audio_data or len(audio_data) < 2: return None
+    if buffer_mic.frames < 2 * 1024:
+        if subida is not None: subida.cancelar()
+        return None
     
-    full_audio = np.concatenate(audio_data, axis=0)
-    wav_buffer = io.BytesIO()
-    sf.write(wav_buffer, full_audio, SAMPLE_RATE, format='WAV')
-    wav_buffer.seek(0)
-    wav_buffer.name = "audio.wav"
-
-    return wav_buffer
-
-def transcribir_audio(audio_buffer):
-    # El prompt guía el estilo. Le damos ejemplos de "Soles con céntimos"
-    prompt_contexto = "El precio es 3.50, 4.90, 1.20 soles. Quiero ahorrar 10.50. Gasté 4.90."
+    # Vista sin copia de lo grabado
+    full_audio = buffer_mic.vista()
+    # Solo subimos la parte con voz: menos bytes a Whisper y menos espera
+    full_audio = vad.recortar_silencio(full_audio, SAMPLE_RATE)
+    if full_audio is None:
+        print("🤫 No se detectó voz.")
+        if subida is not None: subida.cancelar()
+        return None
+
+    if subida is not None:
+        # En streaming el audio ya salió (sin recortar): solo falta la cola
+        subida.cerrar()
+        return subida
+    # 16 kHz comprimido (FORMATO_SUBIDA): una fracción de los bytes del WAV a 44.1 kHz
+    return codificacion.preparar_subida(full_audio, SAMPLE_RATE)
+
+# El prompt guía el estilo. Le damos ejemplos de "Soles con céntimos"
+PROMPT_TRANSCRIPCION = "El precio es 3.50, 4.90, 1.20 soles. Quiero ahorrar 10.50. Gasté 4.90."
+
+def iniciar_subida_transcripcion():
+    """Abre ya la petición a Whisper; el audio se irá mandando mientras se graba."""
+    return SubidaEnStreaming(
+        f"{str(client.base_url).rstrip('/')}/audio/transcriptions",
+        SAMPLE_RATE,
+        headers={"Authorization": f"Bearer {api_key}"},
+        campos={"model": "whisper-1", "language": "es", "prompt": PROMPT_TRANSCRIPCION},
+    ).iniciar()
+
+async def transcribir_audio(audio_buffer):
+    if isinstance(audio_buffer, SubidaEnStreaming):
+        # Va por requests en su hilo: si cortan el turno no se aborta, su respuesta se descarta
+        response = await en_hilo(audio_buffer.respuesta)
+        print(audio_buffer.resumen())
+        response.raise_for_status()
+        return response.json().get("text", "")
     
-    return client.audio.transcriptions.create(
+    transcripcion = await aclient.audio.transcriptions.create(
         model="whisper-1", 
         file=audio_buffer, 
         language="es",
-        prompt=prompt_contexto # <--- ESTO HACE LA MAGIA
-    ).text
+        prompt=PROMPT_TRANSCRIPCION # <--- ESTO HACE LA MAGIA
+    )
+    return transcripcion.text
+
+# --- 🔁 PUENTES ENTRE EL LOOP Y LOS HILOS DE AUDIO ---
+# Grabar bloquea (PortAudio): corre en el executor y el loop solo lo espera.
+# Reproducir lo hace el planificador de audio, que ordena conversación y anuncios.
+
+def en_hilo(funcion, *args):
+    """Arranca `funcion` en el executor ya mismo y devuelve el futuro awaitable."""
+    return asyncio.get_running_loop().run_in_executor(None, funcion, *args)
+
+class TecladoAsync:
+    """Un solo hilo lee la consola; cada ENTER llega al loop como un evento awaitable."""
+
+    def __init__(self):
+        self._cola = None
+
+    def iniciar(self, loop):
+        self._cola = asyncio.Queue()
+
+        def leer():
+            while True:
+                try:
+                    input()
+                except EOFError:
+                    return
+                loop.call_soon_threadsafe(self._cola.put_nowait, True)
+
+        threading.Thread(target=leer, daemon=True).start()
+
+    def vaciar(self):
+        """Descarta ENTERs viejos (apretados mientras el chanchito hablaba)."""
+        while not self._cola.empty():
+            self._cola.get_nowait()
+
+    async def enter(self):
+        await self._cola.get()
 
-def hablar_chanchito(texto):
+teclado = TecladoAsync()
+
+async def grabar_audio_async(subida=None):
+    """
+    grabar_audio en el executor; en modo teclado, el próximo ENTER la corta.
+    Si el turno se cancela, la grabación también para (el hilo no queda colgado).
+    """
+    parar_grabacion.clear()
+    vigia = None
+    if not INPUT_CTRL:
+        async def parar_con_enter():
+            await teclado.enter()
+            parar_grabacion.set()
+        vigia = asyncio.ensure_future(parar_con_enter())
+    grabacion = en_hilo(grabar_audio, subida)
+    try:
+        return await grabacion
+    except asyncio.CancelledError:
+        parar_grabacion.set()
+        raise
+    finally:
+        if vigia is not None:
+            vigia.cancel()
+
+async def hablar_chanchito(texto):
+    if not turnos.vigente():
+        return  # Turno ya cortado: esta respuesta llegó tarde
     print(f"🐷 Chanchito dice: {texto}")
     try:
-        response = client.audio.speech.create(
-            model="tts-1-hd",
-            voice="nova", # Voz infantil/amable
-            input=texto
+        # Streaming (TTS_STREAMING=1): suena mientras se descarga el audio
+        await planificador.encolar_async(
+            lambda control: voz.reproducir(client, texto, control), etiqueta="respuesta"
         )
-        # Reproducción segura en memoria
-        audio_bytes = io.BytesIO(response.content)
-        data, fs = sf.read(audio_bytes)
-        sd.play(data, fs)
-        sd.wait()
     except Exception as e:
         print(f"❌ Error audio: {e}")
 
+async def hablar_frases(frases):
+    """
+    Como hablar_chanchito, pero cada oración suena apenas está lista.
+    `frases` es un iterable async (el stream de gpt-4o cortado en oraciones).
+    """
+    if not turnos.vigente():
+        return
+    cola = queue.Queue()
+    try:
+        reproduccion = planificador.encolar_async(
+            lambda control: voz.reproducir_frases(
+                client, iter(cola.get, None),
+                lambda frase: print(f"🐷 Chanchito dice: {frase}"), control,
+            ),
+            etiqueta="respuesta",
+        )
+        try:
+            async for frase in frases:
+                cola.put(frase)
+        except asyncio.CancelledError:
+            reproduccion.cancel()  # Lo que ya estaba sonando también se calla
+            raise
+        finally:
+            cola.put(None)
+        await reproduccion
+    except Exception as e:
+        print(f"❌ Error audio: {e}")
+
+async def encadenar(primera, resto):
+    yield primera
+    async for frase in resto:
+        yield frase
+
+async def frases_de(texto):
+    """Texto ya completo (plantilla) como iterable async de oraciones."""
+    for frase in dividir_frases([texto]):
+        yield frase
+
+
+# --- ✂️ TURNO (se corta con otra pulsación) ---
+
+async def correr_turno(turno):
+    """El turno como tarea cortable; en modo teclado, un ENTER mientras tanto lo corta."""
+    vigia = None
+    if not INPUT_CTRL:
+        teclado.vaciar()
+        async def cortar_con_enter():
+            await teclado.enter()
+            turnos.interrumpir()
+        vigia = asyncio.ensure_future(cortar_con_enter())
+    try:
+        return await turnos.correr(turno)
+    finally:
+        if vigia is not None:
+            vigia.cancel()
+
+async def atender_turno(audio, system_prompt):
+    enviar_dato_serial(3)
+    texto_usuario = await transcribir_audio(audio)
+    print(f"🗣️  Niño: {texto_usuario}")
+
+    if not texto_usuario: return
+
+    # 2. Pensar
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": texto_usuario}
+    ]
+    
+    # 2a. Ruta rápida: pedidos claros van directo a la tool, sin gpt-4o
+    respondido = False
+    intencion, t_parseo = intenciones.medir(texto_usuario)
+    estadisticas_intenciones.registrar(intencion, t_parseo)
+    if intencion is not None:
+        print(f"⚡ Intención local: {intencion['nombre']} {intencion['argumentos']}")
+        mensaje_ia = intenciones.como_mensaje_asistente(intencion)
+    elif RESPUESTA_STREAMING:
+        t_llm = time.perf_counter()
+        chat = ChatEnStreaming(
+            aclient,
+            model="gpt-4o",
+            messages=messages,
+            tools=tools_schema,
+            tool_choice="auto"
+        )
+        frases = dividir_frases_async(chat.fragmentos())
+        # Si gpt-4o contesta con texto, la primera oración ya puede sonar;
+        # si pide tools, el stream se agota sin frases
+        primera = await anext(frases, None)
+        if primera is not None:
+            estadisticas_intenciones.registrar_llm(time.perf_counter() - t_llm)
+            await hablar_frases(encadenar(primera, frases))
+            respondido = True
+        mensaje_ia = await chat.mensaje()
+        if primera is None:
+            estadisticas_intenciones.registrar_llm(time.perf_counter() - t_llm)
+    else:
+        t_llm = time.perf_counter()
+        response = await aclient.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            tools=tools_schema,
+            tool_choice="auto"
+        )
+        estadisticas_intenciones.registrar_llm(time.perf_counter() - t_llm)
+        mensaje_ia = response.choices[0].message
+    print(estadisticas_intenciones.resumen())
+    
+    # 3. Ejecutar Herramientas (si aplica)
+    if mensaje_ia.tool_calls:
+        messages.append(mensaje_ia)
+        resultados = []
+
+        for tool, fn_name, args, res in await despachador.despachar(mensaje_ia.tool_calls):
+            messages.append({
+                "tool_call_id": tool.id,
+                "role": "tool",
+                "name": fn_name,
+                "content": str(res)
+            })
+            resultados.append((fn_name, args, res))
+
+        # Respuesta final con plantilla; GPT solo si alguna tool no tiene (o RESPUESTAS_LLM=1)
+        texto_final = respuestas.renderizar_turno(resultados)
+        if texto_final is not None and RESPUESTA_STREAMING:
+            # Resúmenes de varias oraciones: la primera suena sin esperar el TTS del resto
+            await hablar_frases(frases_de(texto_final))
+        elif texto_final is not None:
+            await hablar_chanchito(texto_final)
+        elif RESPUESTA_STREAMING:
+            chat = ChatEnStreaming(aclient, model="gpt-4o", messages=messages)
+            await hablar_frases(dividir_frases_async(chat.fragmentos()))
+        else:
+            final_response = await aclient.chat.completions.create(
+                model="gpt-4o", messages=messages
+            )
+            await hablar_chanchito(final_response.choices[0].message.content)
+        enviar_dato_serial(1)
+        
+    elif not respondido:
+        # Respuesta directa (Educación financiera / Charla)
+        await hablar_chanchito(mensaje_ia.content)
+
 
 # --- 🚀 BUCLE PRINCIPAL ---
 
-def main():
+async def main():
 
-    iniciar_hilo_realtime()
+    if not INPUT_CTRL:
+        teclado.iniciar(asyncio.get_running_loop())
+    abrir_al_arrancar()  # Un solo OutputStream para conversación y anuncios
+    realtime = iniciar_realtime()
+    asyncio.ensure_future(api.precalentar())
+    voz.precalentar_en_segundo_plano(client, [frase_deposito(m) for m in MONTOS_FRECUENTES])
+    anunciador.preparar_en_segundo_plano(client)
 
     print("🐷 SISTEMA CHANCHITO ACTIVO")
     print(f"🕹️  MODO DE CONTROL: {'BOTÓN GPIO' if INPUT_CTRL else 'TECLADO'}")
@@ -425,79 +766,42 @@ def main():
     - ¡Sé entusiasta pero muy corto! (Máximo 2 frases).
     """
 
-    while True:
+    if INPUT_CTRL:
+        # Barge-in: apretar mientras el chanchito piensa o habla corta el turno
+        boton.al_cambiar(lambda presionado, t: presionado and turnos.interrumpir(t))
 
-        esperar_activacion()
-        
-        # 1. Escuchar
-        
-        enviar_dato_serial(2)
-        audio = grabar_audio()
-        #enviar_dato_serial(1)
+    try:
+        cortado = False
+        while True:
 
-        if not audio: continue
-        else: enviar_dato_serial(1)
+            # Tras un corte el botón ya está apretado: se graba sin esperar otra señal
+            if not cortado:
+                await esperar_activacion()
+        
+            # 1. Escuchar
         
-        enviar_dato_serial(3)
-        texto_usuario = transcribir_audio(audio)
-        print(f"🗣️  Niño: {texto_usuario}")
+            enviar_dato_serial(2)
+            audio = await grabar_audio_async(iniciar_subida_transcripcion() if TRANSCRIPCION_STREAMING else None)
+            #enviar_dato_serial(1)
 
-        if not texto_usuario: continue
+            cortado = False
+            if not audio: continue
+            else: enviar_dato_serial(1)
 
-        # 2. Pensar
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": texto_usuario}
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            tools=tools_schema,
-            tool_choice="auto"
-        )
-        mensaje_ia = response.choices[0].message
-        
-        # 3. Ejecutar Herramientas (si aplica)
-        if mensaje_ia.tool_calls:
-            messages.append(mensaje_ia)
-            
-            for tool in mensaje_ia.tool_calls:
-                fn_name = tool.function.name
-                args = json.loads(tool.function.arguments)
-                
-                print(f"⚙️ Ejecutando: {fn_name}...")
-                
-                if fn_name == "crear_meta":
-                    res = tool_crear_meta(args["monto"], args["motivo"])
-                elif fn_name == "consultar_ahorros":
-                    res = tool_consultar_ahorros()
-                elif fn_name == "enviar_dinero_a_meta":
-                    res = tool_enviar_dinero_a_meta(args["monto"], args["nombre_meta"])
-                else:
-                    res = "{}"
-
-                messages.append({
-                    "tool_call_id": tool.id,
-                    "role": "tool",
-                    "name": fn_name,
-                    "content": str(res)
-                })
-
-            # Generar respuesta final hablada post-herramienta
-            final_response = client.chat.completions.create(
-                model="gpt-4o", messages=messages
-            )
-            texto_final = final_response.choices[0].message.content
-            hablar_chanchito(texto_final)
-            enviar_dato_serial(1)
-            
-        else:
-            # Respuesta directa (Educación financiera / Charla)
-            hablar_chanchito(mensaje_ia.content)
+            # 2-3. Transcribir, pensar y hablar (atender_turno): otra pulsación lo corta
+            cortado = await correr_turno(atender_turno(audio, system_prompt))
+    finally:
+        # El loop solo guarda referencias débiles a sus tareas: `realtime` la
+        # mantiene viva y aquí se cierra su websocket antes de que muera el loop
+        realtime.cancel()
+        await asyncio.gather(realtime, return_exceptions=True)
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n👋 ¡Oink bye!")
\ No newline at end of file
+        print("\n👋 ¡Oink bye!")
+    finally:
+        print(turnos.resumen())
+        if boton is not None:
+            boton.cerrar()
\ No newline at end of file
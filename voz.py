@@ -0,0 +1,233 @@
+import os
+import io
+import time
+import queue
+import threading
+import numpy as np
+import soundfile as sf
+from dotenv import load_dotenv
+from cache_tts import obtener_cache
+from codificacion import remuestrear
+from salida_audio import obtener_salida
+
+load_dotenv()
+
+# --- ⚙️ CONFIGURACIÓN TTS ---
+TTS_MODELO = "tts-1-hd"
+TTS_VOZ = "nova"  # Voz infantil/amable
+TTS_STREAMING = os.getenv("TTS_STREAMING", "1") == "1"  # 1 = reproducir mientras se descarga
+
+# response_format="pcm" de OpenAI: 24 kHz, 16 bits con signo, mono, little-endian
+TASA_PCM = 24000
+BYTES_POR_MUESTRA = 2
+PREBUFFER_MS = int(os.getenv("TTS_PREBUFFER_MS", 200))  # Colchón antes de empezar a sonar
+TAMANO_CHUNK = 4096
+
+# Métrica de la última frase reproducida (la imprimimos y queda para consultar)
+ultima_metrica = {}
+
+
+class ControlReproduccion:
+    """
+    Lo que se puede tocar desde otro hilo de una reproducción en curso
+    (el planificador de audio): cortarla o bajarle el volumen. La salida
+    de audio lo consulta en cada bloque.
+    """
+    __slots__ = ("detener", "ganancia")
+
+    def __init__(self):
+        self.detener = threading.Event()
+        self.ganancia = 1.0
+
+    def interrumpir(self):
+        self.detener.set()
+
+
+def _registrar_metrica(modo, t0, t_primer_audio, latencia_salida=0.0, **extra):
+    global ultima_metrica
+    ultima_metrica = {
+        "modo": modo,
+        # Tiempo hasta que el primer sample sale hacia la tarjeta de sonido
+        "primer_audio_s": (t_primer_audio - t0 + latencia_salida) if t_primer_audio else None,
+        "total_s": time.perf_counter() - t0,
+        **extra,
+    }
+    if ultima_metrica["primer_audio_s"] is not None:
+        print(f"⏱️  Primer audio en {ultima_metrica['primer_audio_s']:.2f} s ({modo})")
+    return ultima_metrica
+
+
+def sintetizar_completo(client, texto):
+    """Pide el audio completo y lo decodifica. Devuelve (pcm_int16, fs)."""
+    response = client.audio.speech.create(model=TTS_MODELO, voice=TTS_VOZ, input=texto)
+    audio_bytes = io.BytesIO(response.content)
+    return sf.read(audio_bytes, dtype='int16')
+
+
+def sintetizar_pcm(client, texto):
+    """Pide PCM crudo (sin MP3 que decodificar). Devuelve (pcm_int16, fs)."""
+    response = client.audio.speech.create(
+        model=TTS_MODELO, voice=TTS_VOZ, input=texto, response_format="pcm"
+    )
+    return np.frombuffer(response.content, dtype=np.int16), TASA_PCM
+
+
+def _clave(texto):
+    return obtener_cache().clave(texto, TTS_MODELO, TTS_VOZ)
+
+
+def _tocar(pcm, fs, control):
+    """Reproduce PCM int16 ya en memoria por la salida compartida."""
+    obtener_salida().reproducir(pcm, fs, control).esperar()
+
+
+def reproducir_pcm(pcm, fs, control=None):
+    """Reproduce audio que ya está en memoria (cache, clips pregrabados)."""
+    t0 = time.perf_counter()
+    _tocar(pcm, fs, control or ControlReproduccion())
+    return _registrar_metrica("cache", t0, t0)
+
+
+def reproducir_completo(client, texto, control=None):
+    """Modo clásico: descarga todo, decodifica y recién ahí reproduce."""
+    t0 = time.perf_counter()
+    data, fs = sintetizar_completo(client, texto)
+    obtener_cache().guardar(_clave(texto), data, fs)
+    t_play = time.perf_counter()
+    _tocar(data, fs, control or ControlReproduccion())
+    return _registrar_metrica("completo", t0, t_play)
+
+
+def _volcar_tts(client, texto, pista, control):
+    """
+    Descarga el TTS de `texto` empujando los chunks PCM a la `pista` a medida
+    que llegan. Devuelve el instante del primer byte. Si termina bien (sin
+    interrupción), la frase queda en cache.
+    """
+    t_primer_byte = None
+    recibido = bytearray()  # Copia completa para guardarla en el cache al final
+    with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODELO, voice=TTS_VOZ, input=texto, response_format="pcm"
+    ) as response:
+        for chunk in response.iter_bytes(chunk_size=TAMANO_CHUNK):
+            if control.detener.is_set():
+                return t_primer_byte  # Frase a medias: no se cachea
+            if t_primer_byte is None:
+                t_primer_byte = time.perf_counter()
+            pista.escribir(chunk)
+            recibido += chunk
+    recibido = recibido[:len(recibido) - len(recibido) % BYTES_POR_MUESTRA]
+    obtener_cache().guardar(_clave(texto), np.frombuffer(recibido, dtype=np.int16), TASA_PCM)
+    return t_primer_byte
+
+
+def reproducir_streaming(client, texto, control=None):
+    """
+    Modo streaming: abre una pista antes de pedir el TTS y le va empujando
+    los chunks PCM a medida que llegan por la red (suena tras PREBUFFER_MS).
+    """
+    t0 = time.perf_counter()
+    control = control or ControlReproduccion()
+    salida = obtener_salida()
+    pista = salida.pista(control, TASA_PCM, PREBUFFER_MS)
+    try:
+        t_primer_byte = _volcar_tts(client, texto, pista, control)
+    finally:
+        pista.terminar()
+    pista.esperar()
+
+    return _registrar_metrica(
+        "streaming", t0, pista.t_primer_audio, salida.latencia,
+        primer_byte_s=(t_primer_byte - t0) if t_primer_byte else None,
+        vaciados=pista.vaciados,
+    )
+
+
+def reproducir_frases(client, frases, al_decir=None, control=None):
+    """
+    Reproduce una secuencia de frases que puede estar generándose todavía
+    (ej: el stream de gpt-4o cortado en oraciones). Un hilo consume `frases`
+    mientras este va sintetizando cada oración apenas está completa; todo
+    suena seguido por una sola salida de audio, sin huecos entre frases
+    mientras el TTS vaya más rápido que la reproducción.
+    `al_decir(frase)` se llama cuando cada frase empieza a sintetizarse.
+    """
+    t0 = time.perf_counter()
+    control = control or ControlReproduccion()
+    cola = queue.Queue()
+
+    def producir():
+        try:
+            for frase in frases:
+                cola.put(frase)
+        except Exception as e:
+            print(f"❌ Error generando frases: {e}")
+        finally:
+            cola.put(None)
+
+    productor = threading.Thread(target=producir, daemon=True)
+    productor.start()
+    salida = obtener_salida()
+    pista = salida.pista(control, TASA_PCM, PREBUFFER_MS)
+    n_frases = 0
+    try:
+        while True:
+            frase = cola.get()
+            if frase is None:
+                break
+            if control.detener.is_set():
+                continue  # Seguimos vaciando la cola para que el productor termine
+            n_frases += 1
+            if al_decir is not None:
+                al_decir(frase)
+            en_cache = obtener_cache().obtener(_clave(frase))
+            if en_cache is None:
+                _volcar_tts(client, frase, pista, control)
+                continue
+            pcm, fs = en_cache
+            if fs != TASA_PCM:
+                pcm = remuestrear(pcm, fs, TASA_PCM)
+            pista.escribir(pcm)
+    finally:
+        pista.terminar()
+        # Que nadie más itere `frases` después de volver (ej: ChatEnStreaming.mensaje())
+        productor.join()
+    pista.esperar()
+
+    return _registrar_metrica(
+        "frases", t0, pista.t_primer_audio, salida.latencia,
+        frases=n_frases, vaciados=pista.vaciados,
+    )
+
+
+def reproducir(client, texto, control=None):
+    """Punto de entrada común para `hablar_chanchito` y `hablar`."""
+    en_cache = obtener_cache().obtener(_clave(texto))
+    if en_cache is not None:
+        return reproducir_pcm(*en_cache, control=control)
+    if TTS_STREAMING:
+        return reproducir_streaming(client, texto, control)
+    return reproducir_completo(client, texto, control)
+
+
+def pcm_de_frase(client, texto):
+    """(pcm_int16, fs) de `texto`: del cache si ya se dijo, si no se sintetiza y queda guardado."""
+    en_cache = obtener_cache().obtener(_clave(texto))
+    if en_cache is not None:
+        return en_cache
+    pcm, fs = sintetizar_pcm(client, texto)
+    obtener_cache().guardar(_clave(texto), pcm, fs)
+    return pcm, fs
+
+
+def precalentar(client, frases):
+    """Deja en disco las frases frecuentes (se llama en un hilo al arrancar)."""
+    return obtener_cache().precalentar(
+        frases, lambda texto: sintetizar_pcm(client, texto), TTS_MODELO, TTS_VOZ
+    )
+
+
+def precalentar_en_segundo_plano(client, frases):
+    hilo = threading.Thread(target=precalentar, args=(client, frases), daemon=True)
+    hilo.start()
+    return hilo